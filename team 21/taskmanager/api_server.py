@@ -0,0 +1,419 @@
+"""Local HTTP/JSON API over TaskService, so many clients share one warm process and connection pool.
+
+    python api_server.py [--host 127.0.0.1] [--port 8080] [--backend sqlite]
+
+Requests other than registration and login authenticate with a session token
+("Authorization: Bearer <token>") or HTTP Basic credentials. A token is checked
+in memory; Basic credentials are verified against the stored password hash.
+
+    POST   /users             {"username", "password"} -> 201 {"id"}; 409 if the name is taken (ignoring case)
+    POST   /sessions          {"username", "password"} -> 201 {"token", "user_id", "expires_at"}
+    DELETE /sessions          -> 204, ending the session whose token authenticated the request
+    GET    /tasks             ?sort=&priority=&due_from=&due_to=&min_duration=&max_duration=&q=
+                              &limit=&offset=&cursor= -> {"tasks", "next_cursor"}
+    POST   /tasks             task object -> 201 {"id"}; list of tasks -> 201 {"ids"}
+    PUT    /tasks             list of tasks with "id" -> {"updated": [bool, ...]}
+    DELETE /tasks             {"ids": [...]} -> {"deleted": [bool, ...]}
+    GET    /tasks/search      ?q=text[&limit=N] -> {"tasks"}, best match first
+    GET    /tasks/<id>        -> task object
+    PUT    /tasks/<id>        task object -> updated task object
+    DELETE /tasks/<id>        -> 204
+    GET    /stats             -> {"cache", "pool", "sync"}  (sync is null unless the backend is the replica)
+    GET    /metrics           ?format=prometheus|json|text -> latency histograms and counters (no authentication)
+
+A task object is {"id", "title", "description", "priority", "deadline", "duration"}
+with the deadline as "DD/MM/YYYY HH:MM AM/PM". Responses add "deadline_at", the
+same deadline as an ISO 8601 timestamp.
+
+Task listing takes comma-separated sort keys (deadline, priority, duration, title,
+id; "-" prefix for descending) and priorities, ISO 8601 due_from/due_to bounds,
+and a text match in q. Pass next_cursor back as cursor for the next page.
+"""
+import argparse
+import base64
+import binascii
+import json
+import logging
+import re
+import sys
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import config
+import metrics
+from errors import TaskManagerError, TaskNotFoundError, UsernameTakenError
+from storage import BACKENDS, create_backend
+from task_query import TaskQuery
+from task_service import TaskService
+from validation import TaskValidationError
+
+logging.basicConfig(
+    level=config.LOG_LEVEL,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 1000
+
+# (method, path pattern, handler method, requires authentication)
+ROUTES = [
+    ("POST", re.compile(r"/users"), "_register", False),
+    ("POST", re.compile(r"/sessions"), "_open_session", False),
+    ("DELETE", re.compile(r"/sessions"), "_close_session", True),
+    ("GET", re.compile(r"/tasks"), "_list_tasks", True),
+    ("POST", re.compile(r"/tasks"), "_create_tasks", True),
+    ("PUT", re.compile(r"/tasks"), "_update_tasks", True),
+    ("DELETE", re.compile(r"/tasks"), "_delete_tasks", True),
+    ("GET", re.compile(r"/tasks/search"), "_search_tasks", True),
+    ("GET", re.compile(r"/tasks/(\d+)"), "_get_task", True),
+    ("PUT", re.compile(r"/tasks/(\d+)"), "_update_task", True),
+    ("DELETE", re.compile(r"/tasks/(\d+)"), "_delete_task", True),
+    ("GET", re.compile(r"/stats"), "_stats", True),
+    ("GET", re.compile(r"/metrics"), "_metrics", False),
+]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class ApiError(Exception):
+    """An error response with an HTTP status."""
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def task_to_json(task):
+    """Converts a Task to its API representation."""
+    return {
+        "id": task.id, "title": task.title, "description": task.description,
+        "priority": task.priority, "deadline": task.deadline_str, "duration": task.duration,
+        "deadline_at": task.deadline_datetime.isoformat()
+    }
+
+
+def task_fields(item):
+    """Returns (title, description, priority, deadline, duration) from a task object."""
+    if not isinstance(item, dict):
+        raise ApiError(400, "Each task must be a JSON object")
+    return (
+        item.get("title"), item.get("description") or "", item.get("priority"),
+        item.get("deadline"), item.get("duration")
+    )
+
+
+def encode_cursor(cursor):
+    """Turns a keyset cursor into an opaque URL-safe string."""
+    if cursor is None:
+        return None
+    values = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in cursor]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token):
+    """Reverses encode_cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return tuple(datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value for value in values)
+    except (binascii.Error, KeyError, TypeError, ValueError):
+        raise ApiError(400, "Invalid cursor")
+
+
+def _query_param(query, name, convert):
+    """Returns a converted query-string value, or None if absent."""
+    if name not in query:
+        return None
+    try:
+        return convert(query[name][0])
+    except ValueError:
+        raise ApiError(400, f"Invalid value for {name}")
+
+
+def build_task_query(query):
+    """Builds a TaskQuery from /tasks query-string parameters."""
+    try:
+        task_query = TaskQuery()
+        if "sort" in query:
+            task_query = task_query.order_by(*query["sort"][0].split(","))
+        if "priority" in query:
+            task_query = task_query.priority(*query["priority"][0].split(","))
+        task_query = task_query.due_between(
+            _query_param(query, "due_from", datetime.fromisoformat),
+            _query_param(query, "due_to", datetime.fromisoformat)
+        ).duration_between(
+            _query_param(query, "min_duration", int), _query_param(query, "max_duration", int)
+        ).matching(query.get("q", [""])[0])
+        limit = _query_param(query, "limit", int)
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ApiError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        task_query = task_query.limit(limit).offset(_query_param(query, "offset", int) or 0)
+        if "cursor" in query:
+            task_query = task_query.after(decode_cursor(query["cursor"][0]))
+        return task_query
+    except ValueError as e:
+        raise ApiError(400, str(e))
+
+
+class TaskApiHandler(BaseHTTPRequestHandler):
+    """Routes JSON requests to the server's TaskService."""
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse one connection
+    # Headers and body go out as separate writes; with Nagle on, the body waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    server_version = "TaskManagerAPI/1.0"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        logger.info("%s - " + format, self.address_string(), *args)
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _handle(self, method):
+        """Dispatches a request and writes the JSON response."""
+        url = urlsplit(self.path)
+        headers = self._response_headers = {}  # handlers may add to these
+        self._body_read = False
+        self._session_token = None
+        try:
+            handler, args, authenticated = self._route(method, url.path)
+            user_id = self._authenticate() if authenticated else None
+            status, payload = handler(user_id, parse_qs(url.query), *args)
+        except ApiError as e:
+            status, payload, headers = e.status, {"error": str(e)}, dict(e.headers)
+        except TaskValidationError as e:
+            status, payload = 400, {"error": str(e), "title": e.title}
+        except TaskNotFoundError as e:
+            status, payload = 404, {"error": str(e)}
+        except UsernameTakenError as e:
+            status, payload = 409, {"error": str(e)}
+        except TaskManagerError as e:
+            status, payload = 503, {"error": str(e)}
+        except Exception as e:
+            logger.exception("Unhandled error for %s %s: %s", method, url.path, e)
+            status, payload = 500, {"error": "Internal server error"}
+        if not self._body_read:
+            self._discard_body(headers)
+        self._send(status, payload, headers)
+
+    def _discard_body(self, headers):
+        """Skips an unread request body so it isn't parsed as the next request on this connection."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = None
+        if length is not None and length <= config.API_MAX_BODY_BYTES:
+            self.rfile.read(length)
+        else:
+            self.close_connection = True
+            headers["Connection"] = "close"
+
+    def _route(self, method, path):
+        """Returns (bound handler, path arguments, requires authentication)."""
+        path_known = False
+        for route_method, pattern, handler_name, authenticated in ROUTES:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            path_known = True
+            if route_method == method:
+                return getattr(self, handler_name), [int(group) for group in match.groups()], authenticated
+        if path_known:
+            raise ApiError(405, f"{method} not allowed on {path}")
+        raise ApiError(404, f"No such resource: {path}")
+
+    def _authenticate(self):
+        """Returns the user id for the request's session token or Basic credentials."""
+        challenge = {"WWW-Authenticate": 'Bearer realm="taskmanager", Basic realm="taskmanager"'}
+        header = self.headers.get("Authorization", "")
+        scheme, _, encoded = header.partition(" ")
+        if scheme.lower() == "bearer":
+            user_id = self.service.authorize(encoded.strip())
+            if not user_id:
+                raise ApiError(401, "Invalid or expired session", challenge)
+            self._session_token = encoded.strip()
+            return user_id
+        if scheme.lower() != "basic":
+            raise ApiError(401, "Authentication required", challenge)
+        try:
+            username, _, password = base64.b64decode(encoded).decode("utf-8").partition(":")
+        except (binascii.Error, UnicodeDecodeError):
+            raise ApiError(401, "Malformed credentials", challenge)
+        user_id = self.service.login(username, password)
+        if not user_id:
+            raise ApiError(401, "Invalid username or password", challenge)
+        return user_id
+
+    def _read_json(self):
+        """Parses the request body as JSON."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ApiError(400, "Invalid Content-Length")
+        if length > config.API_MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        body = self.rfile.read(length)
+        self._body_read = True
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+
+    def _send(self, status, payload, headers=None):
+        """Writes a response; a str payload is sent as plain text, anything else as JSON."""
+        headers = dict(headers or {})
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            headers.setdefault("Content-Type", "text/plain; charset=utf-8")
+        elif payload is not None:
+            body = json.dumps(payload, default=str).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        else:
+            body = b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _register(self, user_id, query):
+        body = self._read_json()
+        if not isinstance(body, dict) or not body.get("username") or not body.get("password"):
+            raise ApiError(400, "username and password are required")
+        return 201, {"id": self.service.register(str(body["username"]), str(body["password"]))}
+
+    def _open_session(self, user_id, query):
+        body = self._read_json()
+        if not isinstance(body, dict) or not body.get("username") or not body.get("password"):
+            raise ApiError(400, "username and password are required")
+        session = self.service.open_session(str(body["username"]), str(body["password"]))
+        if session is None:
+            raise ApiError(401, "Invalid username or password")
+        user_id, token, expires_at = session
+        return 201, {"token": token, "user_id": user_id, "expires_at": datetime.fromtimestamp(expires_at).isoformat()}
+
+    def _close_session(self, user_id, query):
+        if self._session_token is None:
+            raise ApiError(400, "Only a session token can be used to log out")
+        self.service.close_session(self._session_token)
+        return 204, None
+
+    def _list_tasks(self, user_id, query):
+        task_query = build_task_query(query)
+        if task_query.limit_count is not None:
+            tasks, next_cursor = self.service.query_tasks(user_id, task_query)
+        else:
+            tasks, next_cursor = self.service.get_tasks(user_id, query=task_query), None
+        return 200, {"tasks": [task_to_json(task) for task in tasks], "next_cursor": encode_cursor(next_cursor)}
+
+    def _search_tasks(self, user_id, query):
+        limit = _query_param(query, "limit", int) or 50
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ApiError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        tasks = self.service.search_tasks(user_id, query.get("q", [""])[0], limit)
+        return 200, {"tasks": [task_to_json(task) for task in tasks]}
+
+    def _create_tasks(self, user_id, query):
+        body = self._read_json()
+        if isinstance(body, list):
+            return 201, {"ids": self.service.add_tasks(user_id, [task_fields(item) for item in body])}
+        return 201, {"id": self.service.add_task(user_id, *task_fields(body))}
+
+    def _update_tasks(self, user_id, query):
+        body = self._read_json()
+        if not isinstance(body, list):
+            raise ApiError(400, "Expected a list of tasks")
+        tasks = []
+        for item in body:
+            fields = task_fields(item)
+            if not isinstance(item.get("id"), int):
+                raise ApiError(400, "Each task needs an integer id")
+            tasks.append((item["id"],) + fields)
+        return 200, {"updated": self.service.edit_tasks(user_id, tasks)}
+
+    def _delete_tasks(self, user_id, query):
+        body = self._read_json()
+        task_ids = body.get("ids") if isinstance(body, dict) else None
+        if not isinstance(task_ids, list) or not all(isinstance(task_id, int) for task_id in task_ids):
+            raise ApiError(400, 'Expected {"ids": [integer, ...]}')
+        return 200, {"deleted": self.service.delete_tasks(user_id, task_ids)}
+
+    def _get_task(self, user_id, query, task_id):
+        return 200, task_to_json(self.service.get_task(user_id, task_id))
+
+    def _update_task(self, user_id, query, task_id):
+        self.service.edit_task(user_id, task_id, *task_fields(self._read_json()))
+        return 200, task_to_json(self.service.get_task(user_id, task_id))
+
+    def _delete_task(self, user_id, query, task_id):
+        self.service.delete_task(user_id, task_id)
+        return 204, None
+
+    def _stats(self, user_id, query):
+        return 200, {
+            "cache": self.service.cache_stats(), "pool": self.service.pool_stats(), "sync": self.service.sync_status()
+        }
+
+    def _metrics(self, user_id, query):
+        output = _query_param(query, "format", str) or "prometheus"
+        if output == "json":
+            return 200, metrics.REGISTRY.snapshot()
+        if output == "text":
+            return 200, metrics.REGISTRY.to_text()
+        if output != "prometheus":
+            raise ApiError(400, "format must be prometheus, json or text")
+        self._response_headers["Content-Type"] = PROMETHEUS_CONTENT_TYPE
+        return 200, metrics.REGISTRY.to_prometheus()
+
+
+def make_server(service, host=None, port=None):
+    """Builds a threaded API server bound to ``service``; call serve_forever() to run it."""
+    server = ThreadingHTTPServer(
+        (host or config.API_HOST, config.API_PORT if port is None else port), TaskApiHandler
+    )
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    """Entry point for the HTTP API."""
+    parser = argparse.ArgumentParser(description="Serve the task manager over HTTP/JSON.")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="storage backend (default: from config)")
+    args = parser.parse_args(argv)
+
+    service = TaskService(create_backend(args.backend))
+    try:
+        service.start()
+    except TaskManagerError as e:
+        print(e, file=sys.stderr)
+        return 1
+    server = make_server(service, args.host, args.port)
+    logger.info("Serving task API on http://%s:%s", args.host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down task API")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
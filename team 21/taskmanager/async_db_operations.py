@@ -0,0 +1,370 @@
+import logging
+import config
+import metrics
+import migrations
+from migrations import PRIORITY_RANK_SQL
+from task import TASK_FIELDS, Task, tasks_from_rows
+from user import User
+
+try:
+    import asyncpg
+except ImportError:  # optional: only needed for asyncio/service use
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+TASK_COLUMNS = ", ".join(TASK_FIELDS)
+
+if asyncpg is not None:
+    class TimedConnection(asyncpg.Connection):
+        """Connection that records statement latency, rows and driver errors in metrics.py.
+
+        asyncpg executes and fetches in one round trip, so fetch* calls are timed as "fetch"
+        and everything else as "execute"; transactions commit through execute.
+        """
+        async def execute(self, query, *args, timeout=None):
+            return await metrics.timed_await("execute", super().execute(query, *args, timeout=timeout))
+
+        async def executemany(self, command, args, *, timeout=None):
+            return await metrics.timed_await("execute", super().executemany(command, args, timeout=timeout))
+
+        async def fetch(self, query, *args, **kwargs):
+            rows = await metrics.timed_await("fetch", super().fetch(query, *args, **kwargs))
+            metrics.count_rows(len(rows))
+            return rows
+
+        async def fetchrow(self, query, *args, **kwargs):
+            row = await metrics.timed_await("fetch", super().fetchrow(query, *args, **kwargs))
+            metrics.count_rows(row is not None)
+            return row
+
+        async def fetchval(self, query, *args, **kwargs):
+            value = await metrics.timed_await("fetch", super().fetchval(query, *args, **kwargs))
+            metrics.count_rows(value is not None)
+            return value
+
+
+@metrics.instrument_backend
+class AsyncDatabase:
+    """Handles PostgreSQL database operations for asyncio callers over an asyncpg pool.
+
+    Mirrors Database: same operations, same return values (tuples, None/False on failure).
+    """
+    name = "asyncpg"
+
+    def __init__(self, min_size=None, max_size=None, **conn_params):
+        self.conn_params = dict(config.DB_CONFIG, **conn_params)
+        self.min_size = config.POOL_MIN_SIZE if min_size is None else min_size
+        self.max_size = config.POOL_MAX_SIZE if max_size is None else max_size
+        self.pool = None
+
+    async def connect(self):
+        """Creates the connection pool. Returns False if the server is unreachable."""
+        if self.pool is not None:
+            return True
+        if asyncpg is None:
+            raise RuntimeError("AsyncDatabase requires the asyncpg package (pip install asyncpg)")
+        params = self.conn_params
+        try:
+            self.pool = await metrics.timed_await("connect", asyncpg.create_pool(
+                database=params["dbname"], user=params["user"], password=params["password"],
+                host=params["host"], port=int(params["port"]),
+                min_size=self.min_size, max_size=self.max_size,
+                timeout=config.POOL_TIMEOUT,
+                max_inactive_connection_lifetime=config.POOL_HEALTH_CHECK_INTERVAL * 10,
+                connection_class=TimedConnection if config.METRICS_ENABLED else asyncpg.Connection
+            ))
+            return True
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Database connection failed: %s", e)
+            return False
+
+    async def close(self):
+        """Closes every pooled connection."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def pool_stats(self):
+        """Returns connection pool size statistics."""
+        if self.pool is None:
+            return {}
+        return {
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "minconn": self.pool.get_min_size(),
+            "maxconn": self.pool.get_max_size(),
+        }
+
+    async def _ready(self):
+        return self.pool is not None or await self.connect()
+
+    async def migrate(self):
+        """Brings the schema up to the latest version. Returns the version, or None on failure."""
+        if not await self._ready():
+            return None
+        try:
+            async with self.pool.acquire() as conn:
+                version = await migrations.upgrade_async(conn)
+                logger.info("Schema at version %s", version)
+                return version
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Schema migration failed: %s", e)
+            return None
+
+    async def insert_user(self, username, password_hash):
+        """Inserts a new user with an already hashed password.
+
+        Returns the id, False if the username is taken (ignoring case), or None on failure.
+        """
+        if not await self._ready():
+            return None
+        try:
+            user_id = await self.pool.fetchval(
+                "INSERT INTO users (username, password) VALUES ($1, $2) ON CONFLICT DO NOTHING RETURNING id;",
+                username, password_hash
+            )
+            if user_id is None:
+                logger.info("Username taken: %s", username)
+                return False
+            logger.info("Registered user_id=%s", user_id)
+            return user_id
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("User creation failed: %s", e)
+            return None
+
+    async def fetch_user(self, username):
+        """Returns the User with this username, ignoring case, or None."""
+        if not await self._ready():
+            return None
+        try:
+            row = await self.pool.fetchrow(
+                "SELECT id, username, password FROM users WHERE lower(username) = lower($1);", username
+            )
+            return User(*row) if row else None
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Fetch user failed: %s", e)
+            return None
+
+    async def update_user_password(self, user_id, password_hash):
+        """Replaces a user's stored password hash; returns True if the user exists."""
+        if not await self._ready():
+            return False
+        try:
+            status = await self.pool.execute("UPDATE users SET password = $1 WHERE id = $2;", password_hash, user_id)
+            return status == "UPDATE 1"
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Password update failed: %s", e)
+            return False
+
+    async def insert_task(self, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Inserts a new task into the database."""
+        if not await self._ready():
+            return None
+        try:
+            task_id = await self.pool.fetchval("""
+                INSERT INTO tasks (title, description, priority, deadline_str, deadline_datetime, duration, user_id)
+                VALUES ($1, $2, $3, $4, $5, $6, $7) RETURNING id;
+            """, title, description, priority, deadline_str, deadline_datetime, duration, user_id)
+            logger.debug("Inserted task_id=%s for user_id=%s", task_id, user_id)
+            return task_id
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Insert task failed: %s", e)
+            return None
+
+    async def update_task(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Updates an existing task in the database."""
+        if not await self._ready():
+            return False
+        try:
+            status = await self.pool.execute("""
+                UPDATE tasks
+                SET title = $1, description = $2, priority = $3, deadline_str = $4,
+                    deadline_datetime = $5, duration = $6
+                WHERE id = $7 AND user_id = $8;
+            """, title, description, priority, deadline_str, deadline_datetime, duration, task_id, user_id)
+            success = status != "UPDATE 0"
+            if success:
+                logger.debug("Successfully updated task_id=%s", task_id)
+            else:
+                logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
+            return success
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Update task failed: %s", e)
+            return False
+
+    async def delete_task(self, task_id, user_id):
+        """Deletes a task from the database."""
+        if not await self._ready():
+            return False
+        try:
+            status = await self.pool.execute(
+                "DELETE FROM tasks WHERE id = $1 AND user_id = $2;", task_id, user_id
+            )
+            if status == "DELETE 0":
+                logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
+                return False
+            logger.debug("Successfully deleted task_id=%s", task_id)
+            return True
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Delete task failed: %s", e)
+            return False
+
+    async def insert_tasks(self, tasks, user_id):
+        """Inserts many tasks with one INSERT ... SELECT FROM unnest(...).
+
+        ``tasks`` holds (title, description, priority, deadline_str, deadline_datetime,
+        duration) tuples. Returns the new ids in input order, or None if the batch
+        failed, in which case nothing was inserted.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        if not await self._ready():
+            return None
+        try:
+            rows = await self.pool.fetch("""
+                INSERT INTO tasks (title, description, priority, deadline_str, deadline_datetime, duration, user_id)
+                SELECT v.title, v.description, v.priority, v.deadline_str, v.deadline_datetime, v.duration, $7
+                FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::timestamp[], $6::integer[])
+                    WITH ORDINALITY AS v (title, description, priority, deadline_str, deadline_datetime, duration, n)
+                ORDER BY v.n
+                RETURNING id;
+            """, *map(list, zip(*tasks)), user_id)
+            task_ids = [row["id"] for row in rows]
+            logger.debug("Inserted %s tasks for user_id=%s", len(task_ids), user_id)
+            return task_ids
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Insert tasks failed: %s", e)
+            return None
+
+    async def update_tasks(self, tasks, user_id):
+        """Updates many tasks with one UPDATE ... FROM unnest(...).
+
+        ``tasks`` holds (task_id, title, description, priority, deadline_str,
+        deadline_datetime, duration) tuples. Returns one bool per task, True if it
+        was updated (False if it doesn't exist or isn't owned by ``user_id``), or
+        None if the statement failed and nothing was changed.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        if not await self._ready():
+            return None
+        try:
+            rows = await self.pool.fetch("""
+                UPDATE tasks AS t
+                SET title = v.title, description = v.description, priority = v.priority,
+                    deadline_str = v.deadline_str, deadline_datetime = v.deadline_datetime, duration = v.duration
+                FROM unnest($1::integer[], $2::text[], $3::text[], $4::text[], $5::text[], $6::timestamp[], $7::integer[])
+                    AS v (id, title, description, priority, deadline_str, deadline_datetime, duration)
+                WHERE t.id = v.id AND t.user_id = $8
+                RETURNING t.id;
+            """, *map(list, zip(*tasks)), user_id)
+            updated = {row["id"] for row in rows}
+            logger.debug("Updated %s of %s tasks for user_id=%s", len(updated), len(tasks), user_id)
+            return [task[0] in updated for task in tasks]
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Update tasks failed: %s", e)
+            return None
+
+    async def delete_tasks(self, task_ids, user_id):
+        """Deletes many tasks with a single DELETE ... RETURNING.
+
+        Returns one bool per id, True if that task was deleted, or None if the
+        statement failed and nothing was removed.
+        """
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        if not await self._ready():
+            return None
+        try:
+            rows = await self.pool.fetch(
+                "DELETE FROM tasks WHERE user_id = $1 AND id = ANY($2::integer[]) RETURNING id;", user_id, task_ids
+            )
+            deleted = {row["id"] for row in rows}
+            logger.debug("Deleted %s of %s tasks for user_id=%s", len(deleted), len(task_ids), user_id)
+            return [task_id in deleted for task_id in task_ids]
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Delete tasks failed: %s", e)
+            return None
+
+    async def fetch_tasks(self, user_id, sort_option="By Deadline"):
+        """Fetches all tasks for a user with sorting."""
+        if not await self._ready():
+            return []
+        try:
+            rows = await self.pool.fetch(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = $1 ORDER BY {self._order_by(sort_option)};",
+                user_id
+            )
+            return list(tasks_from_rows(rows))
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Fetch tasks failed: %s", e)
+            return []
+
+    async def fetch_all_tasks(self, user_id):
+        """Fetches all of a user's task rows in no particular order; None on failure."""
+        if not await self._ready():
+            return None
+        try:
+            rows = await self.pool.fetch(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = $1;", user_id
+            )
+            return list(tasks_from_rows(rows))
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Fetch tasks failed: %s", e)
+            return None
+
+    async def fetch_tasks_page(self, user_id, sort_option="By Deadline", limit=100, after=None):
+        """Fetches one page of tasks using keyset pagination; returns ``(tasks, next_cursor)``."""
+        key_columns = self._sort_key_columns(sort_option)
+        key_sql = ", ".join(key_columns)
+        params = [user_id]
+        keyset = ""
+        if after is not None:
+            placeholders = ", ".join(f"${i}" for i in range(2, 2 + len(key_columns)))
+            keyset = f" AND ({key_sql}) > ({placeholders})"
+            params.extend(after)
+        params.append(limit + 1)
+        if not await self._ready():
+            return [], None
+        try:
+            rows = await self.pool.fetch(
+                f"SELECT {TASK_COLUMNS}, {key_sql} FROM tasks WHERE user_id = $1{keyset} "
+                f"ORDER BY {key_sql} LIMIT ${len(params)};",
+                *params
+            )
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Fetch task page failed: %s", e)
+            return [], None
+        key_width = len(key_columns)
+        has_more = len(rows) > limit
+        rows = [tuple(row) for row in rows[:limit]]
+        tasks = [Task(*row[:-key_width]) for row in rows]
+        next_cursor = rows[-1][-key_width:] if has_more else None
+        return tasks, next_cursor
+
+    async def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Streams a user's tasks through a server-side cursor as an async generator."""
+        if not await self._ready():
+            return
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    query = f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = $1 ORDER BY {self._order_by(sort_option)};"
+                    async for row in conn.cursor(query, user_id, prefetch=batch_size):
+                        yield Task(*row)
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Stream tasks failed: %s", e)
+
+    @staticmethod
+    def _sort_key_columns(sort_option):
+        """Returns the ORDER BY key for a sort option (same keys as Database)."""
+        if sort_option == "By Priority":
+            return [PRIORITY_RANK_SQL, "deadline_datetime", "id"]
+        return ["deadline_datetime", "id"]
+
+    def _order_by(self, sort_option):
+        return ", ".join(self._sort_key_columns(sort_option))
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import metrics
+from async_db_operations import AsyncDatabase
+from errors import TaskManagerError, UsernameTakenError
+from passwords import PasswordHasher
+from search_index import tokenize
+from sessions import SessionStore
+from task_cache import UserTasks
+from task_service import LOAD_ATTEMPTS, TaskServiceBase
+from validation import parse_task_input
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskManager(TaskServiceBase):
+    """asyncio counterpart of TaskService for headless and service use.
+
+    Validation, sessions and the cache write-through come from TaskServiceBase,
+    so results and errors match TaskService's: TaskValidationError,
+    TaskNotFoundError or TaskManagerError. One instance can serve many users
+    concurrently over a single connection pool. The cache doesn't follow other
+    clients' changes; refresh_tasks() drops a user's cached list.
+    """
+    def __init__(self, db=None, passwords=None):
+        # Sessions are in memory only; the async backend has no sessions table methods
+        super().__init__(db or AsyncDatabase(), passwords or PasswordHasher(), SessionStore())
+        self._loading = {}  # (user_id, cache generation) -> in-flight fetch, shared by concurrent readers
+
+    async def start(self):
+        """Connects and brings the schema up to date."""
+        if await self.db.migrate() is None:
+            raise TaskManagerError("Could not connect to the database")
+
+    async def close(self):
+        await self.db.close()
+        self.passwords.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @metrics.service_operation
+    async def login(self, username, password):
+        """Returns the user id for valid credentials, otherwise None."""
+        logger.info("Attempting login for username=%s", username)
+        user = await self.db.fetch_user(username)
+        ok, new_hash = await asyncio.wrap_future(
+            self.passwords.verify_async(password, user.password_hash if user else None)
+        )
+        if not ok:
+            return None
+        if new_hash is not None and await self.db.update_user_password(user.id, new_hash):
+            logger.info("Rehashed password for user_id=%s", user.id)
+        return user.id
+
+    @metrics.service_operation
+    async def open_session(self, username, password):
+        """Logs in and starts a session. Returns ``(user_id, token, expires_at)``, or None for bad credentials."""
+        user_id = await self.login(username, password)
+        if not user_id:
+            return None
+        token, expires_at = self.sessions.create(user_id)
+        return user_id, token, expires_at
+
+    @metrics.service_operation
+    async def register(self, username, password):
+        """Registers a new user and returns the id; raises UsernameTakenError if the name exists in any case."""
+        logger.info("Attempting registration for username=%s", username)
+        password_hash = await asyncio.wrap_future(self.passwords.hash_async(password))
+        user_id = await self.db.insert_user(username, password_hash)
+        if user_id is False:
+            raise UsernameTakenError(f"Username {username!r} is already taken")
+        if not user_id:
+            raise TaskManagerError("Registration failed")
+        return user_id
+
+    @metrics.service_operation
+    async def add_task(self, user_id, title, description, priority, deadline, duration):
+        """Validates and inserts a task; returns the new task id."""
+        validated = [parse_task_input(title, description, priority, deadline, duration)]
+        return self._inserted(user_id, await self.db.insert_tasks(validated, user_id), validated)[0]
+
+    @metrics.service_operation
+    async def edit_task(self, user_id, task_id, title, description, priority, deadline, duration):
+        """Validates and updates a task; raises TaskNotFoundError if the user has no such task."""
+        rows = [(task_id,) + parse_task_input(title, description, priority, deadline, duration)]
+        self._require_task(task_id, self._updated(user_id, rows, await self.db.update_tasks(rows, user_id))[0])
+
+    @metrics.service_operation
+    async def delete_task(self, user_id, task_id):
+        """Deletes a task; raises TaskNotFoundError if the user has no such task."""
+        results = await self.db.delete_tasks([task_id], user_id)
+        self._require_task(task_id, self._deleted(user_id, [task_id], results)[0])
+
+    @metrics.service_operation
+    async def add_tasks(self, user_id, tasks):
+        """Validates and inserts (title, description, priority, deadline, duration) tuples in one statement.
+
+        All-or-nothing: one invalid task rejects the batch. Returns the new ids in input order.
+        """
+        validated = self._validate_batch(tasks)
+        return self._inserted(user_id, await self.db.insert_tasks(validated, user_id), validated)
+
+    @metrics.service_operation
+    async def edit_tasks(self, user_id, tasks):
+        """Validates and applies (task_id, title, description, priority, deadline, duration) tuples in one statement.
+
+        Returns one bool per task; False means it wasn't found.
+        """
+        rows = self._validate_edits(tasks)
+        return self._updated(user_id, rows, await self.db.update_tasks(rows, user_id))
+
+    @metrics.service_operation
+    async def delete_tasks(self, user_id, task_ids):
+        """Deletes tasks in one statement. Returns one bool per id; False means it wasn't found."""
+        task_ids = list(task_ids)
+        return self._deleted(user_id, task_ids, await self.db.delete_tasks(task_ids, user_id))
+
+    async def _fetch_all(self, user_id, generation):
+        """Fetches a user's rows; concurrent callers holding the same cache generation share one round trip."""
+        key = (user_id, generation)
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self.db.fetch_all_tasks(user_id))
+            self._loading[key] = pending
+            pending.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _load_tasks(self, user_id):
+        """Fetches a user's tasks into the cache; returns the UserTasks, to be read through ``self.cache.read``.
+
+        As in TaskService, a fetch that a write raced with is thrown away and
+        repeated, and after LOAD_ATTEMPTS the last fetch is served uncached.
+        """
+        for _ in range(LOAD_ATTEMPTS):
+            generation = self.cache.generation(user_id)
+            rows = await self._fetch_all(user_id, generation)
+            if rows is None:
+                raise TaskManagerError(f"Failed to load tasks for user_id={user_id}")
+            entry = self.cache.load(user_id, rows, generation)
+            if entry is not None:
+                return entry
+            logger.debug("Task load for user_id=%s raced with a write; fetching again", user_id)
+        return UserTasks(rows)
+
+    @metrics.service_operation
+    async def get_tasks(self, user_id, sort_option="By Deadline"):
+        """Returns the user's tasks in display order, served from the cache when possible."""
+        tasks = self.cache.get_tasks(user_id, sort_option)
+        if tasks is None:
+            tasks = self.cache.read(await self._load_tasks(user_id), lambda entry: entry.view(sort_option))
+        return tasks
+
+    @metrics.service_operation
+    async def search_tasks(self, user_id, text, limit=50):
+        """Returns up to ``limit`` tasks whose title or description matches ``text``, best first.
+
+        Searches the in-memory prefix index over the cached tasks; the async
+        backend has no full-text query.
+        """
+        if not tokenize(text):
+            return []
+        tasks = self.cache.search_tasks(user_id, text, limit)
+        if tasks is None:
+            tasks = self.cache.read(await self._load_tasks(user_id), lambda entry: entry.search(text, limit))
+        return tasks
+
+    @metrics.service_operation
+    async def get_task(self, user_id, task_id):
+        """Returns one task row by id."""
+        found, task = self.cache.get_task(user_id, task_id)
+        if not found:
+            task = self.cache.read(await self._load_tasks(user_id), lambda entry: entry.rows.get(task_id))
+        self._require_task(task_id, task is not None)
+        return task
+
+    @metrics.service_operation
+    async def get_tasks_page(self, user_id, sort_option="By Deadline", limit=100, cursor=None):
+        """Fetches one page of tasks; returns (tasks, next_cursor)."""
+        return await self.db.fetch_tasks_page(user_id, sort_option, limit, cursor)
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Async iterator over the user's tasks without loading them all into memory."""
+        return self.db.iter_tasks(user_id, sort_option, batch_size)
+
+    def refresh_tasks(self, user_id):
+        """Drops the cached tasks for a user so the next read goes to the database."""
+        self.cache.invalidate(user_id)
@@ -0,0 +1,127 @@
+"""Compares per-operation latency across storage backends.
+
+Runs the same workload against every requested backend through the
+StorageBackend interface. SQLite uses a throwaway database file. Postgres
+uses the configured server and is skipped if it can't be reached.
+
+    python benchmarks/bench_backends.py [--backends sqlite postgres] [--tasks 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deadlines import format_deadline  # noqa: E402
+from storage import BACKENDS, create_backend  # noqa: E402
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(samples, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def task_fields(i):
+    deadline = datetime(2026, 1, 1, 9, 0) + timedelta(minutes=53 * i)
+    return (
+        f"Task {i}", f"Description for task {i}", random.choice(["High", "Medium", "Low"]),
+        format_deadline(deadline), deadline, random.randint(5, 240)
+    )
+
+
+def run_workload(db, tasks, reads):
+    """Returns {operation: [seconds, ...]} for one backend."""
+    samples = {name: [] for name in (
+        "insert_user", "fetch_user", "insert_task", "update_task",
+        "fetch_tasks By Deadline", "fetch_tasks By Priority", "fetch_tasks_page", "delete_task",
+    )}
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    user_id = timed(samples["insert_user"], db.insert_user, username, "secret")
+    task_ids = []
+    for i in range(tasks):
+        title, description, priority, deadline_str, deadline, duration = task_fields(i)
+        task_ids.append(timed(
+            samples["insert_task"], db.insert_task,
+            title, description, priority, deadline_str, deadline, duration, user_id
+        ))
+    for _ in range(reads):
+        timed(samples["fetch_user"], db.fetch_user, username)
+        timed(samples["fetch_tasks By Deadline"], db.fetch_tasks, user_id, "By Deadline")
+        timed(samples["fetch_tasks By Priority"], db.fetch_tasks, user_id, "By Priority")
+        timed(samples["fetch_tasks_page"], db.fetch_tasks_page, user_id, "By Deadline", 50)
+    for i, task_id in enumerate(random.sample(task_ids, min(len(task_ids), 200))):
+        title, description, priority, deadline_str, deadline, duration = task_fields(i + tasks)
+        timed(
+            samples["update_task"], db.update_task,
+            task_id, title, description, priority, deadline_str, deadline, duration, user_id
+        )
+    for task_id in random.sample(task_ids, min(len(task_ids), 200)):
+        timed(samples["delete_task"], db.delete_task, task_id, user_id)
+    return samples
+
+
+def open_backend(name, tmpdir):
+    kwargs = {"path": os.path.join(tmpdir, "bench.db")} if name == "sqlite" else {}
+    db = create_backend(name, **kwargs)
+    if db.migrate() is None:
+        return None
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+    random.seed(7)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in args.backends:
+            try:
+                db = open_backend(name, tmpdir)
+            except ImportError as e:
+                print(f"Skipping {name}: {e}", file=sys.stderr)
+                continue
+            if db is None:
+                print(f"Skipping {name}: not reachable", file=sys.stderr)
+                continue
+            try:
+                results[name] = run_workload(db, args.tasks, args.reads)
+            finally:
+                db.close()
+
+    print(f"{args.tasks} tasks, {args.reads} read rounds; latency in ms (p50 / p95)")
+    header = f"{'operation':<26}" + "".join(f"{name:>22}" for name in results)
+    print(header)
+    operations = next(iter(results.values())).keys() if results else []
+    for operation in operations:
+        line = f"{operation:<26}"
+        for name in results:
+            samples = results[name][operation]
+            if samples:
+                line += f"{percentile(samples, 0.5) * 1000:>12.3f} / {percentile(samples, 0.95) * 1000:<7.3f}"
+            else:
+                line += f"{'-':>22}"
+        print(line)
+    for name in results:
+        mean = statistics.mean(results[name]["insert_task"])
+        print(f"{name}: insert_task mean {mean * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
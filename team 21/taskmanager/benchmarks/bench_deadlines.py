@@ -0,0 +1,66 @@
+"""Measures deadline parsing and formatting throughput.
+
+Compares datetime.strptime/strftime with the precompiled parser in deadlines.py,
+both uncached (every string new) and cached (the same strings seen again, as
+when a task list is refreshed).
+
+    python benchmarks/bench_deadlines.py [--count 100000] [--distinct 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deadlines import DEADLINE_FORMAT, format_deadline, parse_deadline  # noqa: E402
+
+
+def make_deadlines(count, distinct):
+    """Returns ``count`` deadlines drawn from ``distinct`` different minutes."""
+    start = datetime(2026, 1, 1, 0, 0)
+    pool = [start + timedelta(minutes=random.randint(0, 525600)) for _ in range(distinct)]
+    return [random.choice(pool) for _ in range(count)]
+
+
+def rate(fn, values):
+    """Returns calls per second of ``fn`` over ``values``."""
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    return len(values) / (time.perf_counter() - start)
+
+
+def report(label, per_second, baseline):
+    print(f"{label:<32} {per_second:>12,.0f} /s   {per_second / baseline:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(5)
+
+    deadlines = make_deadlines(args.count, args.distinct)
+    strings = [deadline.strftime(DEADLINE_FORMAT) for deadline in deadlines]
+    assert all(parse_deadline(text) == deadline for text, deadline in zip(strings, deadlines))
+    print(f"{args.count} deadlines, {len(set(strings))} distinct")
+
+    baseline = rate(lambda text: datetime.strptime(text, DEADLINE_FORMAT), strings)
+    report("strptime", baseline, baseline)
+    report("parse_deadline (uncached)", rate(parse_deadline.__wrapped__, strings), baseline)
+    parse_deadline.cache_clear()
+    report("parse_deadline (cached)", rate(parse_deadline, strings), baseline)
+
+    baseline = rate(lambda deadline: deadline.strftime(DEADLINE_FORMAT), deadlines)
+    report("strftime", baseline, baseline)
+    report("format_deadline (uncached)", rate(format_deadline.__wrapped__, deadlines), baseline)
+    format_deadline.cache_clear()
+    report("format_deadline (cached)", rate(format_deadline, deadlines), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures what the metrics layer costs on the storage hot path.
+
+Runs the same SQLite workload (fetch_user, insert_task, fetch_tasks) with
+TASKMANAGER_METRICS=1 and =0, each in a fresh process since instrumentation is
+wired in at import time, and reports calls/s and the overhead per call. With
+--dump, prints the collected metrics afterwards.
+
+    python benchmarks/bench_metrics.py [--calls 20000] [--tasks 200] [--dump]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def workload(calls, tasks):
+    """Runs the workload in this process; returns {operation: seconds per call}."""
+    import metrics
+    from deadlines import format_deadline
+    from sqlite_backend import SQLiteDatabase
+
+    db = SQLiteDatabase(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    db.migrate()
+    user_id = db.insert_user("bench", "secret")
+    deadline = datetime(2027, 1, 1, 9, 0)
+    db.insert_tasks([
+        (f"Task {i}", "", "High", format_deadline(deadline + timedelta(minutes=i)), deadline + timedelta(minutes=i), 30)
+        for i in range(tasks)
+    ], user_id)
+    operations = {
+        "fetch_user": lambda: db.fetch_user("bench"),
+        "insert_task": lambda: db.insert_task("New", "", "Low", format_deadline(deadline), deadline, 15, user_id),
+        "fetch_tasks": lambda: db.fetch_tasks(user_id),
+    }
+    results = {}
+    for name, call in operations.items():
+        count = calls if name != "fetch_tasks" else max(1, calls // 20)
+        start = time.perf_counter()
+        for _ in range(count):
+            call()
+        results[name] = (time.perf_counter() - start) / count
+    db.close()
+    return results, metrics.REGISTRY.to_text()
+
+
+def run_child(enabled, args):
+    env = dict(os.environ, TASKMANAGER_METRICS="1" if enabled else "0")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--calls", str(args.calls), "--tasks", str(args.tasks)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--dump", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        results, dump = workload(args.calls, args.tasks)
+        print(json.dumps({"results": results, "dump": dump}))
+        return
+
+    off = run_child(False, args)["results"]
+    on = run_child(True, args)
+    print(f"{'operation':<14}{'off calls/s':>14}{'on calls/s':>14}{'overhead':>14}")
+    for name, seconds in on["results"].items():
+        extra = seconds - off[name]
+        print(f"{name:<14}{1 / off[name]:>14.0f}{1 / seconds:>14.0f}{extra * 1e6:>10.1f} us ({extra / off[name]:+.0%})")
+    if args.dump:
+        print()
+        print(on["dump"], end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measures password verification throughput: logins per second per core.
+
+Verifies a password with the configured scheme and cost (see config.py)
+in-process, through the worker process pool, and from the verified-login
+cache that repeated API requests hit.
+
+    python benchmarks/bench_passwords.py [--logins 200] [--workers N] [--scheme scrypt] [--cost N]
+
+--cost is scrypt's N or PBKDF2's iteration count.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config  # noqa: E402
+from passwords import PasswordHasher, hash_password  # noqa: E402
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--scheme", choices=["scrypt", "pbkdf2_sha256"], default=config.PASSWORD_SCHEME)
+    parser.add_argument("--cost", type=int)
+    args = parser.parse_args()
+    config.PASSWORD_SCHEME = args.scheme
+    if args.cost:
+        if args.scheme == "scrypt":
+            config.SCRYPT_N = args.cost
+        else:
+            config.PBKDF2_ITERATIONS = args.cost
+
+    stored = hash_password("correct horse battery staple")
+    print(f"{stored.rsplit('$', 2)[0]}; {args.logins} logins, {args.workers} workers")
+
+    inline = PasswordHasher(workers=0, cache_ttl=0)
+    per_core = rate(args.logins, lambda: [inline.verify("correct horse battery staple", stored) for _ in range(args.logins)])
+    print(f"{'in-process (one core)':<28}{per_core:>10.1f} logins/s")
+
+    pool = PasswordHasher(workers=args.workers, cache_ttl=0)
+    pool.verify("warm up", stored)  # starts the worker processes
+    pooled = rate(args.logins, lambda: [
+        future.result() for future in [pool.verify_async("correct horse battery staple", stored) for _ in range(args.logins)]
+    ])
+    pool.close()
+    print(f"{'process pool':<28}{pooled:>10.1f} logins/s   {pooled / args.workers:.1f} per worker")
+
+    cached = PasswordHasher(workers=0)
+    cached.verify("correct horse battery staple", stored)
+    hits = rate(args.logins * 100, lambda: [
+        cached.verify("correct horse battery staple", stored) for _ in range(args.logins * 100)
+    ])
+    print(f"{'verified-login cache':<28}{hits:>10.0f} logins/s")
+
+
+if __name__ == "__main__":
+    main()
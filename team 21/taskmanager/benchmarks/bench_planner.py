@@ -0,0 +1,117 @@
+"""Times the schedule planner, from scratch and incrementally, and checks how close its plans get to optimal.
+
+For each --loads value (work due over available time; above 1 some tasks
+must run late) it plans --tasks random tasks from scratch and then applies
+--edits single-task edits through SchedulePlanner.sync(), timing each replan.
+It reports the weighted lateness of plain EDF next to the planner's. Then it
+compares the planner against every ordering of --small-size tasks for
+--small-sets random sets. The exit status is 1 if an incremental replan ever
+differs from planning the same tasks from scratch.
+
+    python benchmarks/bench_planner.py [--tasks 5000] [--edits 200] [--loads 0.5,0.95,1.2,3]
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deadlines import format_deadline  # noqa: E402
+from planner import PRIORITY_WEIGHTS, SchedulePlanner, to_minutes, weighted_lateness  # noqa: E402
+from task import Task  # noqa: E402
+
+PRIORITIES = tuple(PRIORITY_WEIGHTS)
+START = datetime(2027, 1, 1, 9, 0)
+MEAN_DURATION = 122.5  # minutes; durations are uniform over 5..240
+
+
+def make_task(rng, task_id, horizon):
+    """A task due somewhere between 10 hours ago and ``horizon`` minutes from START."""
+    deadline = START + timedelta(minutes=rng.randrange(-600, horizon))
+    return Task(task_id, f"Task {task_id}", None, rng.choice(PRIORITIES), format_deadline(deadline),
+                rng.randint(5, 240), deadline)
+
+
+def edf_lateness(tasks):
+    ordered = sorted(tasks, key=lambda task: (task.deadline_datetime, -PRIORITY_WEIGHTS[task.priority], task.id))
+    return order_lateness(ordered)
+
+
+def order_lateness(ordered):
+    return weighted_lateness(
+        to_minutes(START), [task.duration for task in ordered], [to_minutes(task.deadline_datetime) for task in ordered],
+        [PRIORITY_WEIGHTS[task.priority] for task in ordered]
+    )
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return tuple(ordered[max(0, math.ceil(q * len(ordered)) - 1)] * 1000 for q in (0.5, 0.95))
+
+
+def bench_load(rng, args, load):
+    """Returns True if incremental replanning matched planning from scratch."""
+    horizon = int(args.tasks * MEAN_DURATION / load)
+    tasks = [make_task(rng, task_id, horizon) for task_id in range(args.tasks)]
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        schedule = SchedulePlanner(tasks).plan(START)
+        samples.append(time.perf_counter() - start)
+    full = min(samples)
+
+    planner = SchedulePlanner(tasks)
+    planner.plan(START)
+    samples = []
+    for _ in range(args.edits):
+        index = rng.randrange(len(tasks))
+        tasks[index] = make_task(rng, tasks[index].id, horizon)
+        start = time.perf_counter()
+        planner.sync(tasks)
+        schedule = planner.plan(START)
+        samples.append(time.perf_counter() - start)
+    p50, p95 = percentiles(samples)
+    fresh = SchedulePlanner(tasks).plan(START)
+    matches = fresh.task_ids == schedule.task_ids and fresh.weighted_lateness == schedule.weighted_lateness
+    edf = edf_lateness(tasks)
+    print(f"{load:>6.2f}{full * 1000:>11.1f}{p50:>10.2f}{p95:>10.2f}{schedule.late_count:>7}"
+          f"{len(schedule.overloads):>9}{edf:>15,}{schedule.weighted_lateness:>15,}  {'ok' if matches else 'MISMATCH'}")
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--edits", type=int, default=200, help="single-task edits replanned incrementally")
+    parser.add_argument("--loads", default="0.5,0.95,1.2,3", help="comma-separated work/time ratios")
+    parser.add_argument("--small-sets", type=int, default=200, help="random sets checked against every ordering")
+    parser.add_argument("--small-size", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{args.tasks} tasks; times in ms; lateness is weight x minutes late")
+    print(f"{'load':>6}{'full':>11}{'inc p50':>10}{'inc p95':>10}{'late':>7}{'windows':>9}"
+          f"{'EDF lateness':>15}{'planned':>15}")
+    ok = all([bench_load(rng, args, float(load)) for load in args.loads.split(",")])
+
+    planned = edf = best = 0
+    for _ in range(args.small_sets):
+        horizon = rng.choice((300, 900, 2000))
+        tasks = [make_task(rng, task_id, horizon) for task_id in range(args.small_size)]
+        planned += SchedulePlanner(tasks).plan(START).weighted_lateness
+        edf += edf_lateness(tasks)
+        best += min(map(order_lateness, itertools.permutations(tasks)))
+    print(f"\n{args.small_sets} sets of {args.small_size} tasks, total weighted lateness: "
+          f"optimal {best:,}, planner {planned:,} (+{(planned - best) / max(best, 1):.1%}), "
+          f"EDF {edf:,} (+{(edf - best) / max(best, 1):.1%})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
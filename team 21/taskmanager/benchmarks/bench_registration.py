@@ -0,0 +1,84 @@
+"""Registers the same username from many threads at once and checks exactly one wins.
+
+Each thread uses a different capitalisation of the name, so this exercises the
+case-insensitive unique index and the single-statement
+INSERT ... ON CONFLICT DO NOTHING registration. Also reports registrations/s
+for distinct names. SQLite uses a throwaway database file.
+
+    python benchmarks/bench_registration.py [--backend sqlite] [--threads 32] [--rounds 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config  # noqa: E402
+from errors import UsernameTakenError  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+from storage import BACKENDS, create_backend  # noqa: E402
+from task_service import TaskService  # noqa: E402
+
+
+def race(service, username, threads):
+    """Registers ``username`` (randomly re-cased) from ``threads`` threads; returns (ids, taken count)."""
+    barrier = threading.Barrier(threads)
+    ids, taken, errors = [], [], []
+
+    def register():
+        name = "".join(random.choice((c.lower(), c.upper())) for c in username)
+        barrier.wait()
+        try:
+            ids.append(service.register(name, "secret"))
+        except UsernameTakenError:
+            taken.append(name)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=register) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0]
+    return ids, len(taken)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlite")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    config.SCRYPT_N = 2 ** 10  # hashing cost isn't what's measured here
+
+    kwargs = {"path": os.path.join(tempfile.mkdtemp(), "bench.db")} if args.backend == "sqlite" else {}
+    service = TaskService(create_backend(args.backend, **kwargs), PasswordHasher(workers=0))
+    service.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            username = f"racer-{uuid.uuid4().hex[:8]}"
+            ids, taken = race(service, username, args.threads)
+            assert len(ids) == 1 and taken == args.threads - 1, f"{username}: {len(ids)} registered, {taken} taken"
+            assert service.db.fetch_user(username.upper()).id == ids[0]
+        elapsed = time.perf_counter() - start
+        print(f"{args.rounds} races x {args.threads} threads: exactly one registration each ({elapsed:.2f} s)")
+
+        count = args.rounds * args.threads
+        start = time.perf_counter()
+        for _ in range(count):
+            service.register(f"user-{uuid.uuid4().hex}", "secret")
+        print(f"distinct names: {count / (time.perf_counter() - start):.0f} registrations/s")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
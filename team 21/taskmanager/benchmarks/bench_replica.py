@@ -0,0 +1,158 @@
+"""Runs two offline replicas against one server and reports read latency, sync throughput and lag.
+
+A "laptop" and a "desktop" replica share a server: a throwaway SQLite file
+standing in for Postgres, or the configured Postgres with --backend postgres.
+The script compares replica reads with the same reads from the server, then
+takes the laptop offline and makes --writes changes there (inserts, updates
+and deletes). Meanwhile the desktop edits one of those tasks and deletes
+another. Then it reconnects, times both syncs and checks that the server and
+both replicas hold the same tasks and that the laptop recorded two
+conflicts. The exit status is 1 if they don't.
+
+    python benchmarks/bench_replica.py [--backend sqlite] [--tasks 2000] [--writes 600] [--reads 200]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("TASKMANAGER_LOG_LEVEL", "WARNING")
+
+import config  # noqa: E402
+import metrics  # noqa: E402
+from deadlines import format_deadline  # noqa: E402
+from local_replica import ReplicaDatabase  # noqa: E402
+from storage import BACKENDS, create_backend  # noqa: E402
+
+PRIORITIES = ("High", "Medium", "Low")
+
+
+class Switchable:
+    """Wraps the server backend; while ``offline`` every call fails the way an unreachable database does."""
+    def __init__(self, backend):
+        self.backend = backend
+        self.offline = False
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr) or name in ("close", "change_listener", "pool_stats"):
+            return attr
+
+        def call(*args, **kwargs):
+            return None if self.offline else attr(*args, **kwargs)
+        return call
+
+
+def make_task(rng, number):
+    deadline = datetime(2027, 1, 1, 9, 0) + timedelta(minutes=rng.randrange(60 * 24 * 90))
+    return (f"Task {number}", f"Replica task {number}", rng.choice(PRIORITIES), format_deadline(deadline),
+            deadline, rng.randint(5, 240))
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return tuple(ordered[max(0, math.ceil(q * len(ordered)) - 1)] * 1000 for q in (0.5, 0.95))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def snapshot(tasks):
+    return {(task.id, task.title, task.priority, task.deadline_str, task.duration) for task in tasks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(set(BACKENDS) - {"replica"}), default="sqlite")
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks on the server to start with")
+    parser.add_argument("--writes", type=int, default=600, help="changes made on the laptop while offline")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    config.SYNC_INTERVAL = 3600  # the script syncs explicitly; the background threads only react to wake-ups
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp()
+
+    kwargs = {"path": os.path.join(workdir, "server.db")} if args.backend == "sqlite" else {}
+    server = create_backend(args.backend, **kwargs)
+    server.migrate()
+    username = f"replica-{uuid.uuid4().hex[:8]}"
+    user_id = server.insert_user(username, "not a real hash")
+    for start in range(0, args.tasks, 1000):
+        server.insert_tasks([make_task(rng, n) for n in range(start, min(args.tasks, start + 1000))], user_id)
+
+    remotes = {name: Switchable(server) for name in ("laptop", "desktop")}
+    replicas = {
+        name: ReplicaDatabase(os.path.join(workdir, f"{name}.db"), remote) for name, remote in remotes.items()
+    }
+    laptop, desktop = replicas["laptop"], replicas["desktop"]
+    try:
+        for name, replica in replicas.items():
+            replica.migrate()
+            replica.fetch_user(username)  # logging in caches the user
+            tasks, seconds = timed(replica.fetch_all_tasks, user_id)
+            print(f"{name}: first read pulled {len(tasks)} tasks in {seconds * 1000:.1f} ms")
+
+        print(f"\n{'read (fetch_tasks)':<24}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, backend in (("server", server), ("replica", laptop)):
+            samples = [timed(backend.fetch_tasks, user_id, "By Priority")[1] for _ in range(args.reads)]
+            print(f"{name:<24}{percentiles(samples)[0]:>10.3f}{percentiles(samples)[1]:>10.3f}")
+
+        remotes["laptop"].offline = True
+        assert not laptop.sync_now(), "the laptop should be offline"
+        task_ids = [task.id for task in laptop.fetch_all_tasks(user_id)]
+        rng.shuffle(task_ids)
+        updated, deleted = task_ids[:args.writes // 3], task_ids[args.writes // 3:2 * args.writes // 3]
+        samples = []
+        for number in range(args.writes - len(updated) - len(deleted)):
+            samples.append(timed(laptop.insert_task, *make_task(rng, f"offline {number}"), user_id)[1])
+        for task_id in updated:
+            samples.append(timed(laptop.update_task, task_id, *make_task(rng, f"edited {task_id}"), user_id)[1])
+        for task_id in deleted:
+            samples.append(timed(laptop.delete_task, task_id, user_id)[1])
+        pending = laptop.sync_status()["pending"]
+        print(f"\noffline: {args.writes} writes, p50 {percentiles(samples)[0]:.3f} ms, "
+              f"p95 {percentiles(samples)[1]:.3f} ms; {pending} changes queued")
+
+        # The desktop changes one of the laptop's edited tasks and deletes another first
+        desktop.update_task(updated[0], *make_task(rng, "desktop edit"), user_id)
+        desktop.delete_task(updated[1], user_id)
+        desktop.sync_now()
+
+        remotes["laptop"].offline = False
+        ok, seconds = timed(laptop.sync_now)
+        print(f"laptop reconnects: pushed {pending} changes in {seconds * 1000:.1f} ms "
+              f"({pending / seconds:.0f} changes/s), ok={ok}")
+        ok, seconds = timed(desktop.sync_now)
+        print(f"desktop pulls: {seconds * 1000:.1f} ms, ok={ok}")
+
+        expected = snapshot(server.fetch_all_tasks(user_id))
+        consistent = all(snapshot(replica.fetch_all_tasks(user_id)) == expected for replica in replicas.values())
+        conflicts = laptop.fetch_sync_conflicts(user_id)
+        print(f"\nserver has {len(expected)} tasks; replicas match: {consistent}; "
+              f"laptop conflicts: {sorted(conflict['op'] for conflict in conflicts)}")
+        print(f"laptop status: {laptop.sync_status()}")
+        for direction in ("push", "pull"):
+            p50, p95 = (metrics.SYNC_LAG_SECONDS.quantile(q, direction) for q in (0.5, 0.95))
+            if p50 is not None:
+                print(f"{direction} lag: p50 {p50:.2f} s, p95 {p95:.2f} s "
+                      f"({metrics.SYNC_LAG_SECONDS.count(direction)} changes)")
+        for direction, result in (("push", "applied"), ("push", "conflict"), ("pull", "applied")):
+            print(f"{direction} {result}: {metrics.SYNC_CHANGES.value(direction, result)}")
+        return 0 if consistent and len(conflicts) == 2 and not laptop.sync_status()["pending"] else 1
+    finally:
+        for replica in replicas.values():
+            replica.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
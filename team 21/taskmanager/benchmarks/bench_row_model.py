@@ -0,0 +1,160 @@
+"""Measures the cost of refreshing the task list after a single change.
+
+Compares a full reload (format every task's row, then render) with RowModel,
+which swaps in the new list and formats only the rows the view shows, at 10k
+rows. The view is scrolled three quarters down, so each change lands above the
+visible window; RowModel should keep the same task at the top. Drives the real
+VirtualTable when a display is available, otherwise a stand-in view that reads
+the visible rows as render() does. The exit status is 1 if the top row moved
+or the rows shown differ from the new task list.
+
+    python benchmarks/bench_row_model.py [--rows 10000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deadlines import format_deadline  # noqa: E402
+from row_model import RowModel, format_row  # noqa: E402
+from task import Task  # noqa: E402
+
+HEIGHT = 13  # visible rows, as in MainWindow
+
+
+class StandInView:
+    """Stand-in for VirtualTable: a scroll offset and a render() that reads the visible rows."""
+    height = HEIGHT
+
+    def __init__(self, model):
+        self.model = model
+        self.offset = 0
+        self.shown = []
+
+    def render(self):
+        self.offset = max(0, min(self.offset, len(self.model) - self.height))
+        self.shown = [self.model.rows[index] for index in range(self.offset, min(self.offset + self.height, len(self.model)))]
+
+
+class EagerRows:
+    """The full-reload baseline: every row formatted up front on each refresh."""
+    def __init__(self):
+        self.task_ids = []
+        self.rows = []
+        self._positions = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index_of(self, task_id):
+        if self._positions is None:
+            self._positions = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        return self._positions.get(task_id)
+
+    def update(self, tasks, view):
+        self.task_ids = [task.id for task in tasks]
+        self.rows = [format_row(task) for task in tasks]
+        self._positions = None
+
+
+def make_view(model):
+    """Returns a view over ``model``: a real VirtualTable if Tk can open a display."""
+    try:
+        import tkinter as tk
+        from virtual_table import VirtualTable
+        root = tk.Tk()
+        root.withdraw()
+        columns = ["Title", "Description", "Priority", "Deadline", "Duration (min)"]
+        return VirtualTable(root, model, columns=columns, widths=[150, 200, 80, 180, 110], height=HEIGHT), "tk"
+    except Exception:
+        return StandInView(model), "stand-in"
+
+
+def shown_rows(view):
+    """The formatted rows the view displays after render()."""
+    if isinstance(view, StandInView):
+        return view.shown
+    return [tuple(map(str, view.tree.item(item, "values"))) for item in view.tree.get_children()]
+
+
+def make_tasks(count):
+    """Builds task rows sorted by deadline."""
+    start = datetime(2026, 1, 1, 9, 0)
+    tasks = []
+    for task_id in range(1, count + 1):
+        deadline = start + timedelta(minutes=37 * task_id)
+        tasks.append(Task(
+            task_id, f"Task {task_id}", f"Description {task_id}",
+            random.choice(["High", "Medium", "Low"]),
+            format_deadline(deadline), random.randint(5, 240), deadline
+        ))
+    return tasks
+
+
+def changes(tasks):
+    """Yields (name, new task list) for each kind of single-task change, all above the visible window."""
+    next_id = len(tasks) + 1
+    middle = len(tasks) // 2
+    added = list(tasks)
+    added.insert(middle, replace(tasks[middle], id=next_id, title="New task", description="", duration=30))
+    yield "add", added
+    edited = list(tasks)
+    task = edited[middle]
+    edited[middle] = replace(task, title=task.title + " (edited)")
+    yield "edit in place", edited
+    moved = list(tasks)
+    moved.append(moved.pop(10))
+    yield "edit deadline (row moves)", moved
+    yield "delete", tasks[:middle] + tasks[middle + 1:]
+
+
+def refresh(model, view, tasks):
+    """One timed table refresh: model update, then render."""
+    start = time.perf_counter()
+    model.update(tasks, view)
+    view.render()
+    return time.perf_counter() - start
+
+
+def run(rows, repeat):
+    tasks = make_tasks(rows)
+    top = rows * 3 // 4
+    ok = True
+    results = {}
+    for label, model in (("full reload", EagerRows()), ("RowModel", RowModel())):
+        view, kind = make_view(model)
+        for name, new_tasks in changes(tasks):
+            samples = []
+            for _ in range(repeat):
+                model.update(tasks, view)
+                view.offset = top
+                view.render()
+                samples.append(refresh(model, view, new_tasks))
+            results[name, label] = sorted(samples)[len(samples) // 2] * 1000
+            if isinstance(model, RowModel):
+                kept = model.task_ids[view.offset] == tasks[top].id
+                expected = [format_row(task) for task in new_tasks[view.offset:view.offset + HEIGHT]]
+                if kind == "tk":
+                    expected = [tuple(map(str, row)) for row in expected]
+                matches = shown_rows(view) == expected
+                results[name, "check"] = "ok" if matches and kept else "top row moved" if matches else "rows differ"
+                ok = ok and matches and kept
+    print(f"{rows} rows, {kind} view showing {HEIGHT} rows from row {top}, {repeat} repeats; p50 ms")
+    print(f"{'change':<28}{'full reload':>13}{'RowModel':>10}  check")
+    for name, _ in changes(tasks):
+        print(f"{name:<28}{results[name, 'full reload']:>13.2f}{results[name, 'RowModel']:>10.2f}  {results[name, 'check']}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    random.seed(42)
+    sys.exit(0 if run(args.rows, args.repeat) else 1)
@@ -0,0 +1,90 @@
+"""Measures task search latency on a large backlog.
+
+Times the in-memory prefix index used for SQLite and offline search (build,
+first query, steady-state queries, incremental updates) against a linear
+scan of the same tasks. The target is well under 50 ms per query at 100k tasks.
+
+    python benchmarks/bench_search.py [--tasks 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from search_index import PrefixSearchIndex, tokenize  # noqa: E402
+
+VOCABULARY = [
+    "report", "review", "meeting", "budget", "invoice", "client", "deploy", "release", "design",
+    "draft", "email", "call", "schedule", "plan", "research", "update", "fix", "bug", "test",
+    "write", "read", "prepare", "submit", "order", "book", "pay", "renew", "clean", "backup",
+    "migrate", "database", "server", "website", "presentation", "slides", "contract", "lecture",
+    "assignment", "exam", "project", "proposal", "quarterly", "weekly", "monthly", "annual",
+]
+QUERIES = ["rep", "meeting", "budget rev", "d", "pro", "quarterly report", "submit assign", "zzz", "server backup"]
+
+
+def make_tasks(count):
+    tasks = []
+    for task_id in range(1, count + 1):
+        title = " ".join(random.choices(VOCABULARY, k=random.randint(2, 5))) + f" #{task_id}"
+        description = " ".join(random.choices(VOCABULARY, k=random.randint(0, 12)))
+        tasks.append((task_id, title.capitalize(), description))
+    return tasks
+
+
+def linear_search(tasks, text, limit=50):
+    """Baseline: scan every task's words for each query prefix."""
+    terms = tokenize(text)
+    hits = []
+    for task_id, title, description in tasks:
+        words = tokenize(title) + tokenize(description)
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            hits.append(task_id)
+            if len(hits) == limit:
+                break
+    return hits
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{label:<28} p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms   max {ordered[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    random.seed(11)
+
+    tasks = make_tasks(args.tasks)
+    start = time.perf_counter()
+    index = PrefixSearchIndex.build(tasks)
+    print(f"{args.tasks} tasks; index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for query in QUERIES:
+        samples = [timed_ms(index.search, query) for _ in range(max(1, args.queries // len(QUERIES)))]
+        summarize(f"index {query!r}", samples)
+
+    updates = []
+    for task_id, title, description in random.sample(tasks, 1000):
+        updates.append(timed_ms(index.add, task_id, title + " urgent", description))
+    summarize("index update", updates)
+
+    baseline = [timed_ms(linear_search, tasks, query) for query in ("quarterly report", "zzz")]
+    print(f"linear scan 'quarterly report' {baseline[0]:8.2f} ms   'zzz' {baseline[1]:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
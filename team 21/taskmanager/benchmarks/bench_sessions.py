@@ -0,0 +1,105 @@
+"""Times bearer-token requests through the HTTP API and checks that bad tokens are refused with 401.
+
+Serves the API over a throwaway SQLite file, opens a session and times
+--requests authenticated GET /tasks calls on one keep-alive connection. Then
+it sends malformed, tampered and revoked tokens, including non-ASCII ones, to
+GET /tasks and DELETE /sessions. The exit status is 1 if any of them gets
+something other than 401.
+
+    python benchmarks/bench_sessions.py [--requests 500]
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("TASKMANAGER_LOG_LEVEL", "WARNING")  # per-request INFO logging would dominate the timings
+
+from api_server import make_server  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+from storage import create_backend  # noqa: E402
+from task_service import TaskService  # noqa: E402
+
+USERNAME = "bench-sessions"
+PASSWORD = "correct horse battery staple"
+
+
+def request(conn, method, path, token=None, body=None):
+    """Sends one request; returns (status, decoded JSON body or None)."""
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+    conn.request(method, path, body=None if body is None else json.dumps(body), headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, json.loads(payload) if payload else None
+
+
+def bad_tokens(token):
+    """Tokens that must all be refused, each with a label."""
+    session_id, _, signature = token.partition(".")
+    return [
+        ("empty", ""),
+        ("no signature", session_id),
+        ("non-ASCII", "é.é"),
+        ("non-ASCII signature", f"{session_id}.é{signature[1:]}"),
+        ("non-ASCII session id", f"é{session_id[1:]}.{signature}"),
+        ("tampered signature", f"{session_id}.{signature[:-1]}{'A' if signature[-1] != 'A' else 'B'}"),
+        ("extra dot", f"{token}.x"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    service = TaskService(
+        create_backend("sqlite", path=os.path.join(tempfile.mkdtemp(), "bench.db")), PasswordHasher(workers=0)
+    )
+    service.start()
+    server = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    try:
+        request(conn, "POST", "/users", body={"username": USERNAME, "password": PASSWORD})
+        status, session = request(conn, "POST", "/sessions", body={"username": USERNAME, "password": PASSWORD})
+        assert status == 201, f"opening a session returned {status}"
+        token = session["token"]
+
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            status, _ = request(conn, "GET", "/tasks", token)
+            samples.append(time.perf_counter() - start)
+            assert status == 200, f"an authenticated request returned {status}"
+        samples.sort()
+        p50, p95 = (samples[max(0, math.ceil(q * len(samples)) - 1)] * 1000 for q in (0.5, 0.95))
+        print(f"{args.requests} bearer requests: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+        failures = 0
+        checks = bad_tokens(token)
+        request(conn, "DELETE", "/sessions", token)
+        checks.append(("revoked", token))
+        for label, bad in checks:
+            for method, path in (("GET", "/tasks"), ("DELETE", "/sessions")):
+                status, _ = request(conn, method, path, bad)
+                ok = status == 401
+                failures += not ok
+                print(f"{label:<24}{method:<8}{path:<12}{status}{'' if ok else '  FAIL (expected 401)'}")
+        return 1 if failures else 0
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Benchmark suite for the task manager data path, with a regression check against a baseline.
+
+Seeds a database with --users users of --tasks tasks each, then times login
+(authenticate_user), insert_task, update_task, delete_task, fetch_tasks in both
+sort modes, TaskManager's edit-form load (open_edit_task without the Tk window)
+and a headless MainWindow table refresh (_update_listboxes: cached fetch, row
+diff and deadline sync). Reports p50/p95/p99 and throughput, writes the results
+as JSON and compares them with a stored baseline. The exit status is 1 if an
+operation's p50 or p95 got slower than the baseline by more than --tolerance.
+
+SQLite runs against a throwaway file. Postgres uses the configured database;
+the benchmark's users are named bench-<run id>-<n> and are left in place.
+
+    python benchmarks/bench_suite.py [--backend sqlite] [--users 20] [--tasks 500] [--iterations 200]
+        [--output FILE] [--baseline FILE] [--save-baseline] [--tolerance 0.25]
+
+Record a baseline once with --save-baseline, then rerun without it after a change.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("TASKMANAGER_LOG_LEVEL", "WARNING")  # per-call INFO logging would dominate the timings
+
+import config  # noqa: E402
+from deadline_scheduler import DeadlineScheduler  # noqa: E402
+from deadlines import format_deadline  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+from row_model import RowModel  # noqa: E402
+from storage import BACKENDS, create_backend  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+from task_service import TaskService  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "correct horse battery staple"
+PRIORITIES = ("High", "Medium", "Low")
+SORT_OPTIONS = ("By Deadline", "By Priority")
+
+
+class NullView:
+    """Stands in for the VirtualTable: keeps a scroll offset and reads the rows its window would show."""
+    height = 13
+
+    def __init__(self, model):
+        self.model = model
+        self.offset = 0
+
+    def render(self):
+        for index in range(self.offset, min(self.offset + self.height, len(self.model))):
+            self.model.rows[index]
+
+
+class NullWidget:
+    """Accepts the after()/after_cancel() calls DeadlineScheduler makes on the Tk root."""
+    def after(self, delay_ms, callback):
+        return object()
+
+    def after_cancel(self, timer):
+        pass
+
+
+class HeadlessMainWindow:
+    """The data side of MainWindow._update_listboxes: _fetch_tasks then _populate_table, without Tk."""
+    def __init__(self, task_manager, user_id):
+        self.task_manager = task_manager
+        self.user_id = user_id
+        self.row_model = RowModel()
+        self.view = NullView(self.row_model)
+        self.deadline_scheduler = DeadlineScheduler(NullWidget(), lambda alerts: None)
+
+    def refresh(self, sort_option="By Deadline"):
+        tasks = self.task_manager.get_tasks(self.user_id, sort_option)
+        self.row_model.update(tasks, self.view)
+        self.view.render()
+        self.deadline_scheduler.sync(tasks)
+
+
+class TaskFactory:
+    """Deterministic task field tuples: (title, description, priority, deadline, duration)."""
+    def __init__(self, rng):
+        self.rng = rng
+        self.start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        deadline = self.start + timedelta(minutes=self.rng.randrange(60 * 24 * 90))
+        return (
+            f"Task {self.count}", f"Benchmark task number {self.count}", self.rng.choice(PRIORITIES),
+            format_deadline(deadline), self.rng.randint(5, 240)
+        )
+
+
+def timed(samples, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def summarize(samples):
+    """Returns count, p50/p95/p99/mean in ms (nearest rank) and calls per second."""
+    ordered = sorted(samples)
+
+    def percentile(q):
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": sum(ordered) * 1000 / len(ordered),
+        "ops_per_s": len(ordered) / sum(ordered) if sum(ordered) else float("inf"),
+    }
+
+
+def seed(service, args, make_task):
+    """Registers the users and loads their tasks; returns {user_id: (username, [task ids])}."""
+    run_id = uuid.uuid4().hex[:8]
+    users = {}
+    for number in range(args.users):
+        username = f"bench-{run_id}-{number}"
+        user_id = service.register(username, PASSWORD)
+        task_ids = []
+        for start in range(0, args.tasks, 1000):
+            task_ids += service.add_tasks(user_id, [make_task() for _ in range(min(1000, args.tasks - start))])
+        users[user_id] = (username, task_ids)
+    return users
+
+
+def run(args):
+    """Seeds the database and runs every benchmark; returns {operation: samples}."""
+    rng = random.Random(args.seed)
+    make_task = TaskFactory(rng)
+    kwargs = {"path": os.path.join(tempfile.mkdtemp(), "bench.db")} if args.backend == "sqlite" else {}
+    service = TaskService(create_backend(args.backend, **kwargs), PasswordHasher(workers=0, cache_ttl=0))
+    service.start()
+    manager = TaskManager(service)
+    try:
+        started = time.perf_counter()
+        users = seed(service, args, make_task)
+        print(f"seeded {args.users} users x {args.tasks} tasks in {time.perf_counter() - started:.1f} s")
+        user_ids = list(users)
+        samples = {}
+
+        def bench(name, count, step):
+            gc.collect()
+            samples[name] = []
+            for _ in range(count):
+                step(samples[name])
+
+        def login(out):
+            username = users[rng.choice(user_ids)][0]
+            assert timed(out, service.login, username, PASSWORD)
+        bench("authenticate_user", args.login_iterations, login)
+
+        inserted = []
+
+        def insert(out):
+            user_id = rng.choice(user_ids)
+            inserted.append((user_id, timed(out, service.add_task, user_id, *make_task())))
+        bench("insert_task", args.iterations, insert)
+
+        def update(out):
+            user_id, task_id = rng.choice(inserted)
+            timed(out, service.edit_task, user_id, task_id, *make_task())
+        bench("update_task", args.iterations, update)
+
+        for sort_option in SORT_OPTIONS:
+            def fetch(out, sort_option=sort_option):
+                timed(out, service.db.fetch_tasks, rng.choice(user_ids), sort_option)
+            bench(f"fetch_tasks {sort_option}", args.iterations, fetch)
+
+        def open_edit(out):
+            user_id = rng.choice(user_ids)
+            assert timed(out, manager.edit_form_values, user_id, rng.choice(users[user_id][1])) is not None
+        bench("open_edit_task", args.iterations, open_edit)
+
+        windows = {user_id: HeadlessMainWindow(manager, user_id) for user_id in user_ids}
+        for window in windows.values():
+            window.refresh()
+
+        def refresh(out):
+            # One edit per refresh, as after the user saves a task; only the refresh is timed
+            user_id = rng.choice(user_ids)
+            service.edit_task(user_id, rng.choice(users[user_id][1]), *make_task())
+            timed(out, windows[user_id].refresh)
+        bench("update_listboxes", args.iterations, refresh)
+
+        def delete(out):
+            user_id, task_id = inserted.pop(rng.randrange(len(inserted)))
+            timed(out, service.delete_task, user_id, task_id)
+        bench("delete_task", min(args.iterations, len(inserted)), delete)
+        return samples
+    finally:
+        service.close()
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Returns ``{operation: [(stat, baseline ms, current ms), ...]}`` for regressions beyond the tolerance."""
+    regressions = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for stat in ("p50_ms", "p95_ms"):
+            if current[stat] > previous[stat] * (1 + tolerance) and current[stat] - previous[stat] > min_delta_ms:
+                regressions.setdefault(name, []).append((stat, previous[stat], current[stat]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlite")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=500, help="tasks per user")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--login-iterations", type=int, default=30, help="logins timed (each one derives a key)")
+    parser.add_argument("--scrypt-n", type=int, default=config.SCRYPT_N)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default benchmarks/results-<backend>.json)")
+    parser.add_argument("--baseline", help="baseline file (default benchmarks/baseline-<backend>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+    config.PASSWORD_SCHEME = "scrypt"
+    config.SCRYPT_N = args.scrypt_n
+    output = args.output or os.path.join(BENCHMARK_DIR, f"results-{args.backend}.json")
+    baseline_path = args.baseline or os.path.join(BENCHMARK_DIR, f"baseline-{args.backend}.json")
+
+    results = {name: summarize(samples) for name, samples in run(args).items()}
+    meta = {
+        "backend": args.backend, "users": args.users, "tasks": args.tasks, "iterations": args.iterations,
+        "login_iterations": args.login_iterations, "scrypt_n": args.scrypt_n, "seed": args.seed,
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        different = [key for key in ("backend", "users", "tasks", "scrypt_n") if baseline["meta"].get(key) != meta[key]]
+        if different:
+            print(f"warning: baseline was recorded with different {', '.join(different)}")
+    previous = baseline["results"] if baseline else {}
+
+    print(f"{'operation':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>11}{'base p95':>10}{'change':>9}")
+    for name, stats in results.items():
+        base = previous.get(name)
+        change = f"{stats['p95_ms'] / base['p95_ms'] - 1:+.0%}" if base and base["p95_ms"] else "-"
+        base_p95 = f"{base['p95_ms']:.3f}" if base else "-"
+        print(
+            f"{name:<26}{stats['count']:>6}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+            f"{stats['ops_per_s']:>11.0f}{base_p95:>10}{change:>9}"
+        )
+    print(f"results written to {output}")
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"baseline saved to {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"no baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, previous, args.tolerance, args.min_delta_ms)
+    for name, stats in regressions.items():
+        for stat, before, after in stats:
+            print(f"REGRESSION {name} {stat[:-3]}: {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
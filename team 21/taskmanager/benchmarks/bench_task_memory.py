@@ -0,0 +1,88 @@
+"""Measures the memory and build time of a large task list in each row representation.
+
+Builds the same tasks as tuples, dicts, plain __dict__-backed objects and the
+slotted Task dataclass. Field values are created once and shared, so the
+numbers are the per-row container overhead that the representation adds.
+
+    python benchmarks/bench_task_memory.py [--tasks 1000000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from deadlines import format_deadline  # noqa: E402
+from task import TASK_FIELDS, Task, tasks_from_rows  # noqa: E402
+
+
+class PlainTask:
+    """The pre-dataclass model: one __dict__ per task."""
+    def __init__(self, id, title, description, priority, deadline_str, duration, deadline_datetime):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.deadline_str = deadline_str
+        self.duration = duration
+        self.deadline_datetime = deadline_datetime
+
+
+def make_rows(count):
+    """Returns ``count`` row tuples as a database cursor would."""
+    start = datetime(2026, 1, 1, 9, 0)
+    priorities = ("High", "Medium", "Low")
+    rows = []
+    for task_id in range(1, count + 1):
+        deadline = start + timedelta(minutes=task_id)
+        rows.append((
+            task_id, f"Task {task_id}", f"Description {task_id}", priorities[task_id % 3],
+            format_deadline(deadline), task_id % 240 + 5, deadline
+        ))
+    return rows
+
+
+REPRESENTATIONS = {
+    "tuple": lambda rows: [(*row,) for row in rows],  # a copy, as fetchall() would return
+    "dict": lambda rows: [dict(zip(TASK_FIELDS, row)) for row in rows],
+    "plain object": lambda rows: [PlainTask(*row) for row in rows],
+    "slotted Task": lambda rows: list(tasks_from_rows(rows)),
+}
+
+
+def measure(build, rows):
+    """Returns (bytes allocated, seconds) for building one representation of ``rows``."""
+    gc.collect()
+    start = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - start  # timed without tracemalloc, which slows allocation
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return allocated, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.tasks)
+    assert Task(*rows[0]).deadline_datetime == rows[0][-1]
+    print(f"{args.tasks} tasks; container overhead only (field values are shared)")
+    print(f"{'representation':<16}{'total MiB':>12}{'bytes/task':>12}{'build s':>10}")
+    for name, build in REPRESENTATIONS.items():
+        allocated, elapsed = measure(build, rows)
+        print(f"{name:<16}{allocated / 2 ** 20:>12.1f}{allocated / args.tasks:>12.0f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
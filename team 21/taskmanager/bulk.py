@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import time
+from validation import TaskValidationError, parse_task_input
+
+FIELDS = ("title", "description", "priority", "deadline", "duration")
+FORMATS = ("csv", "jsonl")
+MAX_TITLE_LENGTH = 255  # tasks.title is VARCHAR(255); longer titles would abort the whole COPY
+
+
+def detect_format(path):
+    """Guesses csv or jsonl from a file name."""
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_records(fp, fmt="csv"):
+    """Yields ``(line_number, record)`` pairs from a CSV (with header) or JSONL file.
+
+    A JSONL line that fails to parse is yielded as its ValueError so it can be
+    reported with the other rejected rows.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(fp)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(fp, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def validate_record(record, user_id):
+    """Validates one imported record and returns the row to COPY into tasks."""
+    if not isinstance(record, dict):
+        raise TaskValidationError("Error", f"Expected an object, got {type(record).__name__}")
+    title = str(record.get("title") or "").strip()
+    description = str(record.get("description") or "").strip()
+    priority = str(record.get("priority") or "").strip()
+    deadline = str(record.get("deadline") or "").strip()
+    duration = record.get("duration")
+    if isinstance(duration, str):
+        duration = duration.strip()
+    title, description, priority, deadline, deadline_datetime, duration = parse_task_input(
+        title, description, priority, deadline, duration
+    )
+    if len(title) > MAX_TITLE_LENGTH:
+        raise TaskValidationError("Error", f"Title longer than {MAX_TITLE_LENGTH} characters")
+    return (title, description or None, priority, deadline, deadline_datetime.isoformat(sep=" "), duration, user_id)
+
+
+def validated_rows(records, user_id, errors):
+    """Yields COPY rows for valid records and appends ``(line_number, message)`` to ``errors`` for the rest."""
+    for line_number, record in records:
+        if isinstance(record, Exception):
+            errors.append((line_number, f"Invalid JSON: {record}"))
+            continue
+        try:
+            yield validate_record(record, user_id)
+        except TaskValidationError as e:
+            errors.append((line_number, str(e)))
+
+
+class CopyStream:
+    """Read-only file object that CSV-encodes rows on demand for COPY ... FROM STDIN.
+
+    Rows are pulled from the iterator only as the driver asks for more data, so
+    an import never holds more than one read buffer in memory.
+    """
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.rows_read = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.rows_read += 1
+            if self._buffer.tell() >= 65536:
+                self._drain()
+        self._drain()
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def _drain(self):
+        """Moves encoded rows from the CSV buffer to the pending output."""
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+
+def import_tasks(db, user_id, fp, fmt="csv"):
+    """Validates and bulk-loads tasks for ``user_id`` from an open file.
+
+    Returns a summary dict with imported/rejected counts, the rejected rows and
+    the throughput in rows/sec.
+    """
+    errors = []
+    stream = CopyStream(validated_rows(read_records(fp, fmt), user_id, errors))
+    start = time.perf_counter()
+    count = db.copy_tasks_in(stream)
+    elapsed = time.perf_counter() - start
+    imported = count or 0
+    return {
+        "imported": imported,
+        "rejected": len(errors),
+        "errors": errors,
+        "failed": count is None,
+        "seconds": elapsed,
+        "rows_per_sec": imported / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def export_tasks(db, user_id, fp, fmt="csv"):
+    """Streams all of a user's tasks to an open file. Returns a summary dict like import_tasks."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    start = time.perf_counter()
+    count = db.copy_tasks_out(user_id, fp, as_json=(fmt == "jsonl"))
+    elapsed = time.perf_counter() - start
+    exported = count or 0
+    return {
+        "exported": exported,
+        "failed": count is None,
+        "seconds": elapsed,
+        "rows_per_sec": exported / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,92 @@
+import argparse
+import logging
+import sys
+import config
+from bulk import FORMATS, detect_format, export_tasks, import_tasks
+from storage import BACKENDS, create_backend
+
+logging.basicConfig(
+    level=config.LOG_LEVEL,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 20
+
+
+def _open(path, mode):
+    """Opens a file, treating '-' as stdin/stdout."""
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def run_import(db, args):
+    """Imports tasks from a CSV/JSONL file."""
+    fmt = args.format or detect_format(args.path)
+    fp = _open(args.path, "r")
+    try:
+        result = import_tasks(db, args.user_id, fp, fmt)
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    for line_number, message in result["errors"][:MAX_REPORTED_ERRORS]:
+        print(f"line {line_number}: {message}", file=sys.stderr)
+    if result["rejected"] > MAX_REPORTED_ERRORS:
+        print(f"... and {result['rejected'] - MAX_REPORTED_ERRORS} more rejected rows", file=sys.stderr)
+    if result["failed"]:
+        print("Import failed; no tasks were loaded", file=sys.stderr)
+        return 1
+    print(
+        f"Imported {result['imported']} tasks ({result['rejected']} rejected) in "
+        f"{result['seconds']:.2f}s - {result['rows_per_sec']:.0f} rows/sec",
+        file=sys.stderr
+    )
+    return 0
+
+
+def run_export(db, args):
+    """Exports tasks to a CSV/JSONL file."""
+    fmt = args.format or detect_format(args.path)
+    fp = _open(args.path, "w")
+    try:
+        result = export_tasks(db, args.user_id, fp, fmt)
+    finally:
+        if fp is not sys.stdout:
+            fp.close()
+    if result["failed"]:
+        print("Export failed", file=sys.stderr)
+        return 1
+    print(
+        f"Exported {result['exported']} tasks in {result['seconds']:.2f}s - "
+        f"{result['rows_per_sec']:.0f} rows/sec",
+        file=sys.stderr
+    )
+    return 0
+
+
+def main(argv=None):
+    """Entry point for bulk task import/export."""
+    parser = argparse.ArgumentParser(description="Bulk import/export tasks (PostgreSQL COPY or SQLite batches).")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="storage backend (default: from config)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("import", "load tasks from a file"), ("export", "dump tasks to a file")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("path", help="CSV or JSONL file ('-' for stdin/stdout)")
+        sub.add_argument("--user-id", type=int, required=True, help="owner of the tasks")
+        sub.add_argument("--format", choices=FORMATS, help="file format (default: from extension)")
+    args = parser.parse_args(argv)
+
+    db = create_backend(args.backend)
+    if db.migrate() is None:
+        print("Could not connect to the database", file=sys.stderr)
+        return 1
+    try:
+        return run_import(db, args) if args.command == "import" else run_export(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    """Hands per-user task changes to the callbacks subscribed for that user.
+
+    Callbacks are called as ``callback(user_id, changes)``: a list of
+    ``(op, task_id)`` with op "insert", "update" or "delete", or None when
+    anything may have changed and the user's tasks should be reloaded.
+    They run on the publishing thread and must not block.
+    """
+    def __init__(self):
+        self._subscribers = {}  # user_id -> [callback, ...]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def closed(self):
+        return self._stopped.is_set()
+
+    def subscribe(self, user_id, callback, timeout=None):
+        """Delivers ``user_id``'s changes to ``callback``. Returns True once that has taken effect."""
+        with self._lock:
+            self._subscribers.setdefault(user_id, []).append(callback)
+        return True
+
+    def unsubscribe(self, user_id, callback):
+        """Stops delivering to ``callback``. Returns True if nobody is subscribed to ``user_id`` any more."""
+        with self._lock:
+            callbacks = self._subscribers.get(user_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callbacks:
+                return False
+            self._subscribers.pop(user_id, None)
+            return True
+
+    def close(self):
+        self._stopped.set()
+
+    def publish(self, user_id, changes):
+        """Calls every callback subscribed to ``user_id``; one failing doesn't stop the rest."""
+        with self._lock:
+            callbacks = list(self._subscribers.get(user_id, ()))
+        for callback in callbacks:
+            try:
+                callback(user_id, changes)
+            except Exception as e:
+                logger.exception("Error in task change callback for user_id=%s: %s", user_id, e)
+
+    def publish_reset(self):
+        """Tells every subscriber to reload, e.g. after changes may have been missed."""
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.publish(user_id, None)
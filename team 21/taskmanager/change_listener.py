@@ -0,0 +1,190 @@
+import json
+import logging
+import select
+import socket
+import threading
+import psycopg2
+from change_feed import ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# Must match the channel names used by the tasks_notify_change() trigger in migrations.py
+CHANNEL_PREFIX = "task_changes_"
+
+
+def channel_for(user_id):
+    return f"{CHANNEL_PREFIX}{int(user_id)}"
+
+
+class ChangeListener(ChangeFeed):
+    """Receives task change notifications (Postgres LISTEN/NOTIFY) for subscribed users.
+
+    One background thread holds one dedicated connection for every subscriber
+    in the process and issues a LISTEN per subscribed user. Notifications that
+    arrive together are grouped per user, keeping only the latest op per task,
+    and published to that user's callbacks (see ChangeFeed) on the listener
+    thread. After a reconnect, notifications may have been missed, so every
+    callback is called with ``changes=None``, meaning "reload everything".
+    """
+    def __init__(self, connect, heartbeat=30.0, reconnect_delay=1.0, max_reconnect_delay=30.0):
+        super().__init__()
+        self._connect = connect
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._requests = []  # (user_id, threading.Event) waiting for their LISTEN to be issued
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._connected = threading.Event()
+        self._thread = None
+        self.stats = {"notifications": 0, "batches": 0, "reconnects": 0}
+
+    def start(self):
+        """Starts the listener thread (idempotent)."""
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="task-change-listener", daemon=True)
+                self._thread.start()
+
+    def subscribe(self, user_id, callback, timeout=2.0):
+        """Delivers ``user_id``'s changes to ``callback``.
+
+        Waits up to ``timeout`` seconds for the LISTEN to take effect, so that a
+        caller who reads the tasks afterwards can't miss a change made in
+        between. Returns False if the listener isn't connected yet; the
+        subscription still takes effect once it is.
+        """
+        done = threading.Event()
+        super().subscribe(user_id, callback)
+        with self._lock:
+            self._requests.append((user_id, done))
+        self.start()
+        self._wake()
+        return self._connected.is_set() and done.wait(timeout)
+
+    def unsubscribe(self, user_id, callback):
+        if super().unsubscribe(user_id, callback):
+            with self._lock:
+                self._requests.append((user_id, None))  # UNLISTEN, unless someone subscribes again first
+            self._wake()
+
+    def close(self):
+        """Stops the thread and closes the connection."""
+        super().close()
+        self._wake()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass  # closed, or the buffer is full and a wake-up is already pending
+
+    def _run(self):
+        delay = self.reconnect_delay
+        first = True
+        while not self._stopped.is_set():
+            try:
+                conn = self._connect()
+            except Exception as e:
+                logger.warning("Change listener could not connect: %s; retrying in %.0fs", e, delay)
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            delay = self.reconnect_delay
+            if not first:
+                self.stats["reconnects"] += 1
+                self.publish_reset()
+            first = False
+            try:
+                conn.autocommit = True
+                self._serve(conn)
+            except (psycopg2.Error, OSError) as e:
+                logger.warning("Change listener connection lost: %s", e)
+            finally:
+                self._connected.clear()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _serve(self, conn):
+        """Listens on ``conn`` until it fails or the listener is closed."""
+        listening = set()
+        with self._lock:
+            # Everyone subscribed so far needs a LISTEN on this new connection
+            self._requests.extend((user_id, None) for user_id in self._subscribers)
+        self._connected.set()
+        while not self._stopped.is_set():
+            self._apply_requests(conn, listening)
+            readable, _, _ = select.select([conn, self._wake_recv], [], [], self.heartbeat)
+            if self._wake_recv in readable:
+                try:
+                    while self._wake_recv.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            if not readable:
+                # Idle: a round trip notices a dead server instead of waiting forever
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+            conn.poll()
+            if conn.notifies:
+                batch = list(conn.notifies)
+                del conn.notifies[:]
+                self._dispatch(batch)
+
+    def _apply_requests(self, conn, listening):
+        """Issues LISTEN/UNLISTEN for subscription changes; runs on the listener thread only."""
+        with self._lock:
+            requests, self._requests = self._requests, []
+            wanted = set(self._subscribers)
+        with conn.cursor() as cur:
+            for user_id, done in requests:
+                if user_id in wanted and user_id not in listening:
+                    cur.execute(f"LISTEN {channel_for(user_id)};")
+                    listening.add(user_id)
+                elif user_id not in wanted and user_id in listening:
+                    cur.execute(f"UNLISTEN {channel_for(user_id)};")
+                    listening.discard(user_id)
+                if done is not None:
+                    done.set()
+
+    def _dispatch(self, notifies):
+        """Groups notifications per user and hands them to that user's callbacks."""
+        self.stats["notifications"] += len(notifies)
+        self.stats["batches"] += 1
+        changes = {}  # user_id -> {task_id: op}, in arrival order
+        for notify in notifies:
+            if not notify.channel.startswith(CHANNEL_PREFIX):
+                continue
+            try:
+                user_id = int(notify.channel[len(CHANNEL_PREFIX):])
+                payload = json.loads(notify.payload)
+                task_id, op = int(payload["id"]), payload["op"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring malformed change notification on %s: %r", notify.channel, notify.payload)
+                continue
+            per_task = changes.setdefault(user_id, {})
+            per_task.pop(task_id, None)  # keep only the latest op, in the order it arrived
+            per_task[task_id] = op
+        for user_id, per_task in changes.items():
+            self.publish(user_id, [(op, task_id) for task_id, op in per_task.items()])
+
+
+_shared_listeners = {}
+_shared_listeners_lock = threading.Lock()
+
+
+def get_shared_listener(key, factory):
+    """Returns the process-wide listener registered under ``key``, creating it with ``factory`` once."""
+    with _shared_listeners_lock:
+        listener = _shared_listeners.get(key)
+        if listener is None or listener.closed:
+            listener = factory()
+            _shared_listeners[key] = listener
+        return listener
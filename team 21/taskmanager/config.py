@@ -0,0 +1,67 @@
+import os
+
+# Storage engine: "postgres" (server), "sqlite" (embedded, no server needed) or "replica" (offline-first, see below)
+STORAGE_BACKEND = os.environ.get("TASKMANAGER_BACKEND", "postgres")
+SQLITE_PATH = os.environ.get(
+    "TASKMANAGER_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_manager.db")
+)
+
+# PostgreSQL connection settings (override with environment variables)
+DB_CONFIG = {
+    "dbname": os.environ.get("TASKMANAGER_DB_NAME", "task_manager_db"),
+    "user": os.environ.get("TASKMANAGER_DB_USER", "postgres"),
+    "password": os.environ.get("TASKMANAGER_DB_PASSWORD", "cos101"),
+    "host": os.environ.get("TASKMANAGER_DB_HOST", "localhost"),
+    "port": os.environ.get("TASKMANAGER_DB_PORT", "5432"),
+}
+
+# Connection pool settings
+POOL_MIN_SIZE = int(os.environ.get("TASKMANAGER_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("TASKMANAGER_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.environ.get("TASKMANAGER_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get("TASKMANAGER_POOL_HEALTH_CHECK", "30"))  # ping connections idle longer than this
+POOL_RECONNECT_ATTEMPTS = int(os.environ.get("TASKMANAGER_POOL_RECONNECT_ATTEMPTS", "3"))
+
+# Per-user task cache in TaskManager
+TASK_CACHE_TTL = float(os.environ.get("TASKMANAGER_CACHE_TTL", "300"))  # seconds before a user's tasks are refetched
+TASK_CACHE_MAX_USERS = int(os.environ.get("TASKMANAGER_CACHE_MAX_USERS", "64"))
+
+# Local HTTP/JSON API (api_server.py)
+API_HOST = os.environ.get("TASKMANAGER_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("TASKMANAGER_API_PORT", "8080"))
+API_MAX_BODY_BYTES = int(os.environ.get("TASKMANAGER_API_MAX_BODY", str(1024 * 1024)))
+
+# Password hashing (passwords.py); raising a cost rehashes each user's password on their next login
+PASSWORD_SCHEME = os.environ.get("TASKMANAGER_PASSWORD_SCHEME", "scrypt")  # "scrypt" or "pbkdf2_sha256"
+SCRYPT_N = int(os.environ.get("TASKMANAGER_SCRYPT_N", str(2 ** 14)))  # CPU/memory cost, a power of two
+SCRYPT_R = int(os.environ.get("TASKMANAGER_SCRYPT_R", "8"))  # block size; memory is 128 * N * r bytes
+SCRYPT_P = int(os.environ.get("TASKMANAGER_SCRYPT_P", "1"))  # parallelism
+PBKDF2_ITERATIONS = int(os.environ.get("TASKMANAGER_PBKDF2_ITERATIONS", "600000"))
+PASSWORD_WORKERS = int(os.environ.get("TASKMANAGER_PASSWORD_WORKERS", str(os.cpu_count() or 1)))  # 0 hashes in-process
+LOGIN_CACHE_TTL = float(os.environ.get("TASKMANAGER_LOGIN_CACHE_TTL", "300"))  # seconds a verified password is remembered
+LOGIN_CACHE_SIZE = int(os.environ.get("TASKMANAGER_LOGIN_CACHE_SIZE", "1024"))
+
+# Login sessions (sessions.py)
+SESSION_TTL = float(os.environ.get("TASKMANAGER_SESSION_TTL", str(8 * 60 * 60)))  # seconds a session token stays valid
+SESSION_MAX = int(os.environ.get("TASKMANAGER_SESSION_MAX", "10000"))  # in-memory sessions before the oldest are dropped
+SESSION_SECRET = os.environ.get("TASKMANAGER_SESSION_SECRET")  # signing key; unset means a random key per process
+SESSION_PERSIST = os.environ.get("TASKMANAGER_SESSION_PERSIST", "0") == "1"  # keep sessions in the database across restarts
+
+# Live updates between clients (change_listener.py, Postgres only)
+LIVE_UPDATES = os.environ.get("TASKMANAGER_LIVE_UPDATES", "1") == "1"
+LISTENER_HEARTBEAT = float(os.environ.get("TASKMANAGER_LISTENER_HEARTBEAT", "30"))  # idle seconds between liveness checks
+
+# Offline-first replica (local_replica.py): a local SQLite copy serving reads and queueing writes, synced with
+# the REPLICA_REMOTE backend by a background thread
+REPLICA_PATH = os.environ.get(
+    "TASKMANAGER_REPLICA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_manager_replica.db")
+)
+REPLICA_REMOTE = os.environ.get("TASKMANAGER_REPLICA_REMOTE", "postgres")
+SYNC_INTERVAL = float(os.environ.get("TASKMANAGER_SYNC_INTERVAL", "15"))  # seconds between syncs while online
+SYNC_MAX_BACKOFF = float(os.environ.get("TASKMANAGER_SYNC_MAX_BACKOFF", "300"))  # longest wait between retries offline
+
+# Observability (metrics.py): latency histograms and counters, dumped by GET /metrics and /stats
+METRICS_ENABLED = os.environ.get("TASKMANAGER_METRICS", "1") == "1"
+LOG_LEVEL = os.environ.get("TASKMANAGER_LOG_LEVEL", "INFO").upper()  # DEBUG also logs every row written
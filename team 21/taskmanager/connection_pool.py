@@ -0,0 +1,248 @@
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot hand out a connection."""
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections.
+
+    Connections are created lazily up to ``maxconn`` and reused in LIFO order
+    so the most recently used (warmest) connection is handed out first.
+    Connections idle longer than ``health_check_interval`` are pinged on
+    checkout and transparently replaced if the ping fails.
+    """
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=10.0,
+                 health_check_interval=30.0, reconnect_attempts=3):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Pool sizes must satisfy 0 <= minconn <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.reconnect_attempts = max(1, reconnect_attempts)
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()  # (connection, last_used) pairs
+        self._size = 0  # open connections, idle + checked out
+        self._in_use = 0
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "reconnects": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+        }
+
+    def open(self):
+        """Pre-creates ``minconn`` connections. Returns False if the server is unreachable."""
+        try:
+            conns = [self.getconn() for _ in range(self.minconn)]
+        except Exception as e:
+            logger.error("Connection pool warm-up failed: %s", e)
+            return False
+        for conn in conns:
+            self.putconn(conn)
+        return True
+
+    def getconn(self, timeout=None):
+        """Checks out a healthy connection, waiting up to ``timeout`` seconds for one to free up."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None
+        waited_from = None
+        conn = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    last_used = None
+                    break
+                now = time.monotonic()
+                if waited_from is None:
+                    waited_from = now
+                    deadline = now + timeout
+                    self._stats["waits"] += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_time"] += now - waited_from
+                    metrics.record_error("pool_wait")
+                    raise PoolTimeout(f"No connection available after {timeout:.1f}s (max={self.maxconn})")
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            waited = 0.0 if waited_from is None else time.monotonic() - waited_from
+            self._stats["wait_time"] += waited
+        metrics.record_pool_wait(waited)
+
+        # Connection I/O happens outside the lock so other threads are not serialized behind it
+        try:
+            if conn is None:
+                conn = self._create()
+            elif not self._is_healthy(conn, last_used):
+                self._discard(conn)
+                conn = self._create()
+                self._bump("reconnects")
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Returns a connection to the pool, dropping it if it is broken or ``discard`` is set."""
+        if not discard:
+            try:
+                # Ends any implicit transaction left open by read-only callers
+                conn.rollback()
+            except Exception:
+                discard = True
+        if getattr(conn, "closed", False):
+            discard = True
+        if discard:
+            self._discard(conn)
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                if self._closed and not discard:
+                    self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks out a connection and always returns it."""
+        conn = self.getconn(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = bool(getattr(conn, "closed", False))
+            raise
+        finally:
+            self.putconn(conn, discard=broken)
+
+    def closeall(self):
+        """Closes every idle connection and refuses further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Returns a snapshot of pool usage counters."""
+        with self._cond, self._stats_lock:
+            snapshot = dict(self._stats)
+            snapshot.update(size=self._size, in_use=self._in_use, idle=len(self._idle),
+                            minconn=self.minconn, maxconn=self.maxconn)
+        checkouts = snapshot["checkouts"]
+        snapshot["avg_wait_ms"] = (snapshot["wait_time"] * 1000 / checkouts) if checkouts else 0.0
+        return snapshot
+
+    def _bump(self, key):
+        """Increments a counter updated outside the pool lock."""
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _create(self):
+        """Opens a new connection, retrying with a short backoff."""
+        last_error = None
+        for attempt in range(self.reconnect_attempts):
+            try:
+                conn = metrics.timed_call("connect", self._connect)
+                self._bump("created")
+                return conn
+            except Exception as e:
+                last_error = e
+                logger.warning("Connection attempt %s/%s failed: %s", attempt + 1, self.reconnect_attempts, e)
+                if attempt + 1 < self.reconnect_attempts:
+                    time.sleep(min(0.1 * 2 ** attempt, 1.0))
+        raise last_error
+
+    def _is_healthy(self, conn, last_used):
+        """Checks a pooled connection; pings it only if it sat idle past the health-check interval."""
+        if getattr(conn, "closed", False):
+            self._bump("health_check_failures")
+            return False
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning("Pooled connection failed health check: %s", e)
+            self._bump("health_check_failures")
+            return False
+
+    def _discard(self, conn):
+        """Closes a connection, ignoring errors from already-dead sockets."""
+        self._bump("discarded")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_shared_pools = {}  # key -> [pool, number of holders]
+_shared_pools_lock = threading.Lock()
+
+
+def get_shared_pool(key, factory):
+    """Returns the process-wide pool registered under ``key``, creating it with ``factory`` once.
+
+    Each call takes a reference; hand it back with release_shared_pool().
+    """
+    with _shared_pools_lock:
+        entry = _shared_pools.get(key)
+        if entry is None or entry[0]._closed:
+            entry = [factory(), 0]
+            _shared_pools[key] = entry
+        entry[1] += 1
+        return entry[0]
+
+
+def release_shared_pool(key, pool):
+    """Drops one reference to a shared pool; the last holder to let go closes it."""
+    with _shared_pools_lock:
+        entry = _shared_pools.get(key)
+        if entry is None or entry[0] is not pool:
+            return  # already closed and replaced
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _shared_pools[key]
+    pool.closeall()
@@ -1,128 +1,324 @@
+import logging
+import uuid
 import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+import config
+import metrics
+import migrations
+from migrations import SEARCH_CONFIG
+from change_listener import ChangeListener, get_shared_listener
+from connection_pool import ConnectionPool, PoolError, get_shared_pool, release_shared_pool
+from search_index import prefix_tsquery
+from storage import StorageBackend
+from task import Task, tasks_from_rows
+from user import User
+from task_query import TASK_COLUMNS, TaskQuery
 
-class Database:
-    """Handles PostgreSQL database operations."""
-    def __init__(self):
-        self.conn = None
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row statement in the batch write methods
+BATCH_PAGE_SIZE = 500
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that records execute/fetch latency, rows and driver errors in metrics.py."""
+    def execute(self, query, vars=None):
+        result = metrics.timed_call("execute", super().execute, query, vars)
+        if self.description is None:
+            metrics.count_rows(self.rowcount)  # rows changed; fetched rows are counted on fetch
+        return result
+
+    def executemany(self, query, vars_list):
+        result = metrics.timed_call("execute", super().executemany, query, vars_list)
+        metrics.count_rows(self.rowcount)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        result = metrics.timed_call("execute", super().copy_expert, sql, file, size)
+        metrics.count_rows(self.rowcount)
+        return result
+
+    def fetchone(self):
+        row = metrics.timed_call("fetch", super().fetchone)
+        metrics.count_rows(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = metrics.timed_call("fetch", super().fetchmany, self.arraysize if size is None else size)
+        metrics.count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = metrics.timed_call("fetch", super().fetchall)
+        metrics.count_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        # psycopg2 iterates in C; going through fetchmany keeps server-side cursor batches timed
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors are TimedCursors and whose commits are timed."""
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault("cursor_factory", TimedCursor)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        return metrics.timed_call("commit", super().commit)
+
+class Database(StorageBackend):
+    """Handles PostgreSQL database operations over a shared connection pool."""
+    name = "postgres"
+    full_text_search = True
+
+    def __init__(self, minconn=None, maxconn=None, timeout=None, **conn_params):
+        self.conn_params = dict(config.DB_CONFIG, **conn_params)
+        self.minconn = config.POOL_MIN_SIZE if minconn is None else minconn
+        self.maxconn = config.POOL_MAX_SIZE if maxconn is None else maxconn
+        self.timeout = config.POOL_TIMEOUT if timeout is None else timeout
+        self.pool = None
+        self._pool_key = tuple(sorted(self.conn_params.items())) + (self.minconn, self.maxconn)
+
+    def _create_pool(self):
+        """Builds a pool for this database's connection parameters."""
+        connection_factory = TimedConnection if config.METRICS_ENABLED else None
+        return ConnectionPool(
+            lambda: psycopg2.connect(connection_factory=connection_factory, **self.conn_params),
+            minconn=self.minconn,
+            maxconn=self.maxconn,
+            timeout=self.timeout,
+            health_check_interval=config.POOL_HEALTH_CHECK_INTERVAL,
+            reconnect_attempts=config.POOL_RECONNECT_ATTEMPTS
+        )
 
     def connect(self):
-        """Connects to the db"""
-        try:
-            self.conn = psycopg2.connect(
-                dbname='task_manager_db',
-                user='postgres',
-                password='cos101',
-                host='localhost',
-                port='5432'
-            )
+        """Attaches to the shared connection pool, opening it if needed."""
+        if self.pool is not None and not self.pool._closed:
             return True
-        except psycopg2.Error as e:
-            print(f"Database connection failed: {e}")
+        try:
+            self.pool = get_shared_pool(self._pool_key, self._create_pool)
+            return True
+        except Exception as e:
+            logger.error("Database connection failed: %s", e)
             return False
 
     def close(self):
-        """Closes database connection."""
-        if self.conn:
-            self.conn.close()
+        """Lets go of the shared pool; its connections close once no other Database uses it."""
+        if self.pool:
+            release_shared_pool(self._pool_key, self.pool)
+            self.pool = None
+
+    def pool_stats(self):
+        """Returns connection pool statistics (checkouts, waits, wait time, ...)."""
+        return self.pool.stats() if self.pool else {}
 
-    def create_tables(self):
-        """Creates users and tasks tables if they don't exist."""
+    def _getconn(self):
+        """Checks out a pooled connection, or returns None if the database is unreachable."""
         if not self.connect():
-            return False
+            return None
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        id SERIAL PRIMARY KEY,
-                        username VARCHAR(255) NOT NULL,
-                        password VARCHAR(255) NOT NULL
-                    );
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        id SERIAL PRIMARY KEY,
-                        title VARCHAR(255) NOT NULL,
-                        description TEXT,
-                        priority VARCHAR(10) NOT NULL,
-                        deadline_str VARCHAR(50) NOT NULL,
-                        deadline_datetime TIMESTAMP NOT NULL,
-                        duration INTEGER NOT NULL,
-                        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
-                    );
-                """)
-                self.conn.commit()
-                return True
-        except psycopg2.Error as e:
-            print(f"Failed to create tables: {e}")
-            return False
+            return self.pool.getconn()
+        except (psycopg2.Error, PoolError) as e:
+            logger.error("Database connection failed: %s", e)
+            return None
+
+    def _putconn(self, conn):
+        """Returns a connection to the pool, dropping it if it broke mid-operation."""
+        self.pool.putconn(conn, discard=bool(conn.closed))
+
+    def migrate(self):
+        """Brings the schema up to the latest version. Returns the version, or None on failure."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            version = migrations.upgrade(conn)
+            logger.info("Schema at version %s", version)
+            return version
+        except psycopg2.Error as e:
+            logger.error("Schema migration failed: %s", e)
+            return None
         finally:
-            self.close()
+            self._putconn(conn)
 
-    def insert_user(self, username, password):
-        """Inserts a new user into the database."""
-        if not self.connect():
+    def explain_hot_queries(self):
+        """Checks that login and task list queries are served by their indexes."""
+        conn = self._getconn()
+        if conn is None:
+            return {}
+        try:
+            return migrations.check_query_plans(conn)
+        except psycopg2.Error as e:
+            logger.error("Query plan check failed: %s", e)
+            return {}
+        finally:
+            self._putconn(conn)
+
+    def insert_user(self, username, password_hash):
+        """Inserts a new user with an already hashed password.
+
+        Returns the id, False if the username is taken (ignoring case), or None on failure.
+        """
+        conn = self._getconn()
+        if conn is None:
             return None
         try:
-            with self.conn.cursor() as cur:
+            with conn.cursor() as cur:
                 cur.execute(
-                    "INSERT INTO users (username, password) VALUES (%s, %s) RETURNING id;",
-                    (username, password)
+                    "INSERT INTO users (username, password) VALUES (%s, %s) ON CONFLICT DO NOTHING RETURNING id;",
+                    (username, password_hash)
                 )
-                user_id = cur.fetchone()[0]
-                self.conn.commit()
-                print(f"Registered user_id={user_id}")
-                return user_id
+                row = cur.fetchone()
+                conn.commit()
+                if row is None:
+                    logger.info("Username taken: %s", username)
+                    return False
+                logger.info("Registered user_id=%s", row[0])
+                return row[0]
         except psycopg2.Error as e:
-            print(f"User creation failed: {e}")
+            logger.error("User creation failed: %s", e)
             return None
         finally:
-            self.close()
+            self._putconn(conn)
 
-    def authenticate_user(self, username, password):
-        """Authenticates a user by username and password."""
-        if not self.connect():
+    def fetch_user(self, username):
+        """Returns the User with this username, ignoring case, or None."""
+        conn = self._getconn()
+        if conn is None:
             return None
         try:
-            with self.conn.cursor() as cur:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, username, password FROM users WHERE lower(username) = lower(%s);",
+                    (username,)
+                )
+                row = cur.fetchone()
+                return User(*row) if row else None
+        except psycopg2.Error as e:
+            logger.error("Fetch user failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def update_user_password(self, user_id, password_hash):
+        """Replaces a user's stored password hash; returns True if the user exists."""
+        conn = self._getconn()
+        if conn is None:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE users SET password = %s WHERE id = %s;", (password_hash, user_id))
+                updated = cur.rowcount == 1
+            conn.commit()
+            return updated
+        except psycopg2.Error as e:
+            logger.error("Password update failed: %s", e)
+            return False
+        finally:
+            self._putconn(conn)
+
+    def insert_session(self, session_key, user_id, expires_at):
+        """Stores a login session."""
+        conn = self._getconn()
+        if conn is None:
+            return False
+        try:
+            with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT id FROM users WHERE username = %s AND password = %s;",
-                    (username, password)
+                    "INSERT INTO sessions (id, user_id, expires_at) VALUES (%s, %s, %s);",
+                    (session_key, user_id, expires_at)
                 )
-                result = cur.fetchone()
-                user_id = result[0] if result else None
-                print(f"Authenticated user_id={user_id}")
-                return user_id
+            conn.commit()
+            return True
         except psycopg2.Error as e:
-            print(f"Authentication failed: {e}")
+            logger.error("Session insert failed: %s", e)
+            return False
+        finally:
+            self._putconn(conn)
+
+    def fetch_session(self, session_key):
+        """Returns ``(user_id, expires_at)`` for a stored session, or None."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT user_id, expires_at FROM sessions WHERE id = %s;", (session_key,))
+                return cur.fetchone()
+        except psycopg2.Error as e:
+            logger.error("Session fetch failed: %s", e)
             return None
         finally:
-            self.close()
+            self._putconn(conn)
+
+    def delete_session(self, session_key):
+        """Removes a stored session."""
+        conn = self._getconn()
+        if conn is None:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM sessions WHERE id = %s;", (session_key,))
+            conn.commit()
+            return True
+        except psycopg2.Error as e:
+            logger.error("Session delete failed: %s", e)
+            return False
+        finally:
+            self._putconn(conn)
+
+    def delete_expired_sessions(self, now):
+        """Removes sessions that expired before ``now``; returns how many, or None on failure."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM sessions WHERE expires_at <= %s;", (now,))
+                deleted = cur.rowcount
+            conn.commit()
+            return deleted
+        except psycopg2.Error as e:
+            logger.error("Session purge failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
 
     def insert_task(self, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
         """Inserts a new task into the database."""
-        if not self.connect():
+        conn = self._getconn()
+        if conn is None:
             return None
         try:
-            with self.conn.cursor() as cur:
+            with conn.cursor() as cur:
                 cur.execute("""
                     INSERT INTO tasks (title, description, priority, deadline_str, deadline_datetime, duration, user_id)
                     VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id;
                 """, (title, description, priority, deadline_str, deadline_datetime, duration, user_id))
                 task_id = cur.fetchone()[0]
-                self.conn.commit()
-                print(f"Inserted task_id={task_id} for user_id={user_id}")
+                conn.commit()
+                logger.debug("Inserted task_id=%s for user_id=%s", task_id, user_id)
                 return task_id
         except psycopg2.Error as e:
-            print(f"Insert task failed: {e}")
+            logger.error("Insert task failed: %s", e)
             return None
         finally:
-            self.close()
+            self._putconn(conn)
 
     def update_task(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
         """Updates an existing task in the database."""
-        if not self.connect():
+        conn = self._getconn()
+        if conn is None:
             return False
         try:
-            with self.conn.cursor() as cur:
-                print(f"Attempting to update task_id={task_id} for user_id={user_id}")
+            with conn.cursor() as cur:
+                logger.debug("Attempting to update task_id=%s for user_id=%s", task_id, user_id)
                 cur.execute("""
                     UPDATE tasks
                     SET title = %s, description = %s, priority = %s, deadline_str = %s,
@@ -130,71 +326,437 @@ class Database:
                     WHERE id = %s AND user_id = %s;
                 """, (title, description, priority, deadline_str, deadline_datetime, duration, task_id, user_id))
                 success = cur.rowcount > 0
-                self.conn.commit()
+                conn.commit()
                 if success:
-                    print(f"Successfully updated task_id={task_id}")
+                    logger.debug("Successfully updated task_id=%s", task_id)
                 else:
-                    print(f"No task found with task_id={task_id} for user_id={user_id}")
+                    logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
                 return success
         except psycopg2.Error as e:
-            print(f"Update task failed: {e}")
+            logger.error("Update task failed: %s", e)
             return False
         finally:
-            self.close()
+            self._putconn(conn)
 
     def delete_task(self, task_id, user_id):
         """Deletes a task from the database."""
-        if not self.connect():
+        conn = self._getconn()
+        if conn is None:
             return False
         try:
-            with self.conn.cursor() as cur:
-                print(f"Attempting to delete task_id={task_id} for user_id={user_id}")
-                
-                # Check if the task exists for the user
-                cur.execute("SELECT id FROM tasks WHERE id = %s AND user_id = %s;", (task_id, user_id))
-                if not cur.fetchone():
-                    print(f"No task found with task_id={task_id} for user_id={user_id}")
-                    return False
-                
-                cur.execute("DELETE FROM tasks WHERE id = %s AND user_id = %s;", (task_id, user_id))
-                self.conn.commit()
-                print(f"Successfully deleted task_id={task_id}")
-                return True
+            with conn.cursor() as cur:
+                logger.debug("Attempting to delete task_id=%s for user_id=%s", task_id, user_id)
+                cur.execute("DELETE FROM tasks WHERE id = %s AND user_id = %s RETURNING id;", (task_id, user_id))
+                deleted = cur.fetchone() is not None
+                conn.commit()
+                if deleted:
+                    logger.debug("Successfully deleted task_id=%s", task_id)
+                else:
+                    logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
+                return deleted
         except psycopg2.Error as e:
-            print(f"Delete task failed: {e}")
+            logger.error("Delete task failed: %s", e)
             return False
         finally:
-            self.close()
+            self._putconn(conn)
+
+    def insert_tasks(self, tasks, user_id):
+        """Inserts many tasks with multi-row INSERTs in a single transaction.
+
+        ``tasks`` holds (title, description, priority, deadline_str, deadline_datetime,
+        duration) tuples. Returns the new ids in input order, or None if the batch
+        failed, in which case nothing was inserted.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(cur, """
+                    INSERT INTO tasks (title, description, priority, deadline_str, deadline_datetime, duration, user_id)
+                    VALUES %s RETURNING id;
+                """, [tuple(task) + (user_id,) for task in tasks], page_size=BATCH_PAGE_SIZE, fetch=True)
+                conn.commit()
+                task_ids = [row[0] for row in rows]
+                logger.debug("Inserted %s tasks for user_id=%s", len(task_ids), user_id)
+                return task_ids
+        except psycopg2.Error as e:
+            logger.error("Insert tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def update_tasks(self, tasks, user_id):
+        """Updates many tasks with one UPDATE ... FROM (VALUES ...) per page, in a single transaction.
+
+        ``tasks`` holds (task_id, title, description, priority, deadline_str,
+        deadline_datetime, duration) tuples. Returns one bool per task, True if it
+        was updated (False if it doesn't exist or isn't owned by ``user_id``), or
+        None if the batch failed and nothing was changed.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(cur, """
+                    UPDATE tasks AS t
+                    SET title = v.title, description = v.description, priority = v.priority,
+                        deadline_str = v.deadline_str, deadline_datetime = v.deadline_datetime, duration = v.duration
+                    FROM (VALUES %s) AS v (id, title, description, priority, deadline_str, deadline_datetime, duration, user_id)
+                    WHERE t.id = v.id AND t.user_id = v.user_id
+                    RETURNING t.id;
+                """, [tuple(task) + (user_id,) for task in tasks],
+                    template="(%s::integer, %s, %s::text, %s, %s, %s::timestamp, %s::integer, %s::integer)",
+                    page_size=BATCH_PAGE_SIZE, fetch=True)
+                conn.commit()
+                updated = {row[0] for row in rows}
+                logger.debug("Updated %s of %s tasks for user_id=%s", len(updated), len(tasks), user_id)
+                return [task[0] in updated for task in tasks]
+        except psycopg2.Error as e:
+            logger.error("Update tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def delete_tasks(self, task_ids, user_id):
+        """Deletes many tasks with a single DELETE ... RETURNING.
+
+        Returns one bool per id, True if that task was deleted, or None if the
+        statement failed and nothing was removed.
+        """
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM tasks WHERE user_id = %s AND id = ANY(%s) RETURNING id;",
+                    (user_id, task_ids)
+                )
+                deleted = {row[0] for row in cur.fetchall()}
+                conn.commit()
+                logger.debug("Deleted %s of %s tasks for user_id=%s", len(deleted), len(task_ids), user_id)
+                return [task_id in deleted for task_id in task_ids]
+        except psycopg2.Error as e:
+            logger.error("Delete tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
 
     def fetch_tasks(self, user_id, sort_option="By Deadline"):
         """Fetches all tasks for a user with sorting."""
-        if not self.connect():
+        result = self.query_tasks(user_id, TaskQuery.for_sort_option(sort_option))
+        if result is None:
             return []
+        tasks = result[0]
+        logger.debug("Fetched %s tasks for user_id=%s", len(tasks), user_id)
+        return tasks
+
+    def query_tasks(self, user_id, query):
+        """Runs a TaskQuery for a user. Returns ``(tasks, next_cursor)``, or None on failure."""
+        sql, params = query.compile(user_id, "postgres")
+        conn = self._getconn()
+        if conn is None:
+            return None
         try:
-            with self.conn.cursor() as cur:
-                if sort_option == "By Priority":
-                    cur.execute("""
-                        SELECT id, title, description, priority, deadline_str, duration
-                        FROM tasks
-                        WHERE user_id = %s
-                        ORDER BY
-                            CASE priority
-                                WHEN 'High' THEN 1
-                                WHEN 'Medium' THEN 2
-                                WHEN 'Low' THEN 3
-                            END,
-                            deadline_datetime;
-                    """, (user_id,))
-                else:  # By Deadline
-                    cur.execute(
-                        "SELECT id, title, description, priority, deadline_str, duration FROM tasks WHERE user_id = %s ORDER BY deadline_datetime;",
-                        (user_id,)
-                    )
-                tasks = cur.fetchall()
-                print(f"Fetched tasks for user_id={user_id}: {tasks}")
-                return tasks
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return query.paginate(cur.fetchall())
+        except psycopg2.Error as e:
+            logger.error("Query tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def search_tasks(self, user_id, text, limit=50):
+        """Ranks a user's tasks against ``text`` using the full-text index; each word matches as a prefix.
+
+        Returns the best ``limit`` task rows, or None on failure.
+        """
+        tsquery = prefix_tsquery(text)
+        if not tsquery:
+            return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT {TASK_COLUMNS} FROM tasks, to_tsquery('{SEARCH_CONFIG}', %s) AS query
+                    WHERE user_id = %s AND search_vector @@ query
+                    ORDER BY ts_rank_cd(search_vector, query) DESC, deadline_datetime, id
+                    LIMIT %s;
+                """, (tsquery, user_id, limit))
+                return list(tasks_from_rows(cur.fetchall()))
+        except psycopg2.Error as e:
+            logger.error("Search tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def fetch_all_tasks(self, user_id):
+        """Fetches all of a user's task rows in no particular order, for caching.
+
+        Unlike fetch_tasks, returns None on failure so an outage isn't cached as an empty list.
+        """
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = %s;",
+                    (user_id,)
+                )
+                return list(tasks_from_rows(cur.fetchall()))
         except psycopg2.Error as e:
-            print(f"Fetch tasks failed: {e}")
+            logger.error("Fetch tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def fetch_tasks_by_ids(self, user_id, task_ids):
+        """Fetches the user's tasks with these ids in one query; None on failure."""
+        task_ids = list(task_ids)
+        if not task_ids:
             return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = %s AND id = ANY(%s);",
+                    (user_id, task_ids)
+                )
+                return list(tasks_from_rows(cur.fetchall()))
+        except psycopg2.Error as e:
+            logger.error("Fetch tasks by id failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def fetch_task_versions(self, user_id):
+        """Returns ``{task_id: version}`` for all of a user's tasks, or None on failure."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, version FROM tasks WHERE user_id = %s;", (user_id,))
+                return dict(cur.fetchall())
+        except psycopg2.Error as e:
+            logger.error("Fetch task versions failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def fetch_versioned_tasks(self, user_id, task_ids):
+        """Fetches ``(task, version, updated_at)`` for the user's tasks with these ids; None on failure."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {TASK_COLUMNS}, version, updated_at FROM tasks WHERE user_id = %s AND id = ANY(%s);",
+                    (user_id, task_ids)
+                )
+                return [(Task(*row[:-2]), row[-2], row[-1]) for row in cur.fetchall()]
+        except psycopg2.Error as e:
+            logger.error("Fetch versioned tasks failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def update_task_at_version(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration,
+                               user_id, version):
+        """Updates a task if it is still at ``version``; returns the new version, False if not, None on failure."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                # tasks_version_trigger bumps version and updated_at
+                cur.execute("""
+                    UPDATE tasks
+                    SET title = %s, description = %s, priority = %s, deadline_str = %s,
+                        deadline_datetime = %s, duration = %s
+                    WHERE id = %s AND user_id = %s AND version = %s
+                    RETURNING version;
+                """, (title, description, priority, deadline_str, deadline_datetime, duration, task_id, user_id, version))
+                row = cur.fetchone()
+                conn.commit()
+                return row[0] if row else False
+        except psycopg2.Error as e:
+            logger.error("Versioned task update failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def delete_task_at_version(self, task_id, user_id, version):
+        """Deletes a task if it is still at ``version``; returns True, False if not, or None on failure."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM tasks WHERE id = %s AND user_id = %s AND version = %s RETURNING id;",
+                    (task_id, user_id, version)
+                )
+                deleted = cur.fetchone() is not None
+                conn.commit()
+                return deleted
+        except psycopg2.Error as e:
+            logger.error("Versioned task delete failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def change_listener(self):
+        """Returns the shared LISTEN/NOTIFY listener for this database, or None if live updates are off."""
+        if not config.LIVE_UPDATES:
+            return None
+        return get_shared_listener(
+            tuple(sorted(self.conn_params.items())),
+            lambda: ChangeListener(lambda: psycopg2.connect(**self.conn_params), heartbeat=config.LISTENER_HEARTBEAT)
+        )
+
+    def fetch_tasks_page(self, user_id, sort_option="By Deadline", limit=100, after=None):
+        """Fetches one page of tasks using keyset pagination.
+
+        Returns ``(tasks, next_cursor)``; pass ``next_cursor`` back as ``after``
+        to get the following page. ``next_cursor`` is None on the last page.
+        """
+        query = TaskQuery.for_sort_option(sort_option).limit(limit).after(after)
+        return self.query_tasks(user_id, query) or ([], None)
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Streams a user's tasks through a server-side cursor, ``batch_size`` rows per round trip.
+
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        conn = self._getconn()
+        if conn is None:
+            return
+        try:
+            with conn.cursor(name=f"task_stream_{uuid.uuid4().hex}") as cur:
+                cur.itersize = batch_size
+                cur.execute(*TaskQuery.for_sort_option(sort_option).compile(user_id, "postgres", with_keys=False))
+                yield from tasks_from_rows(cur)
+        except psycopg2.Error as e:
+            logger.error("Stream tasks failed: %s", e)
         finally:
-            self.close()
\ No newline at end of file
+            self._putconn(conn)
+
+    def copy_tasks_in(self, stream):
+        """Bulk-loads CSV task rows from a file-like ``stream`` with COPY, in one transaction.
+
+        Rows are (title, description, priority, deadline_str, deadline_datetime,
+        duration, user_id). Returns the number of rows loaded, or None on failure.
+        """
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    "COPY tasks (title, description, priority, deadline_str, deadline_datetime, duration, user_id) "
+                    "FROM STDIN WITH (FORMAT csv);",
+                    stream
+                )
+                count = cur.rowcount
+                conn.commit()
+                logger.debug("Copied %s tasks in", count)
+                return count
+        except psycopg2.Error as e:
+            logger.error("Bulk task import failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+    def copy_tasks_out(self, user_id, out, as_json=False):
+        """Streams a user's tasks to the writable ``out`` with COPY ... TO STDOUT.
+
+        Writes CSV with a header by default, or one JSON object per line when
+        ``as_json`` is set. Returns the number of rows written, or None on failure.
+        """
+        if as_json:
+            writer = _CopyJsonWriter(out)
+            count = self._copy_out(user_id, writer, as_json=True)
+            writer.flush()
+            return count
+        return self._copy_out(user_id, out, as_json=False)
+
+    def _copy_out(self, user_id, out, as_json):
+        """Runs COPY ... TO STDOUT for copy_tasks_out."""
+        conn = self._getconn()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                if as_json:
+                    select = cur.mogrify(
+                        "SELECT json_build_object('title', title, 'description', description, 'priority', priority, "
+                        "'deadline', deadline_str, 'duration', duration)::text FROM tasks WHERE user_id = %s "
+                        "ORDER BY deadline_datetime, id",
+                        (user_id,)
+                    ).decode()
+                    options = "FORMAT csv"
+                else:
+                    select = cur.mogrify(
+                        "SELECT title, description, priority, deadline_str AS deadline, duration FROM tasks "
+                        "WHERE user_id = %s ORDER BY deadline_datetime, id",
+                        (user_id,)
+                    ).decode()
+                    options = "FORMAT csv, HEADER"
+                cur.copy_expert(f"COPY ({select}) TO STDOUT WITH ({options});", out)
+                count = cur.rowcount
+                logger.debug("Copied %s tasks out for user_id=%s", count, user_id)
+                return count
+        except psycopg2.Error as e:
+            logger.error("Bulk task export failed: %s", e)
+            return None
+        finally:
+            self._putconn(conn)
+
+
+class _CopyJsonWriter:
+    """Writable file object that turns COPY's single-column CSV output into JSON lines."""
+    def __init__(self, out):
+        self._out = out
+        self._partial = ""
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        lines = (self._partial + data).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._write_line(line)
+        return len(data)
+
+    def flush(self):
+        if self._partial:
+            self._write_line(self._partial)
+            self._partial = ""
+
+    def _write_line(self, line):
+        # JSON text never contains a raw newline, so each CSV record is exactly one line
+        if line.startswith('"') and line.endswith('"'):
+            line = line[1:-1].replace('""', '"')
+        self._out.write(line + "\n")
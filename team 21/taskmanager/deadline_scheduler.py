@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+URGENT_WINDOW = timedelta(hours=24)  # "due soon" fires this long before the deadline
+MAX_TIMER_MS = 60 * 60 * 1000  # re-arm at least hourly so sleep/clock changes can't strand an event
+
+DUE_SOON = "due_soon"
+OVERDUE = "overdue"
+
+
+class DeadlineScheduler:
+    """Fires "due soon" and "overdue" alerts at the right moment without polling.
+
+    Upcoming events sit in a min-heap and only one ``after()`` timer is armed,
+    for the earliest event. Tasks are added, changed and removed incrementally;
+    superseded heap entries are skipped lazily when they reach the top.
+    Events that fall due together are delivered to ``on_alerts`` as one batch
+    of ``(kind, task_id, title, deadline)`` tuples.
+    """
+    def __init__(self, widget, on_alerts, clock=datetime.now):
+        self.widget = widget
+        self.on_alerts = on_alerts
+        self.clock = clock
+        self._heap = []  # (when, seq, task_id, kind, version)
+        self._tasks = {}  # task_id -> [title, deadline, version]
+        self._seq = itertools.count()
+        self._timer = None
+        self._timer_when = None
+
+    def sync(self, tasks):
+        """Reconciles the schedule with a full task list, touching only tasks that changed.
+
+        Uses each row's stored deadline_datetime, so nothing is re-parsed.
+        """
+        seen = set()
+        for task in tasks:
+            task_id, title, deadline = task.id, task.title, task.deadline_datetime
+            seen.add(task_id)
+            current = self._tasks.get(task_id)
+            if current is not None and current[0] == title and current[1] == deadline:
+                continue
+            self.upsert_task(task_id, title, deadline)
+        for task_id in [task_id for task_id in self._tasks if task_id not in seen]:
+            self.remove_task(task_id)
+
+    def upsert_task(self, task_id, title, deadline):
+        """Schedules alerts for a new task, or reschedules an edited one."""
+        current = self._tasks.get(task_id)
+        if current is not None and current[1] == deadline:
+            current[0] = title  # same deadline: keep pending events, just show the new title
+            return
+        version = next(self._seq)
+        self._tasks[task_id] = [title, deadline, version]
+        now = self.clock()
+        if deadline <= now:
+            self._push(now, task_id, OVERDUE, version)
+        else:
+            self._push(max(now, deadline - URGENT_WINDOW), task_id, DUE_SOON, version)
+            self._push(deadline, task_id, OVERDUE, version)
+        self._arm()
+
+    def remove_task(self, task_id):
+        """Forgets a deleted task; its heap entries are discarded when they surface."""
+        self._tasks.pop(task_id, None)
+
+    def clear(self):
+        """Drops every task and cancels the timer."""
+        self._tasks.clear()
+        self._heap.clear()
+        self._cancel_timer()
+
+    def stop(self):
+        """Cancels the pending timer (e.g. on logout)."""
+        self._cancel_timer()
+
+    def _push(self, when, task_id, kind, version):
+        heapq.heappush(self._heap, (when, next(self._seq), task_id, kind, version))
+
+    def _is_live(self, entry):
+        task = self._tasks.get(entry[2])
+        return task is not None and task[2] == entry[4]
+
+    def _arm(self):
+        """Arms a single timer for the earliest live event."""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._cancel_timer()
+            return
+        when = self._heap[0][0]
+        if self._timer is not None and self._timer_when <= when:
+            return
+        self._cancel_timer()
+        delay_ms = int(max(0.0, (when - self.clock()).total_seconds()) * 1000)
+        self._timer_when = when
+        self._timer = self.widget.after(min(delay_ms, MAX_TIMER_MS), self._fire)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            try:
+                self.widget.after_cancel(self._timer)
+            except Exception:
+                pass
+        self._timer = None
+        self._timer_when = None
+
+    def _fire(self):
+        """Delivers every event that is now due, then re-arms for the next one."""
+        self._timer = None
+        self._timer_when = None
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                title, deadline = self._tasks[entry[2]][:2]
+                due.append((entry[3], entry[2], title, deadline))
+        if due:
+            try:
+                self.on_alerts(due)
+            except Exception as e:
+                logger.exception("Error delivering deadline alerts: %s", e)
+        self._arm()
@@ -0,0 +1,43 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# The one deadline format users type and see, in strptime terms (for reference and error messages)
+DEADLINE_FORMAT = "%d/%m/%Y %I:%M %p"
+
+# DD/MM/YYYY HH:MM AM/PM; compiled once instead of strptime rebuilding its regex under a lock per call
+DEADLINE_RE = re.compile(r" ?(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2}):(\d{1,2})\s+([AaPp])[Mm]")
+
+# strptime and strftime use the locale's AM/PM names; these never change
+MERIDIEMS = ("AM", "PM")
+
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_deadline(text):
+    """Parses a "DD/MM/YYYY HH:MM AM/PM" deadline; raises ValueError if malformed.
+
+    Accepts what strptime accepts for DEADLINE_FORMAT in an English locale,
+    whatever the process locale is. Results are cached, since the same few
+    strings are parsed over and over.
+    """
+    match = DEADLINE_RE.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Deadline {text!r} doesn't match DD/MM/YYYY HH:MM AM/PM")
+    day, month, year, hour, minute, meridiem = match.groups()
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        raise ValueError(f"Hour out of range in deadline {text!r}")
+    hour = hour % 12 + (12 if meridiem in "Pp" else 0)
+    return datetime(int(year), int(month), int(day), hour, int(minute))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def format_deadline(deadline):
+    """Formats a datetime as the canonical "DD/MM/YYYY HH:MM AM/PM" string."""
+    hour = deadline.hour % 12 or 12
+    return (
+        f"{deadline.day:02d}/{deadline.month:02d}/{deadline.year:04d} "
+        f"{hour:02d}:{deadline.minute:02d} {MERIDIEMS[deadline.hour >= 12]}"
+    )
@@ -0,0 +1,10 @@
+class TaskManagerError(Exception):
+    """Raised when a task manager operation fails (e.g. the database rejected a write)."""
+
+
+class UsernameTakenError(TaskManagerError):
+    """Raised when registering a username that already exists (ignoring case)."""
+
+
+class TaskNotFoundError(TaskManagerError):
+    """Raised when a task doesn't exist or belongs to another user."""
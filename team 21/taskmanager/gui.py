@@ -1,18 +1,47 @@
+import threading
 import tkinter as tk
 from tkinter import messagebox as tkMessageBox
 from tkinter import ttk
+from datetime import datetime, timedelta
+from errors import UsernameTakenError
 from task_manager import TaskManager
+from task_query import SORT_OPTIONS, TaskQuery
+from gui_worker import GuiWorker
+from row_model import RowModel
+from task import Task
+from virtual_table import VirtualTable
+from deadline_scheduler import OVERDUE, DeadlineScheduler
+from deadlines import format_deadline
 import logging
-from datetime import datetime
+import config
 
 # Configure logging for debugging and monitoring
 logging.basicConfig(
-    level=logging.INFO,
+    level=config.LOG_LEVEL,
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
 
+# Task list filters: each refines a sorted TaskQuery at fetch time, so "today" stays current
+TASK_FILTERS = {
+    "All Tasks": lambda query, now: query,
+    "High Priority": lambda query, now: query.priority("High"),
+    "Due Today": lambda query, now: query.due_between(
+        now.replace(hour=0, minute=0, second=0, microsecond=0),
+        now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    ),
+    "Due This Week": lambda query, now: query.due_between(now, now + timedelta(days=7)),
+    "Overdue": lambda query, now: query.due_between(None, now),
+    "Under 30 Minutes": lambda query, now: query.duration_between(None, 30),
+}
+
+# Most search matches listed at once; results are ranked, so the rest are rarely wanted
+SEARCH_RESULT_LIMIT = 500
+
+# How often the main loop checks for other clients' task changes; a burst of them is one refresh
+REMOTE_CHANGE_POLL_MS = 250
+
 def configure_styles():
     """Configure consistent Tkinter widget styles."""
     style = ttk.Style()
@@ -30,6 +59,8 @@ def configure_styles():
         background=[('active', '#b0b0b0'), ('disabled', '#e0e0e0')]
     )
     style.configure("TCombobox", font=("Helvetica", 12))
+    style.configure("Treeview", font=("Helvetica", 11), rowheight=22)
+    style.configure("Treeview.Heading", font=("Helvetica", 12), foreground="#34495e")
     style.configure(
         "Sidebar.TButton",
         font=("Helvetica", 12, "bold"),
@@ -45,8 +76,8 @@ def configure_styles():
     return style
 
 class LoginWindow:
-    """Manages the login/registration UI."""
-    def __init__(self, root, on_success):
+    """Manages the login/registration UI over the application's shared TaskService."""
+    def __init__(self, root, service, on_success):
         logger.info("Initializing LoginWindow")
         self.root = root
         self.window = tk.Toplevel(root)  # Create login window
@@ -57,7 +88,8 @@ class LoginWindow:
         self.window.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self.on_success = on_success
-        self.task_manager = TaskManager()
+        self.task_manager = TaskManager(service)
+        self.worker = GuiWorker(self.window, on_busy_change=self._set_busy)
         self._setup_ui()
 
     def _setup_ui(self):
@@ -83,8 +115,17 @@ class LoginWindow:
         button_frame = tk.Frame(self.window, bg="#f0f2f5")
         button_frame.pack(pady=20)
 
-        ttk.Button(button_frame, text="Login", command=self._login, style="TButton").grid(row=0, column=0, padx=5)
-        ttk.Button(button_frame, text="Register", command=self._register, style="TButton").grid(row=0, column=1, padx=5)
+        self.login_button = ttk.Button(button_frame, text="Login", command=self._login, style="TButton")
+        self.login_button.grid(row=0, column=0, padx=5)
+        self.register_button = ttk.Button(button_frame, text="Register", command=self._register, style="TButton")
+        self.register_button.grid(row=0, column=1, padx=5)
+
+    def _set_busy(self, busy):
+        """Disables the buttons while a login/registration request is running."""
+        state = "disabled" if busy else "!disabled"
+        self.login_button.state([state])
+        self.register_button.state([state])
+        self.window.config(cursor="watch" if busy else "")
 
     def _login(self):
         """Handles login attempt."""
@@ -94,18 +135,21 @@ class LoginWindow:
             tkMessageBox.showerror("Error", "Please fill in both fields")
             logger.error("Empty username or password")
             return
-        logger.info(f"Attempting login for username={username}")
-        try:
-            user_id = self.task_manager.login(username, password)
-            if user_id:
-                logger.info(f"Logged in user_id={user_id}")
-                self._close_and_proceed(user_id)
-            else:
-                tkMessageBox.showerror("Error", "Invalid username or password")
-                logger.error(f"Login failed for username={username}")
-        except Exception as e:
-            tkMessageBox.showerror("Error", f"Login error: {e}")
-            logger.exception(f"Login exception: {e}")
+        logger.info("Attempting login for username=%s", username)
+        self.worker.submit(
+            self.task_manager.login, username, password, key="auth",
+            on_success=lambda user_id: self._on_login_result(username, user_id),
+            on_error=lambda e: self._on_auth_error("Login", e)
+        )
+
+    def _on_login_result(self, username, user_id):
+        """Handles the result of a background login."""
+        if user_id:
+            logger.info("Logged in user_id=%s", user_id)
+            self._close_and_proceed(user_id)
+        else:
+            tkMessageBox.showerror("Error", "Invalid username or password")
+            logger.error("Login failed for username=%s", username)
 
     def _register(self):
         """Handles user registration."""
@@ -115,28 +159,45 @@ class LoginWindow:
             tkMessageBox.showerror("Error", "Please fill in both fields")
             logger.error("Empty username or password")
             return
-        logger.info(f"Attempting registration for username={username}")
-        try:
-            user_id = self.task_manager.register(username, password)
-            if user_id:
-                logger.info(f"Registered user_id={user_id}")
-                self._close_and_proceed(user_id)
-            else:
-                tkMessageBox.showerror("Error", "Registration failed")
-                logger.error(f"Registration failed for username={username}")
-        except Exception as e:
-            tkMessageBox.showerror("Error", f"Registration error: {e}")
-            logger.exception(f"Registration exception: {e}")
+        logger.info("Attempting registration for username=%s", username)
+        self.worker.submit(
+            self.task_manager.register, username, password, key="auth",
+            on_success=lambda user_id: self._on_register_result(username, user_id),
+            on_error=lambda e: self._on_register_error(username, e)
+        )
+
+    def _on_register_result(self, username, user_id):
+        """Handles the result of a background registration."""
+        if user_id:
+            logger.info("Registered user_id=%s", user_id)
+            self._close_and_proceed(user_id)
+        else:
+            tkMessageBox.showerror("Error", "Registration failed")
+            logger.error("Registration failed for username=%s", username)
+
+    def _on_register_error(self, username, error):
+        """Reports a failed background registration; a taken username gets its own message."""
+        if isinstance(error, UsernameTakenError):
+            tkMessageBox.showerror("Username Taken", f"{error}. Please choose another.")
+            logger.error("Registration failed for username=%s: taken", username)
+        else:
+            self._on_auth_error("Registration", error)
+
+    def _on_auth_error(self, action, error):
+        """Reports an exception raised by a background login/registration."""
+        tkMessageBox.showerror("Error", f"{action} error: {error}")
+        logger.error("%s exception: %s", action, error)
 
     def _close_and_proceed(self, user_id):
         """Closes login window and proceeds to main window."""
         logger.info("Closing LoginWindow")
         try:
+            self.worker.shutdown()
             self.window.update()
             self.window.destroy()
-            self.on_success(user_id)
+            self.on_success(user_id, self.task_manager)
         except Exception as e:
-            logger.exception(f"Error closing LoginWindow: {e}")
+            logger.exception("Error closing LoginWindow: %s", e)
             raise
 
     def _on_close(self):
@@ -154,7 +215,7 @@ class LoginWindow:
 class TaskFormWindow:
     """Manages the add/edit task form UI."""
     def __init__(self, main_window, user_id, task_manager, task=None):
-        logger.info(f"Initializing TaskFormWindow with user_id={user_id}")
+        logger.info("Initializing TaskFormWindow with user_id=%s", user_id)
         self.window = tk.Toplevel(main_window.window)
         self.window.geometry("650x450")
         self.window.title("Edit Task" if task else "Add Task")
@@ -208,13 +269,14 @@ class TaskFormWindow:
             self.duration_entry.insert(0, str(self.task.get("duration", "")))
         self.duration_entry.grid(row=4, column=1, padx=10, pady=5, sticky="w")
 
-        ttk.Button(
+        self.save_button = ttk.Button(
             self.window, text="Save Changes" if self.task else "Add Task",
             command=self._submit, style="TButton"
-        ).pack(pady=20)
+        )
+        self.save_button.pack(pady=20)
 
     def _submit(self):
-        """Submits task data for add/edit."""
+        """Submits task data for add/edit in the background; the form closes once the task is saved."""
         try:
             title = self.title_entry.get().strip()
             description = self.description_text.get("1.0", "end").strip()
@@ -222,55 +284,224 @@ class TaskFormWindow:
             deadline = self.deadline_entry.get().strip()
             duration = self.duration_entry.get().strip()
 
-            logger.info(f"Submitting task: title={title}, priority={priority}")
+            logger.info("Submitting task: title=%s, priority=%s", title, priority)
+            self.save_button.state(["disabled"])  # until the save fails, so it isn't sent twice
             if self.task:
                 self.task_manager.edit_task(
                     self.main_window, self.user_id, self.task["id"],
-                    title, description, priority, deadline, duration
+                    title, description, priority, deadline, duration,
+                    on_success=self._on_saved, on_error=self._on_save_failed
                 )
             else:
                 self.task_manager.add_task(
                     self.main_window, self.user_id,
-                    title, description, priority, deadline, duration
+                    title, description, priority, deadline, duration,
+                    on_success=self._on_saved, on_error=self._on_save_failed
                 )
-            self.window.destroy()
         except Exception as e:
+            self._on_save_failed()
             tkMessageBox.showerror("Error", f"Failed to submit task: {e}")
-            logger.exception(f"Task submission error: {e}")
+            logger.exception("Task submission error: %s", e)
+
+    def _exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def _on_saved(self):
+        if self._exists():
+            self.window.destroy()
+
+    def _on_save_failed(self):
+        """Lets the user correct the form and save again."""
+        if self._exists():
+            self.save_button.state(["!disabled"])
+
+
+class NotificationPanel:
+    """Non-modal window that collects deadline alerts instead of popping one message box each."""
+    def __init__(self, parent):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Deadline Alerts")
+        self.window.geometry("420x260")
+        self.window.configure(bg="#f0f2f5")
+        self.window.transient(parent)
+
+        tk.Label(
+            self.window, text="Deadline Alerts", font=("Helvetica", 14),
+            bg="#f0f2f5", fg="#2c3e50"
+        ).pack(pady=10)
+        self.alert_list = tk.Listbox(self.window, font=("Helvetica", 11), height=8)
+        self.alert_list.pack(fill="both", expand=True, padx=10)
+        ttk.Button(self.window, text="Dismiss", command=self.window.destroy, style="TButton").pack(pady=10)
+
+    def exists(self):
+        """True until the user closes the panel."""
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def add_alerts(self, alerts):
+        """Appends ``(kind, task_id, title, deadline)`` alerts, newest at the top."""
+        for kind, task_id, title, deadline in alerts:
+            if kind == OVERDUE:
+                self.alert_list.insert(0, f"Overdue: {title}")
+                self.alert_list.itemconfig(0, fg="#c0392b")
+            else:
+                self.alert_list.insert(0, f"Due soon: {title} ({format_deadline(deadline)})")
+                self.alert_list.itemconfig(0, fg="#d35400")
+        self.window.deiconify()
+        self.window.lift()
+        logger.info("Showing %s deadline alerts", len(alerts))
+
+
+def format_minutes(minutes):
+    """Formats a span of minutes as e.g. "2h 05m"; blank for zero."""
+    if not minutes:
+        return ""
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+
+class ScheduleRows:
+    """Adapts a Schedule to the model VirtualTable reads, formatting a row only when it is shown."""
+    def __init__(self):
+        self.schedule = None
+        self.task_ids = []
+        self._positions = None
+
+    def update(self, schedule):
+        self.schedule = schedule
+        self.task_ids = schedule.task_ids
+        self._positions = None
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def index_of(self, task_id):
+        if self._positions is None:
+            self._positions = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        return self._positions.get(task_id)
+
+    @property
+    def rows(self):
+        return self
+
+    def __getitem__(self, index):
+        entry = self.schedule[index]
+        return (
+            format_deadline(entry.start), format_deadline(entry.end), entry.task.title,
+            entry.task.priority, entry.task.deadline_str, format_minutes(entry.late_by)
+        )
+
+
+class ScheduleWindow:
+    """Non-modal window showing the planned work order, which tasks run late and where the overloads are."""
+    def __init__(self, parent):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Schedule")
+        self.window.geometry("840x480")
+        self.window.configure(bg="#f0f2f5")
+        self.window.transient(parent)
+
+        tk.Label(
+            self.window, text="Planned Schedule", font=("Helvetica", 14),
+            bg="#f0f2f5", fg="#2c3e50"
+        ).pack(pady=10)
+        self.summary_label = tk.Label(
+            self.window, text="Planning...", font=("Helvetica", 11),
+            bg="#f0f2f5", fg="#34495e"
+        )
+        self.summary_label.pack()
+        self.overload_list = tk.Listbox(self.window, font=("Helvetica", 11), height=3, fg="#c0392b")
+        self.overload_list.pack(fill="x", padx=10, pady=5)
+        self.rows = ScheduleRows()
+        self.table = VirtualTable(
+            self.window, self.rows,
+            columns=["Start", "End", "Title", "Priority", "Deadline", "Late By"],
+            widths=[150, 150, 170, 70, 150, 90], height=12, bg="#f0f2f5"
+        )
+        self.table.pack(fill="both", expand=True, padx=10)
+        ttk.Button(self.window, text="Close", command=self.window.destroy, style="TButton").pack(pady=10)
+
+    def exists(self):
+        """True until the user closes the window."""
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def show(self, schedule):
+        """Replaces the displayed plan with a fresh Schedule, or reports that planning failed (None)."""
+        if schedule is None:
+            self.summary_label.config(text="Couldn't plan the schedule")
+            return
+        self.rows.update(schedule)
+        self.table.render()
+        if schedule.feasible:
+            text = f"All {len(schedule)} tasks fit before their deadlines"
+        else:
+            text = (f"{schedule.late_count} of {len(schedule)} tasks will be late; "
+                    f"the order favours higher priorities")
+        self.summary_label.config(text=text)
+        self.overload_list.delete(0, "end")
+        for window in schedule.overloads:
+            self.overload_list.insert("end", (
+                f"Overloaded {format_deadline(window.start)} to {format_deadline(window.end)}: "
+                f"{format_minutes(window.excess)} of {format_minutes(window.demand)} won't fit "
+                f"({len(window.task_ids)} tasks)"
+            ))
+        logger.info("Showing schedule of %s tasks, %s overload windows", len(schedule), len(schedule.overloads))
 
 
 class MainWindow:
-    """Manages the main task manager UI with task list and controls."""
-    def __init__(self, root, user_id, on_logout):
-        logger.info(f"Initializing MainWindow with user_id={user_id}")
+    """Manages the main task manager UI with task list and controls.
+
+    ``task_manager`` is the one the user logged in through, which holds the session to end on logout.
+    """
+    def __init__(self, root, task_manager, user_id, on_logout):
+        logger.info("Initializing MainWindow with user_id=%s", user_id)
         self.window = root
         self.window.geometry("980x500")
         self.window.title("Task Manager")
         self.window.configure(bg="#f0f2f5")
         self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self.user_id = user_id
         self.on_logout = on_logout
-        self.task_manager = TaskManager()
+        self.task_manager = task_manager
         self.selected_task_id = None
         self.selected_task_index = None
-        self.is_syncing_selection = False
         self.task_ids = []
+        self.row_model = RowModel()
+        self.worker = GuiWorker(self.window, on_busy_change=self._set_loading)
+        self.deadline_scheduler = DeadlineScheduler(self.window, self._show_deadline_alerts)
+        self.notification_panel = None
+        self.schedule_window = None
+        self._remote_change = threading.Event()  # set from the change listener's thread
+        self._remote_poll = None
 
         try:
             self._setup_ui()
             self.window.deiconify()
             self.window.update()
-            self._update_listboxes()
-            self._start_deadline_check()  # Start periodic deadline checks
+            self._update_listboxes()  # also schedules deadline alerts once tasks arrive
+            # Subscribing can wait on the database's LISTEN, so it runs on the worker too
+            self.worker.submit(
+                self.task_manager.watch_tasks, self.user_id, self._on_remote_change, key="watch",
+                on_success=self._start_remote_poll
+            )
         except Exception as e:
-            logger.exception(f"MainWindow initialization error: {e}")
+            logger.exception("MainWindow initialization error: %s", e)
             tkMessageBox.showerror("Error", f"Failed to initialize main window: {e}")
             self.window.destroy()
             raise
 
     def _setup_ui(self):
-        """Configures main window layout with sidebar and task listboxes."""
+        """Configures main window layout with sidebar and task table."""
         logger.info("Setting up MainWindow UI")
         try:
             configure_styles()
@@ -299,6 +530,11 @@ class MainWindow:
                 style="Sidebar.TButton"
             ).pack(fill="x", padx=10, pady=5)
 
+            ttk.Button(
+                sidebar, text="Schedule", command=self._open_schedule,
+                style="Sidebar.TButton"
+            ).pack(fill="x", padx=10, pady=5)
+
             # Sorting options
             tk.Label(
                 sidebar, text="Sort Tasks", font=("Helvetica", 12),
@@ -306,11 +542,20 @@ class MainWindow:
             ).pack(pady=10, padx=10, anchor="w")
             self.sort_var = tk.StringVar(value="By Deadline")
             sort_menu = ttk.Combobox(
-                sidebar, textvariable=self.sort_var, values=["By Priority", "By Deadline"],
+                sidebar, textvariable=self.sort_var, values=list(SORT_OPTIONS),
                 font=("Helvetica", 12), state="readonly"
             )
             sort_menu.pack(fill="x", padx=10, pady=5)
-            sort_menu.bind("<<ComboboxSelected>>", lambda e: self._update_listboxes())
+            # Debounced so flicking through sort options triggers a single fetch
+            sort_menu.bind("<<ComboboxSelected>>", lambda e: self._update_listboxes(debounce_ms=150))
+
+            self.filter_var = tk.StringVar(value="All Tasks")
+            filter_menu = ttk.Combobox(
+                sidebar, textvariable=self.filter_var, values=list(TASK_FILTERS),
+                font=("Helvetica", 12), state="readonly"
+            )
+            filter_menu.pack(fill="x", padx=10, pady=5)
+            filter_menu.bind("<<ComboboxSelected>>", lambda e: self._update_listboxes(debounce_ms=150))
 
             ttk.Button(
                 sidebar, text="Logout", command=self._logout,
@@ -326,102 +571,120 @@ class MainWindow:
                 bg="#f0f2f5", fg="#2c3e50"
             ).pack(pady=10)
 
+            self.status_label = tk.Label(
+                content, text="", font=("Helvetica", 10, "italic"),
+                bg="#f0f2f5", fg="#7f8c8d"
+            )
+            self.status_label.pack()
+
+            search_frame = tk.Frame(content, bg="#f0f2f5")
+            search_frame.pack(fill="x", padx=5, pady=(0, 5))
+            tk.Label(
+                search_frame, text="Search:", font=("Helvetica", 12),
+                bg="#f0f2f5", fg="#2c3e50"
+            ).pack(side="left")
+            self.search_var = tk.StringVar()
+            search_entry = ttk.Entry(search_frame, textvariable=self.search_var, font=("Helvetica", 12))
+            search_entry.pack(side="left", fill="x", expand=True, padx=5)
+            # Search as you type, once typing pauses; build the search index while the user starts typing
+            self.search_var.trace_add("write", lambda *args: self._update_listboxes(debounce_ms=200))
+            search_entry.bind("<FocusIn>", lambda e: self.worker.submit(
+                self.task_manager.prepare_search, self.user_id, key="search-index"
+            ))
+
             list_frame = tk.Frame(content, bg="#f0f2f5")
             list_frame.pack(fill="both", expand=True)
 
-            # Task list headers
-            headers = ["Title", "Description", "Priority", "Deadline", "Duration (min)"]
-            for i, header in enumerate(headers):
-                tk.Label(
-                    list_frame, text=header, font=("Helvetica", 12),
-                    bg="#f0f2f5", fg="#34495e"
-                ).grid(row=0, column=i, padx=5, pady=5, sticky="w")
-
-            # Scrollbar for listboxes
-            scroll = ttk.Scrollbar(list_frame, orient="vertical")
-            scroll.grid(row=1, column=5, sticky="ns")
-
-            # Task listboxes
-            self.title_listbox = tk.Listbox(list_frame, width=20, height=15, font=("Helvetica", 11), yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-            self.description_listbox = tk.Listbox(list_frame, width=30, height=15, font=("Helvetica", 11), yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-            self.priority_listbox = tk.Listbox(list_frame, width=15, height=15, font=("Helvetica", 11), yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-            self.deadline_listbox = tk.Listbox(list_frame, width=25, height=15, font=("Helvetica", 11), yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-            self.duration_listbox = tk.Listbox(list_frame, width=15, height=15, font=("Helvetica", 11), yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-
-            self.title_listbox.grid(row=1, column=0, padx=5, pady=5)
-            self.description_listbox.grid(row=1, column=1, padx=5, pady=5)
-            self.priority_listbox.grid(row=1, column=2, padx=5, pady=5)
-            self.deadline_listbox.grid(row=1, column=3, padx=5, pady=5)
-            self.duration_listbox.grid(row=1, column=4, padx=5, pady=5)
-
-            scroll.configure(command=self._sync_scroll)
-
-            # Bind selection events
-            for lb in [self.title_listbox, self.description_listbox, self.priority_listbox, self.deadline_listbox, self.duration_listbox]:
-                lb.bind("<<ListboxSelect>>", self._sync_selection)
+            # Task table; only the visible rows are materialized as widgets
+            self.task_table = VirtualTable(
+                list_frame, self.row_model,
+                columns=["Title", "Description", "Priority", "Deadline", "Duration (min)"],
+                widths=[150, 200, 80, 180, 110],
+                height=13, on_select=self._on_task_selected, bg="#f0f2f5"
+            )
+            self.task_table.pack(fill="both", expand=True, padx=5, pady=5)
         except Exception as e:
-            logger.exception(f"Error setting up MainWindow UI: {e}")
+            logger.exception("Error setting up MainWindow UI: %s", e)
             raise
 
-    def _sync_scroll(self, *args):
-        """Synchronizes scrolling across listboxes."""
-        try:
-            for lb in [self.title_listbox, self.description_listbox, self.priority_listbox, self.deadline_listbox, self.duration_listbox]:
-                lb.yview(*args)
-        except Exception as e:
-            logger.exception(f"Scroll sync error: {e}")
-
-    def _sync_selection(self, event):
-        """Synchronizes selection across listboxes."""
-        if self.is_syncing_selection:
-            return
-        self.is_syncing_selection = True
-        try:
-            widget = event.widget
-            selection = widget.curselection()
-            for lb in [self.title_listbox, self.description_listbox, self.priority_listbox, self.deadline_listbox, self.duration_listbox]:
-                lb.select_clear(0, tk.END)
-                if selection:
-                    lb.select_set(selection[0])
-                    lb.see(selection[0])
-            if selection and selection[0] < len(self.task_ids):
-                self.selected_task_id = self.task_ids[selection[0]]
-                self.selected_task_index = selection[0]
-                logger.info(f"Selected task_id={self.selected_task_id}")
-        except Exception as e:
-            logger.exception(f"Selection sync error: {e}")
-        finally:
-            self.is_syncing_selection = False
+    def _on_task_selected(self, task_id, index):
+        """Tracks the task selected in the table."""
+        self.selected_task_id = task_id
+        self.selected_task_index = index
+        logger.info("Selected task_id=%s", self.selected_task_id)
+
+    def _set_loading(self, busy):
+        """Shows a loading indicator while background requests are running."""
+        self.status_label.config(text="Loading..." if busy else "")
+        self.window.config(cursor="watch" if busy else "")
+
+    def _update_listboxes(self, debounce_ms=0):
+        """Refreshes the task table with task data fetched in the background."""
+        logger.info("Updating task table")
+        self.worker.submit(
+            self._fetch_tasks, self.sort_var.get(), self.filter_var.get(), self.search_var.get(),
+            key="tasks", debounce_ms=debounce_ms,
+            on_success=self._populate_table,
+            on_error=lambda e: tkMessageBox.showerror("Error", f"Failed to load tasks: {e}")
+        )
 
-    def _update_listboxes(self):
-        """Refreshes listboxes with task data."""
-        logger.info("Updating listboxes")
+    def _start_remote_poll(self, watching):
+        """Starts checking for other clients' changes; ``watching`` is False if the backend can't report them."""
+        if watching:
+            self._remote_poll = self.window.after(REMOTE_CHANGE_POLL_MS, self._check_remote_changes)
+
+    def _on_remote_change(self, user_id):
+        """Runs on the change listener's thread, so it only flags the change for the main loop."""
+        self._remote_change.set()
+
+    def _check_remote_changes(self):
+        """Refreshes the table if another client changed this user's tasks since the last check."""
+        if self._remote_change.is_set():
+            self._remote_change.clear()
+            logger.info("Tasks changed elsewhere; refreshing")
+            self._update_listboxes()  # the cache already holds the changed rows
+        self._remote_poll = self.window.after(REMOTE_CHANGE_POLL_MS, self._check_remote_changes)
+
+    def _fetch_tasks(self, sort_option, filter_name, search_text):
+        """Runs on the worker: returns (tasks to show, all tasks for deadline alerts)."""
+        if search_text.strip():
+            # Matches come back ranked by relevance, so sort and filter apply only to the full list
+            return (
+                self.task_manager.search_tasks(self.user_id, search_text, SEARCH_RESULT_LIMIT),
+                self.task_manager.get_tasks(self.user_id)
+            )
+        query = TASK_FILTERS[filter_name](TaskQuery.for_sort_option(sort_option), datetime.now())
+        tasks = self.task_manager.get_tasks(self.user_id, sort_option, query)
+        # Alerts cover every task, not just the filtered ones; the unfiltered list is a cache hit
+        all_tasks = self.task_manager.get_tasks(self.user_id) if query.filtered else tasks
+        return tasks, all_tasks
+
+    def _populate_table(self, result):
+        """Applies fetched tasks to the table model and redraws the visible rows."""
         try:
-            self.title_listbox.delete(0, tk.END)
-            self.description_listbox.delete(0, tk.END)
-            self.priority_listbox.delete(0, tk.END)
-            self.deadline_listbox.delete(0, tk.END)
-            self.duration_listbox.delete(0, tk.END)
-            self.task_ids = []
-
-            tasks = self.task_manager.get_tasks(self.user_id, self.sort_var.get())
-            logger.info(f"Fetched {len(tasks)} tasks for user_id={self.user_id}")
+            tasks, all_tasks = result
+            logger.info("Fetched %s tasks for user_id=%s", len(tasks), self.user_id)
             if not isinstance(tasks, (list, tuple)):
-                logger.error(f"Expected list of tasks, got {type(tasks)}: {tasks}")
+                logger.error("Expected list of tasks, got %s: %s", type(tasks), tasks)
                 tasks = []
+            valid_tasks = []
             for task in tasks:
-                if not isinstance(task, (list, tuple)):
-                    logger.error(f"Expected tuple for task, got {type(task)}: {task}")
+                if not isinstance(task, Task):
+                    logger.error("Expected Task, got %s: %s", type(task), task)
                     continue
-                task_id, title, description, priority, deadline_str, duration = task
-                self.task_ids.append(task_id)
-                self.title_listbox.insert(tk.END, title)
-                self.description_listbox.insert(tk.END, description or "")
-                self.priority_listbox.insert(tk.END, priority)
-                self.deadline_listbox.insert(tk.END, deadline_str)
-                self.duration_listbox.insert(tk.END, duration)
+                valid_tasks.append(task)
+
+            self.row_model.update(valid_tasks, self.task_table)
+            self.task_ids = self.row_model.task_ids
+            self.deadline_scheduler.sync(valid_tasks if all_tasks is tasks else all_tasks)
+            index = self.row_model.index_of(self.selected_task_id) if self.selected_task_id is not None else None
+            self.task_table.select_index(index, see=False)
+            if index is None:
+                self.selected_task_id = None
+            self.selected_task_index = index
+            self._update_schedule()  # replans around whatever changed, if the schedule is open
         except Exception as e:
-            logger.exception(f"Error updating listboxes: {e}")
+            logger.exception("Error updating task table: %s", e)
             tkMessageBox.showerror("Error", f"Failed to load tasks: {e}")
 
     def _open_add_task(self):
@@ -430,62 +693,93 @@ class MainWindow:
         try:
             TaskFormWindow(self, self.user_id, self.task_manager)
         except Exception as e:
-            logger.exception(f"Error opening add task form: {e}")
+            logger.exception("Error opening add task form: %s", e)
             tkMessageBox.showerror("Error", f"Failed to open add task form: {e}")
 
     def _open_edit_task(self):
-        """Opens form to edit selected task."""
-        logger.info(f"Opening edit task form for task_id={self.selected_task_id}")
+        """Opens form to edit selected task once it has loaded in the background."""
+        logger.info("Opening edit task form for task_id=%s", self.selected_task_id)
         try:
             self.task_manager.open_edit_task(self, self.user_id, self.selected_task_id)
         except Exception as e:
-            logger.exception(f"Error opening edit task form: {e}")
+            logger.exception("Error opening edit task form: %s", e)
             tkMessageBox.showerror("Error", f"Failed to open edit task form: {e}")
 
     def _delete_task(self):
-        """Deletes selected task."""
-        logger.info(f"Deleting task_id={self.selected_task_id}")
+        """Deletes selected task in the background."""
+        logger.info("Deleting task_id=%s", self.selected_task_id)
         try:
-            self.task_manager.delete_task(self, self.user_id, self.selected_task_id)
-            for lb in [self.title_listbox, self.description_listbox, self.priority_listbox, self.deadline_listbox, self.duration_listbox]:
-                lb.select_clear(0, tk.END)
+            self.task_manager.delete_task(
+                self, self.user_id, self.selected_task_id, on_success=self.task_table.clear_selection
+            )
         except Exception as e:
-            logger.exception(f"Error deleting task: {e}")
+            logger.exception("Error deleting task: %s", e)
             tkMessageBox.showerror("Error", f"Failed to delete task: {e}")
 
+    def _open_schedule(self):
+        """Opens (or raises) the schedule window and plans the user's tasks in the background."""
+        logger.info("Opening schedule")
+        if self.schedule_window is None or not self.schedule_window.exists():
+            self.schedule_window = ScheduleWindow(self.window)
+        self.schedule_window.window.lift()
+        self._update_schedule()
+
+    def _update_schedule(self):
+        """Replans in the background while the schedule window is open."""
+        if self.schedule_window is None or not self.schedule_window.exists():
+            return
+        self.worker.submit(
+            self.task_manager.plan_schedule, self.user_id, key="schedule",
+            on_success=self._show_schedule,
+            on_error=lambda e: tkMessageBox.showerror("Error", f"Failed to plan schedule: {e}")
+        )
+
+    def _show_schedule(self, schedule):
+        if self.schedule_window is not None and self.schedule_window.exists():
+            self.schedule_window.show(schedule)
+
+    def _shutdown(self, wait=False):
+        """Stops the window's timers, change watch and background worker, and closes its child windows.
+
+        Calls already handed to the worker, such as the session revoke, still run; ``wait`` blocks until they have.
+        """
+        self.deadline_scheduler.stop()
+        if self._remote_poll is not None:
+            self.window.after_cancel(self._remote_poll)
+            self._remote_poll = None
+        self.task_manager.unwatch_tasks(self.user_id, self._on_remote_change)
+        self.worker.shutdown(cancel_pending=False, wait=wait)
+        if self.notification_panel is not None and self.notification_panel.exists():
+            self.notification_panel.window.destroy()
+        if self.schedule_window is not None and self.schedule_window.exists():
+            self.schedule_window.window.destroy()
+
     def _logout(self):
         """Logs out user and returns to login screen."""
         logger.info("Logging out")
         try:
+            self.task_manager.logout(self.worker)
+            self._shutdown()
             self.window.withdraw()  # Hide main window
             self.on_logout()
         except Exception as e:
-            logger.exception(f"Logout error: {e}")
+            logger.exception("Logout error: %s", e)
             raise
 
-    def _check_deadline(self):
-        """Checks for overdue or urgent tasks and shows alerts."""
-        try:
-            tasks = self.task_manager.get_tasks(self.user_id, sort_option="By Deadline")
-            now = datetime.now()
-            for task in tasks:
-                task_id, title, description, priority, deadline_str, duration = task
-                try:
-                    deadline_dt = datetime.strptime(deadline_str, "%d/%m/%Y %I:%M %p")
-                    time_left = (deadline_dt - now).total_seconds()
-                    if time_left <= 0:
-                        tkMessageBox.showerror("Overdue", f"{title} is overdue!")
-                    elif time_left < 86400:  # 24 hours
-                        tkMessageBox.showwarning("Urgent", f"{title} is due soon!")
-                except ValueError:
-                    logger.error(f"Invalid deadline format for task_id={task_id}: {deadline_str}")
-        except Exception as e:
-            logger.exception(f"Error checking deadlines: {e}")
-
-    def _start_deadline_check(self):
-        """Schedules periodic deadline checks."""
-        self._check_deadline()
-        self.window.after(60000, self._start_deadline_check)  # Check every 60 seconds
+    def _on_close(self):
+        """Handles main window close button."""
+        logger.info("MainWindow close button clicked")
+        self.window.withdraw()
+        self.task_manager.logout(self.worker)
+        # The service closes once the main loop exits, so let the revoke finish first; nothing is on screen to freeze
+        self._shutdown(wait=True)
+        self.window.quit()
+
+    def _show_deadline_alerts(self, alerts):
+        """Adds a batch of deadline alerts to the notification panel without blocking."""
+        if self.notification_panel is None or not self.notification_panel.exists():
+            self.notification_panel = NotificationPanel(self.window)
+        self.notification_panel.add_alerts(alerts)
 
     def run(self):
         """Starts main window event loop."""
@@ -494,5 +788,5 @@ class MainWindow:
             self.window.update()
             self.window.mainloop()
         except Exception as e:
-            logger.exception(f"MainWindow event loop error: {e}")
+            logger.exception("MainWindow event loop error: %s", e)
             raise
\ No newline at end of file
@@ -0,0 +1,149 @@
+import itertools
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class GuiWorker:
+    """Runs blocking TaskManager/database calls on a thread pool for a Tk window.
+
+    Results are handed back through a queue that is drained on the Tk main loop
+    with ``after()``, so callbacks may touch widgets safely. Calls submitted
+    with a ``key`` are coalesced: a newer call with the same key cancels the
+    older one if it hasn't started, and a stale result that arrives anyway is
+    dropped. ``debounce_ms`` delays the start so a burst of calls (e.g. rapid
+    sort changes) collapses into a single fetch.
+    """
+    def __init__(self, widget, max_workers=4, poll_interval=30, on_busy_change=None):
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self.on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.SimpleQueue()
+        self._generations = itertools.count(1)
+        self._latest = {}  # key -> generation of the newest submitted call
+        self._futures = {}  # key -> future of the newest submitted call
+        self._scheduled = {}  # key -> after() id of a debounced call not yet started
+        self._in_flight = 0
+        self._polling = False
+        self._closed = False
+
+    @property
+    def busy(self):
+        """True while any call is queued, running, or waiting to be delivered."""
+        return self._in_flight > 0 or bool(self._scheduled)
+
+    def submit(self, fn, *args, key=None, on_success=None, on_error=None, debounce_ms=0, **kwargs):
+        """Schedules ``fn(*args, **kwargs)`` off the main loop.
+
+        ``on_success(result)`` or ``on_error(exception)`` is called on the main loop.
+        Must itself be called from the main loop.
+        """
+        if self._closed:
+            return
+        generation = next(self._generations)
+        if key is not None:
+            self._latest[key] = generation
+            previous = self._futures.pop(key, None)
+            if previous is not None:
+                previous.cancel()
+            after_id = self._scheduled.pop(key, None)
+            if after_id is not None:
+                self.widget.after_cancel(after_id)
+        call = (fn, args, kwargs, key, generation, on_success, on_error)
+        if debounce_ms and key is not None:
+            self._scheduled[key] = self.widget.after(debounce_ms, lambda: self._start(call))
+            self._notify_busy()
+        else:
+            self._start(call)
+
+    def cancel(self, key):
+        """Cancels the pending call for ``key`` and ignores its result if already running."""
+        self._latest.pop(key, None)
+        after_id = self._scheduled.pop(key, None)
+        if after_id is not None:
+            self.widget.after_cancel(after_id)
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+        self._notify_busy()
+
+    def shutdown(self, cancel_pending=True, wait=False):
+        """Stops accepting work; results still in flight are discarded.
+
+        With ``cancel_pending`` False, calls already submitted still run, e.g. a
+        fire-and-forget write; ``wait`` blocks until they have finished.
+        """
+        self._closed = True
+        for after_id in self._scheduled.values():
+            try:
+                self.widget.after_cancel(after_id)
+            except Exception:
+                pass
+        self._scheduled.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    def _start(self, call):
+        """Hands a call to the thread pool."""
+        fn, args, kwargs, key, generation, on_success, on_error = call
+        if key is not None:
+            self._scheduled.pop(key, None)
+        if self._closed:
+            return
+        future = self._executor.submit(fn, *args, **kwargs)
+        if key is not None:
+            self._futures[key] = future
+        self._in_flight += 1
+        # Runs on the worker thread (or here, if cancelled); only touches the thread-safe queue
+        future.add_done_callback(lambda f: self._results.put((f, key, generation, on_success, on_error)))
+        self._notify_busy()
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Delivers finished results on the main loop."""
+        if self._closed:
+            self._polling = False
+            return
+        while True:
+            try:
+                future, key, generation, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if key is not None:
+                if self._latest.get(key) != generation:
+                    continue  # superseded by a newer call with the same key
+                self._futures.pop(key, None)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    logger.error("Background call failed: %s", error)
+                    if on_error:
+                        on_error(error)
+                elif on_success:
+                    on_success(future.result())
+            except Exception as e:
+                logger.exception("Error in background call callback: %s", e)
+            if self._closed:
+                # A callback closed the window this worker belongs to
+                self._polling = False
+                return
+        self._notify_busy()
+        if self._in_flight > 0:
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _notify_busy(self):
+        """Reports the loading state to the window."""
+        if self.on_busy_change:
+            try:
+                self.on_busy_change(self.busy)
+            except Exception as e:
+                logger.exception("Error updating loading state: %s", e)
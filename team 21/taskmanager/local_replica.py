@@ -0,0 +1,659 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from time import perf_counter
+import config
+import metrics
+from change_feed import ChangeFeed
+from sqlite_backend import BATCH_SIZE, SQLiteDatabase
+from storage import create_backend
+
+logger = logging.getLogger(__name__)
+
+# Kept next to the task schema in the replica file
+REPLICA_TABLES = [
+    # At most one pending change per task: later local writes fold into it, and inserts and updates send the
+    # row as it is when pushed
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        task_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        op VARCHAR(10) NOT NULL,
+        base_version INTEGER,
+        revision INTEGER NOT NULL DEFAULT 1,
+        queued_at TIMESTAMP NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sync_users (
+        user_id INTEGER PRIMARY KEY,
+        pulled_at TIMESTAMP
+    );
+    """,
+    # Local changes dropped because another client changed or deleted the task on the server first
+    """
+    CREATE TABLE IF NOT EXISTS sync_conflicts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        op VARCHAR(10) NOT NULL,
+        base_version INTEGER,
+        server_version INTEGER,
+        local_row TEXT,
+        detected_at TIMESTAMP NOT NULL
+    );
+    """,
+]
+
+# Columns written when storing a server row, in the order _store_rows passes them
+SERVER_ROW_COLUMNS = (
+    "id, title, description, priority, deadline_str, duration, deadline_datetime, user_id, version, updated_at"
+)
+LOCAL_FIELDS = "title, description, priority, deadline_str, deadline_datetime, duration"
+
+_replicas = {}  # absolute path -> [ReplicaDatabase, number of holders]
+_replicas_lock = threading.Lock()
+
+
+def open_replica(path=None, remote=None):
+    """Returns the process-wide ReplicaDatabase for a file, creating it on first use.
+
+    Two instances on one file would each push the same outbox and duplicate
+    tasks on the server, so storage.create_backend() hands every caller this
+    shared one. Each call takes a reference that close() gives back; the last
+    holder stops syncing. ``remote`` only applies when the file isn't open yet.
+    """
+    path = path or config.REPLICA_PATH
+    if path == ":memory:":
+        return ReplicaDatabase(path, remote)  # private to its instance anyway
+    key = os.path.abspath(path)
+    with _replicas_lock:
+        entry = _replicas.get(key)
+        if entry is None:
+            entry = [ReplicaDatabase(path, remote), 0]
+            entry[0]._shared_key = key
+            _replicas[key] = entry
+        entry[1] += 1
+        return entry[0]
+
+
+def _release_replica(replica):
+    """Drops one reference to a replica from open_replica(). Returns True if the caller should close it."""
+    with _replicas_lock:
+        entry = _replicas.get(replica._shared_key)
+        if entry is None or entry[0] is not replica:
+            return True  # not shared
+        entry[1] -= 1
+        if entry[1] > 0:
+            return False
+        del _replicas[replica._shared_key]
+        return True
+
+
+class ReplicaDatabase(SQLiteDatabase):
+    """Offline-first task storage: a local SQLite copy of the server's tasks, synced in the background.
+
+    Reads are served from the local file, so they don't wait on the network
+    and keep working while the server (``remote``, another backend) is down.
+    Writes go to the local file and, in the same transaction, to an outbox
+    that a background thread pushes to the server; tasks created offline get
+    a temporary negative id until the server assigns theirs. Each push is
+    conditional on the server row still being at the version the change was
+    made against. If another client changed or deleted the task first, the
+    server's copy wins and the dropped change is kept in sync_conflicts. The
+    thread then pulls the rows whose server version differs from the local
+    one, and publishes what changed on change_listener(), so TaskService
+    patches its cache as it does for Postgres notifications.
+
+    Users are cached locally too, so anyone who has logged in on this machine
+    can log in offline. Registering and bulk imports need the server.
+
+    Open it with open_replica() (create_backend does), so a process keeps one
+    instance, and one sync thread, per file. Separate processes shouldn't
+    share a replica file.
+    """
+    name = "replica"
+    _shared_key = None  # set by open_replica()
+
+    def __init__(self, path=None, remote=None):
+        super().__init__(path or config.REPLICA_PATH)
+        self.remote = remote or create_backend(config.REPLICA_REMOTE)
+        self.changes = ChangeFeed()
+        self.online = None  # whether the last sync reached the server; None until one has been tried
+        self._remote_ready = False  # server schema checked
+        self._pulled = set()  # users read since start-up, whose first read may have waited for a pull
+        self._sync_lock = threading.Lock()  # one push/pull pass at a time
+        self._wake_event = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._listening = set()
+
+    def close(self):
+        """Stops syncing, leaving unsent changes in the outbox, and closes both databases.
+
+        A replica from open_replica() only closes once its last holder closes it.
+        """
+        if not _release_replica(self):
+            return
+        self._stopped.set()
+        self._wake_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+        self._thread = None
+        if self._listening:
+            listener = self.remote.change_listener()
+            for user_id in self._listening:
+                listener.unsubscribe(user_id, self._on_remote_change)
+            self._listening.clear()
+        self.changes.close()
+        self.remote.close()
+        super().close()
+
+    def pool_stats(self):
+        return self.remote.pool_stats()
+
+    def change_listener(self):
+        return self.changes
+
+    def migrate(self):
+        """Brings the local schema up to date and starts syncing; the server's is upgraded on the first sync."""
+        version = super().migrate()
+        conn = self._conn()
+        if version is None or conn is None:
+            return None
+        try:
+            with conn:
+                for statement in REPLICA_TABLES:
+                    conn.execute(statement)
+        except sqlite3.Error as e:
+            logger.error("Replica migration failed: %s", e)
+            return None
+        self._start()
+        return version
+
+    def _start(self):
+        if self._thread is None and not self._stopped.is_set():
+            self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        retry_delay = 1.0
+        for user_id in self._synced_users():
+            self._listen(user_id)
+        while not self._stopped.is_set():
+            self._wake_event.clear()
+            if self.sync_now():
+                retry_delay = 1.0
+                delay = config.SYNC_INTERVAL
+            else:
+                delay = retry_delay
+                retry_delay = min(retry_delay * 2, config.SYNC_MAX_BACKOFF)
+            self._wake_event.wait(delay)
+
+    def _wake(self):
+        """Syncs soon; while offline the retry schedule decides instead."""
+        if self.online is not False:
+            self._wake_event.set()
+
+    def _listen(self, user_id):
+        """Pulls as soon as the server notifies a change to the user's tasks, if it can."""
+        listener = self.remote.change_listener()
+        if listener is not None and user_id not in self._listening:
+            self._listening.add(user_id)
+            listener.subscribe(user_id, self._on_remote_change, timeout=0)
+
+    def _on_remote_change(self, user_id, changes):
+        self._wake_event.set()
+
+    def sync_now(self):
+        """Pushes queued local changes, then pulls the server's. Returns True if the server was reachable."""
+        publications = []
+        with self._sync_lock:
+            try:
+                ok = self._sync(lambda user_id, changes: publications.append((user_id, changes)))
+            except sqlite3.Error as e:
+                logger.error("Replica sync failed: %s", e)
+                ok = False
+        if ok != self.online:
+            logger.info("Replica %s", "connected to the server" if ok else "offline; serving local data")
+        self.online = ok
+        for user_id, changes in publications:
+            self.changes.publish(user_id, changes)
+        return ok
+
+    def _sync(self, publish):
+        if not self._prepare_remote():
+            metrics.SYNC_FAILURES.inc(1, "connect")
+            return False
+        start = perf_counter()
+        pushed = self._push(publish)
+        metrics.SYNC_SECONDS.observe(perf_counter() - start, "push")
+        if not pushed:
+            metrics.SYNC_FAILURES.inc(1, "push")
+            return False
+        for user_id in self._synced_users():
+            start = perf_counter()
+            pulled = self._pull(user_id, publish)
+            metrics.SYNC_SECONDS.observe(perf_counter() - start, "pull")
+            if not pulled:
+                metrics.SYNC_FAILURES.inc(1, "pull")
+                return False
+        return True
+
+    def _prepare_remote(self):
+        if not self._remote_ready:
+            self._remote_ready = self.remote.migrate() is not None
+        return self._remote_ready
+
+    def _synced_users(self):
+        conn = self._conn()
+        if conn is None:
+            return []
+        return [row[0] for row in conn.execute("SELECT user_id FROM sync_users;").fetchall()]
+
+    def _push(self, publish):
+        """Sends the outbox to the server, oldest first. Returns False if the server couldn't be reached."""
+        conn = self._conn()
+        entries = conn.execute(
+            "SELECT task_id, user_id, op, base_version, revision, queued_at FROM outbox ORDER BY queued_at, task_id;"
+        ).fetchall()
+        metrics.SYNC_PENDING.set(len(entries))
+        for task_id, user_id, op, base_version, revision, queued_at in entries:
+            if self._stopped.is_set():
+                return True
+            if op == "delete":
+                result = self.remote.delete_task_at_version(task_id, user_id, base_version)
+                fields = None
+            else:
+                fields = conn.execute(f"SELECT {LOCAL_FIELDS} FROM tasks WHERE id = ?;", (task_id,)).fetchone()
+                if fields is None:
+                    continue  # deleted since the outbox was read; the entry is a delete now
+                if op == "insert":
+                    result = self.remote.insert_task(*fields, user_id)
+                else:
+                    result = self.remote.update_task_at_version(task_id, *fields, user_id, base_version)
+            if result is None:
+                return False
+            if result is False:
+                if not self._resolve_conflict(conn, task_id, user_id, op, base_version, fields, publish):
+                    return False
+                continue
+            with conn:
+                if op == "insert":
+                    self._finish_insert(conn, task_id, result, user_id, revision)
+                    publish(user_id, [("delete", task_id), ("insert", result)])
+                elif op == "update":
+                    self._finish_update(conn, task_id, result, revision)
+                else:
+                    conn.execute("DELETE FROM outbox WHERE task_id = ?;", (task_id,))
+            metrics.SYNC_CHANGES.inc(1, "push", "applied")
+            metrics.SYNC_LAG_SECONDS.observe(max(0.0, (datetime.now() - queued_at).total_seconds()), "push")
+        metrics.SYNC_PENDING.set(conn.execute("SELECT COUNT(*) FROM outbox;").fetchone()[0])
+        return True
+
+    @staticmethod
+    def _finish_insert(conn, task_id, new_id, user_id, revision):
+        """Moves a pushed task from its temporary id to the server's."""
+        entry = conn.execute("SELECT revision FROM outbox WHERE task_id = ?;", (task_id,)).fetchone()
+        conn.execute("UPDATE tasks SET id = ?, version = 1 WHERE id = ?;", (new_id, task_id))
+        if entry is None:
+            # Deleted locally while being sent, which dropped the insert: delete the server's copy too
+            conn.execute(
+                "INSERT INTO outbox (task_id, user_id, op, base_version, queued_at) VALUES (?, ?, 'delete', 1, ?);",
+                (new_id, user_id, datetime.now())
+            )
+        elif entry[0] == revision:
+            conn.execute("DELETE FROM outbox WHERE task_id = ?;", (task_id,))
+        else:
+            # Edited while being sent: the newer fields go out as an update of the server's version 1
+            conn.execute(
+                "UPDATE outbox SET task_id = ?, op = 'update', base_version = 1 WHERE task_id = ?;", (new_id, task_id)
+            )
+
+    @staticmethod
+    def _finish_update(conn, task_id, version, revision):
+        conn.execute("UPDATE tasks SET version = ? WHERE id = ?;", (version, task_id))
+        # A change made while this one was being sent stays queued, now against the version just written
+        conn.execute("DELETE FROM outbox WHERE task_id = ? AND revision = ?;", (task_id, revision))
+        conn.execute("UPDATE outbox SET base_version = ? WHERE task_id = ?;", (version, task_id))
+
+    def _resolve_conflict(self, conn, task_id, user_id, op, base_version, fields, publish):
+        """The server's copy wins: records the dropped local change and takes the server's row (or its absence).
+
+        Returns False if the server couldn't be reached to find out what it holds.
+        """
+        rows = self.remote.fetch_versioned_tasks(user_id, [task_id])
+        if rows is None:
+            return False
+        server = rows[0] if rows else None
+        with conn:
+            conn.execute("DELETE FROM outbox WHERE task_id = ?;", (task_id,))
+            if server is None and op == "delete":
+                return True  # deleted on both sides
+            local_row = json.dumps(dict(zip(LOCAL_FIELDS.split(", "), fields)), default=str) if fields else None
+            conn.execute("""
+                INSERT INTO sync_conflicts (task_id, user_id, op, base_version, server_version, local_row, detected_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+            """, (task_id, user_id, op, base_version, server[1] if server else None, local_row, datetime.now()))
+            if server is None:
+                conn.execute("DELETE FROM tasks WHERE id = ?;", (task_id,))
+            else:
+                self._store_rows(conn, user_id, [server])
+        logger.warning(
+            "Sync conflict on task_id=%s: the server %s it first; local %s dropped",
+            task_id, "deleted" if server is None else "changed", op
+        )
+        metrics.SYNC_CHANGES.inc(1, "push", "conflict")
+        publish(user_id, [("delete" if server is None else "update", task_id)])
+        return True
+
+    def _pull(self, user_id, publish):
+        """Takes the server's changes to a user's tasks. Returns False if the server couldn't be reached.
+
+        Only ids and versions are compared for the whole list; rows are fetched
+        for the ids whose version differs. Tasks with a queued local change are
+        left alone until it has been pushed.
+        """
+        versions = self.remote.fetch_task_versions(user_id)
+        if versions is None:
+            return False
+        conn = self._conn()
+        local = dict(conn.execute("SELECT id, version FROM tasks WHERE user_id = ?;", (user_id,)).fetchall())
+        pending = {row[0] for row in conn.execute("SELECT task_id FROM outbox WHERE user_id = ?;", (user_id,))}
+        changed = [
+            task_id for task_id, version in versions.items() if local.get(task_id) != version and task_id not in pending
+        ]
+        gone = [task_id for task_id in local if task_id > 0 and task_id not in versions and task_id not in pending]
+        rows = []
+        for start in range(0, len(changed), BATCH_SIZE):
+            batch = self.remote.fetch_versioned_tasks(user_id, changed[start:start + BATCH_SIZE])
+            if batch is None:
+                return False
+            rows.extend(batch)
+        previous = conn.execute("SELECT pulled_at FROM sync_users WHERE user_id = ?;", (user_id,)).fetchone()
+        now = datetime.now()
+        with conn:
+            self._store_rows(conn, user_id, rows)
+            for start in range(0, len(gone), BATCH_SIZE):
+                chunk = gone[start:start + BATCH_SIZE]
+                conn.execute(
+                    f"DELETE FROM tasks WHERE id IN ({', '.join('?' * len(chunk))}) "
+                    f"AND id NOT IN (SELECT task_id FROM outbox);",
+                    chunk
+                )
+            conn.execute("""
+                INSERT INTO sync_users (user_id, pulled_at) VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET pulled_at = excluded.pulled_at;
+            """, (user_id, now))
+        if not rows and not gone:
+            return True
+        metrics.SYNC_CHANGES.inc(len(rows) + len(gone), "pull", "applied")
+        if previous is not None and previous[0] is not None:
+            # Lag is only meaningful for changes made since the last pull, not for a first full copy
+            for _, _, updated_at in rows:
+                if updated_at is not None:
+                    metrics.SYNC_LAG_SECONDS.observe(max(0.0, (now - updated_at).total_seconds()), "pull")
+        publish(user_id, [("update", task.id) for task, _, _ in rows] + [("delete", task_id) for task_id in gone])
+        return True
+
+    @staticmethod
+    def _store_rows(conn, user_id, rows):
+        """Writes ``(task, version, updated_at)`` rows from the server, skipping tasks with a queued local change."""
+        conn.executemany(f"""
+            INSERT INTO tasks ({SERVER_ROW_COLUMNS})
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM outbox WHERE task_id = ?)
+            ON CONFLICT (id) DO UPDATE SET
+                title = excluded.title, description = excluded.description, priority = excluded.priority,
+                deadline_str = excluded.deadline_str, duration = excluded.duration,
+                deadline_datetime = excluded.deadline_datetime, version = excluded.version,
+                updated_at = excluded.updated_at;
+        """, [
+            (task.id, task.title, task.description, task.priority, task.deadline_str, task.duration,
+             task.deadline_datetime, user_id, version, updated_at, task.id)
+            for task, version, updated_at in rows
+        ])
+
+    def _ensure_pulled(self, user_id):
+        """Pulls a user's tasks before their first read if this replica has never had them.
+
+        Later reads, and reads by users pulled in an earlier run, are served
+        from the local file straight away while the background sync catches up.
+        """
+        if user_id in self._pulled:
+            return
+        with self._sync_lock:
+            if user_id in self._pulled:
+                return
+            self._pulled.add(user_id)
+            conn = self._conn()
+            if conn is None:
+                return
+            try:
+                row = conn.execute("SELECT pulled_at FROM sync_users WHERE user_id = ?;", (user_id,)).fetchone()
+                if row is None:
+                    with conn:
+                        conn.execute("INSERT INTO sync_users (user_id) VALUES (?);", (user_id,))
+                if (row is None or row[0] is None) and self.online is not False and self._prepare_remote():
+                    # The caller reads the result itself, so there is nothing to publish
+                    self._pull(user_id, lambda user_id, changes: None)
+            except sqlite3.Error as e:
+                logger.error("Initial pull failed for user_id=%s: %s", user_id, e)
+        self._listen(user_id)
+
+    def _queue(self, conn, task_id, user_id, op, base_version, now):
+        """Folds a local write into the task's outbox entry; runs in the write's transaction."""
+        entry = conn.execute("SELECT op FROM outbox WHERE task_id = ?;", (task_id,)).fetchone()
+        if entry is None:
+            conn.execute(
+                "INSERT INTO outbox (task_id, user_id, op, base_version, queued_at) VALUES (?, ?, ?, ?, ?);",
+                (task_id, user_id, op, base_version, now)
+            )
+        elif op == "delete" and entry[0] == "insert":
+            conn.execute("DELETE FROM outbox WHERE task_id = ?;", (task_id,))  # never reached the server
+        else:
+            # An insert or update sends the row as it is when pushed, so only a delete changes the entry
+            conn.execute(
+                "UPDATE outbox SET op = ?, revision = revision + 1 WHERE task_id = ?;",
+                ("delete" if op == "delete" else entry[0], task_id)
+            )
+
+    def sync_status(self):
+        """Returns ``{"online", "pending", "conflicts", "last_pull"}``; online is None before the first sync."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            pending, conflicts, last_pull = conn.execute("""
+                SELECT (SELECT COUNT(*) FROM outbox), (SELECT COUNT(*) FROM sync_conflicts),
+                       (SELECT MAX(pulled_at) FROM sync_users);
+            """).fetchone()
+            if last_pull is not None:
+                last_pull = datetime.fromisoformat(last_pull)  # MAX() drops the column's TIMESTAMP type
+            return {"online": self.online, "pending": pending, "conflicts": conflicts, "last_pull": last_pull}
+        except sqlite3.Error as e:
+            logger.error("Sync status failed: %s", e)
+            return None
+
+    def fetch_sync_conflicts(self, user_id, limit=50):
+        """Returns the user's most recent conflicts as dicts, newest first; ``local`` holds the dropped fields."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            rows = conn.execute("""
+                SELECT task_id, op, base_version, server_version, local_row, detected_at FROM sync_conflicts
+                WHERE user_id = ? ORDER BY id DESC LIMIT ?;
+            """, (user_id, limit)).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Fetch sync conflicts failed: %s", e)
+            return None
+        return [
+            {
+                "task_id": task_id, "op": op, "base_version": base_version, "server_version": server_version,
+                "local": json.loads(local_row) if local_row else None, "detected_at": detected_at,
+            }
+            for task_id, op, base_version, server_version, local_row, detected_at in rows
+        ]
+
+    def insert_user(self, username, password_hash):
+        """Registers the user on the server, which assigns the id, and caches them locally. Needs the server."""
+        user_id = self.remote.insert_user(username, password_hash)
+        if user_id:
+            self._cache_user(user_id, username, password_hash)
+        return user_id
+
+    def fetch_user(self, username):
+        """Looks the user up on the server, so a password changed elsewhere applies, or locally while offline."""
+        if self.online is not False:
+            user = self.remote.fetch_user(username)
+            if user is not None:
+                self._cache_user(user.id, user.username, user.password_hash)
+                return user
+        return super().fetch_user(username)
+
+    def update_user_password(self, user_id, password_hash):
+        """Replaces the hash on the server and in the local copy; False while offline."""
+        if not self.remote.update_user_password(user_id, password_hash):
+            return False
+        return super().update_user_password(user_id, password_hash)
+
+    def _cache_user(self, user_id, username, password_hash):
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO users (id, username, password) VALUES (?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET username = excluded.username, password = excluded.password;
+                """, (user_id, username, password_hash))
+        except sqlite3.Error as e:
+            logger.warning("Could not cache user_id=%s locally: %s", user_id, e)
+
+    def insert_task(self, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Inserts a task locally under a temporary negative id and queues it for the server."""
+        task_ids = self.insert_tasks([(title, description, priority, deadline_str, deadline_datetime, duration)], user_id)
+        return task_ids[0] if task_ids else None
+
+    def update_task(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Updates a task locally and queues the change for the server."""
+        results = self.update_tasks(
+            [(task_id, title, description, priority, deadline_str, deadline_datetime, duration)], user_id
+        )
+        return bool(results and results[0])
+
+    def delete_task(self, task_id, user_id):
+        """Deletes a task locally and queues the deletion for the server."""
+        results = self.delete_tasks([task_id], user_id)
+        return bool(results and results[0])
+
+    def insert_tasks(self, tasks, user_id):
+        """Inserts tasks locally in one transaction, queueing each for the server; returns the temporary ids."""
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        now = datetime.now()
+        try:
+            task_ids = []
+            with conn:
+                for task in tasks:
+                    # Temporary ids count down from -1 so they can't collide with the server's
+                    task_id = conn.execute(f"""
+                        INSERT INTO tasks (id, {LOCAL_FIELDS}, user_id, version, updated_at)
+                        VALUES (min(coalesce((SELECT id FROM tasks ORDER BY id LIMIT 1), 0), 0) - 1,
+                                ?, ?, ?, ?, ?, ?, ?, 0, ?)
+                        RETURNING id;
+                    """, tuple(task) + (user_id, now)).fetchone()[0]
+                    self._queue(conn, task_id, user_id, "insert", None, now)
+                    task_ids.append(task_id)
+            logger.debug("Queued %s new tasks for user_id=%s", len(task_ids), user_id)
+            self._wake()
+            return task_ids
+        except sqlite3.Error as e:
+            logger.error("Insert tasks failed: %s", e)
+            return None
+
+    def update_tasks(self, tasks, user_id):
+        """Updates tasks locally in one transaction, queueing each change; returns one bool per task."""
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        now = datetime.now()
+        try:
+            results = []
+            with conn:
+                for task_id, title, description, priority, deadline_str, deadline_datetime, duration in tasks:
+                    row = conn.execute("""
+                        UPDATE tasks
+                        SET title = ?, description = ?, priority = ?, deadline_str = ?,
+                            deadline_datetime = ?, duration = ?, updated_at = ?
+                        WHERE id = ? AND user_id = ?
+                        RETURNING version;
+                    """, (
+                        title, description, priority, deadline_str, deadline_datetime, duration, now, task_id, user_id
+                    )).fetchone()
+                    if row is not None:
+                        self._queue(conn, task_id, user_id, "update", row[0], now)
+                    results.append(row is not None)
+            self._wake()
+            return results
+        except sqlite3.Error as e:
+            logger.error("Update tasks failed: %s", e)
+            return None
+
+    def delete_tasks(self, task_ids, user_id):
+        """Deletes tasks locally in one transaction, queueing each deletion; returns one bool per id."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        now = datetime.now()
+        try:
+            results = []
+            with conn:
+                for task_id in task_ids:
+                    row = conn.execute(
+                        "DELETE FROM tasks WHERE id = ? AND user_id = ? RETURNING version;", (task_id, user_id)
+                    ).fetchone()
+                    if row is not None:
+                        self._queue(conn, task_id, user_id, "delete", row[0], now)
+                    results.append(row is not None)
+            self._wake()
+            return results
+        except sqlite3.Error as e:
+            logger.error("Delete tasks failed: %s", e)
+            return None
+
+    def copy_tasks_in(self, stream):
+        """Bulk imports go straight to the server (None while offline); the rows arrive with the next pull."""
+        count = self.remote.copy_tasks_in(stream)
+        if count is not None:
+            self._wake_event.set()
+        return count
+
+    def query_tasks(self, user_id, query):
+        self._ensure_pulled(user_id)
+        return super().query_tasks(user_id, query)
+
+    def fetch_all_tasks(self, user_id):
+        self._ensure_pulled(user_id)
+        return super().fetch_all_tasks(user_id)
+
+    def fetch_tasks_by_ids(self, user_id, task_ids):
+        self._ensure_pulled(user_id)
+        return super().fetch_tasks_by_ids(user_id, task_ids)
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        self._ensure_pulled(user_id)
+        yield from super().iter_tasks(user_id, sort_option, batch_size)
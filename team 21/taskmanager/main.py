@@ -1,11 +1,14 @@
 import tkinter as tk
+from errors import TaskManagerError
 from gui import LoginWindow, MainWindow
+from task_service import TaskService
 import logging
+import config
 
 # Configure logging
 # Set to INFO for production; change to DEBUG for detailed debugging
 logging.basicConfig(
-    level=logging.INFO,
+    level=config.LOG_LEVEL,
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[logging.StreamHandler()]
 )
@@ -14,6 +17,12 @@ logger = logging.getLogger(__name__)
 def main():
     """Entry point for the task manager application."""
     logger.info("Starting application")
+    # One service for every window, so they share its connection pool and task cache
+    service = TaskService()
+    try:
+        service.start()
+    except TaskManagerError as e:
+        logger.error("Task service unavailable: %s", e)
     try:
         root = tk.Tk()
         root.withdraw()  # Hide the root window
@@ -21,16 +30,16 @@ def main():
         def on_logout():
             """Callback for logout, restarts login window."""
             logger.info("User logged out")
-            login_window = LoginWindow(root, on_success)
+            login_window = LoginWindow(root, service, on_success)
             login_window.run()
 
-        def on_success(user_id):
-            """Callback for successful login/register."""
-            logger.info(f"Login success for user_id={user_id}")
-            main_window = MainWindow(root, user_id, on_logout)
+        def on_success(user_id, task_manager):
+            """Callback for successful login/register; ``task_manager`` holds the new session."""
+            logger.info("Login success for user_id=%s", user_id)
+            main_window = MainWindow(root, task_manager, user_id, on_logout)
             main_window.run()
 
-        login_window = LoginWindow(root, on_success)
+        login_window = LoginWindow(root, service, on_success)
         login_window.run()
         try:
             root.destroy()
@@ -38,8 +47,10 @@ def main():
             logger.info("Root already destroyed")
         logger.info("Application exited")
     except Exception as e:
-        logger.exception(f"Application error: {e}")
+        logger.exception("Application error: %s", e)
         raise
+    finally:
+        service.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,448 @@
+import inspect
+import json
+import math
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+import config
+
+# Upper bounds in seconds; everything slower lands in the +Inf bucket
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Replication delays run from well under a second (online) to hours (a laptop offline overnight)
+SYNC_LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 21600.0, 86400.0)
+
+# (backend, operation) of the storage call running in this thread or asyncio task
+_current = ContextVar("taskmanager_db_operation", default=None)
+_UNATTRIBUTED = ("unknown", "other")
+
+
+class Counter:
+    """Monotonic counter, one value per combination of label values."""
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        """Returns ``[(labels, {"value": n})]``."""
+        with self._lock:
+            return [(labels, {"value": value}) for labels, value in sorted(self._values.items())]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Current value that can go up and down, one per combination of label values."""
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Fixed-bucket histogram with a count and sum per combination of label values."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def quantile(self, q, *labels):
+        """Estimates the ``q`` quantile by linear interpolation inside its bucket, like Prometheus does."""
+        series = self._series.get(labels)
+        return _quantile(self.buckets, series[:-1], q) if series else None
+
+    def samples(self):
+        """Returns ``[(labels, {"count", "sum", "buckets", "p50", "p95", "p99"})]``."""
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        samples = []
+        for labels, series in items:
+            counts = series[:-1]
+            sample = {"count": sum(counts), "sum": series[-1], "buckets": counts}
+            for q in QUANTILES:
+                sample[f"p{round(q * 100)}"] = _quantile(self.buckets, counts, q)
+            samples.append((labels, sample))
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _quantile(bounds, counts, q):
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if index == len(bounds):
+                return bounds[-1]  # +Inf bucket: the best answer is its lower bound
+            lower = bounds[index - 1] if index else 0.0
+            return lower + (bounds[index] - lower) * (rank - seen) / count
+        seen += count
+    return bounds[-1]
+
+
+class MetricsRegistry:
+    """In-process collection of named metrics with text, JSON and Prometheus dumps."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif type(metric) is not metric_class:
+                raise ValueError(f"Metric {name!r} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        """Returns the counter called ``name``, creating it on first use."""
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        """Returns the gauge called ``name``, creating it on first use."""
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        """Returns the histogram called ``name``, creating it on first use."""
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        """Zeroes every metric (for benchmarks)."""
+        for metric in self.metrics():
+            metric.clear()
+
+    def snapshot(self):
+        """Returns every metric as plain data: ``{name: {"type", "help", "samples": [...]}}``."""
+        return {
+            metric.name: {
+                "type": metric.kind,
+                "help": metric.help,
+                "samples": [
+                    dict(labels=dict(zip(metric.labelnames, labels)), **values) for labels, values in metric.samples()
+                ],
+            }
+            for metric in self.metrics()
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_text(self):
+        """Human-readable dump: one line per series, latencies in milliseconds."""
+        lines = []
+        for metric in self.metrics():
+            for labels, values in metric.samples():
+                series = metric.name + _format_labels(metric.labelnames, labels)
+                if metric.kind != "histogram":
+                    lines.append(f"{series} {values['value']}")
+                    continue
+                quantiles = " ".join(
+                    f"p{round(q * 100)}={_ms(values[f'p{round(q * 100)}'])}" for q in QUANTILES
+                )
+                lines.append(f"{series} count={values['count']} total={values['sum'] * 1000:.1f}ms {quantiles}")
+        return "\n".join(lines) + "\n"
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, values in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, labels)} {values['value']}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), values["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    bucket_labels = _format_labels(metric.labelnames + ("le",), labels + (le,))
+                    lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                series_labels = _format_labels(metric.labelnames, labels)
+                lines.append(f"{metric.name}_sum{series_labels} {values['sum']!r}")
+                lines.append(f"{metric.name}_count{series_labels} {values['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}ms"
+
+
+REGISTRY = MetricsRegistry()
+
+DB_OPERATION_SECONDS = REGISTRY.histogram(
+    "taskmanager_db_operation_seconds", "Storage backend call latency", ("backend", "operation")
+)
+DB_PHASE_SECONDS = REGISTRY.histogram(
+    "taskmanager_db_phase_seconds", "Time spent connecting, executing, fetching and committing",
+    ("backend", "operation", "phase")
+)
+DB_ROWS = REGISTRY.counter("taskmanager_db_rows_total", "Rows fetched or changed", ("backend", "operation"))
+DB_ERRORS = REGISTRY.counter(
+    "taskmanager_db_errors_total", "Driver errors and exceptions from storage calls", ("backend", "operation", "phase")
+)
+DB_POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "taskmanager_db_pool_wait_seconds", "Time spent waiting for a pooled connection", ("backend",)
+)
+SERVICE_OPERATION_SECONDS = REGISTRY.histogram(
+    "taskmanager_service_operation_seconds", "TaskService call latency, including cache hits", ("operation",)
+)
+SERVICE_ERRORS = REGISTRY.counter(
+    "taskmanager_service_errors_total", "Exceptions raised by TaskService calls", ("operation", "error")
+)
+SYNC_CHANGES = REGISTRY.counter(
+    "taskmanager_sync_changes_total", "Task changes the replica pushed to or pulled from the server",
+    ("direction", "result")
+)
+SYNC_SECONDS = REGISTRY.histogram("taskmanager_sync_seconds", "Duration of replica push and pull passes", ("phase",))
+SYNC_FAILURES = REGISTRY.counter(
+    "taskmanager_sync_failures_total", "Replica sync passes that couldn't reach the server", ("phase",)
+)
+SYNC_LAG_SECONDS = REGISTRY.histogram(
+    "taskmanager_sync_lag_seconds", "Time from a task change to it reaching the other side of the replica",
+    ("direction",), SYNC_LAG_BUCKETS
+)
+SYNC_PENDING = REGISTRY.gauge("taskmanager_sync_pending_changes", "Local changes waiting in the replica outbox")
+
+
+def record_phase(phase, seconds):
+    """Adds a connect/execute/fetch/commit timing to the storage call in progress."""
+    backend, operation = _current.get() or _UNATTRIBUTED
+    DB_PHASE_SECONDS.observe(seconds, backend, operation, phase)
+
+
+def record_error(phase):
+    backend, operation = _current.get() or _UNATTRIBUTED
+    DB_ERRORS.inc(1, backend, operation, phase)
+
+
+def count_rows(count):
+    if count > 0:
+        DB_ROWS.inc(count, *(_current.get() or _UNATTRIBUTED))
+
+
+def record_pool_wait(seconds):
+    DB_POOL_WAIT_SECONDS.observe(seconds, (_current.get() or _UNATTRIBUTED)[0])
+
+
+def timed_call(phase, fn, *args):
+    """Calls ``fn(*args)``, recording its latency (and any exception) under ``phase``."""
+    start = perf_counter()
+    try:
+        return fn(*args)
+    except Exception:
+        record_error(phase)
+        raise
+    finally:
+        record_phase(phase, perf_counter() - start)
+
+
+async def timed_await(phase, awaitable):
+    """Awaits ``awaitable``, recording its latency (and any exception) under ``phase``."""
+    start = perf_counter()
+    try:
+        return await awaitable
+    except Exception:
+        record_error(phase)
+        raise
+    finally:
+        record_phase(phase, perf_counter() - start)
+
+
+def db_operation(method):
+    """Times a storage backend method under ``(self.name, method name)``.
+
+    Driver phases recorded while it runs are attributed to it. A call made from
+    inside another timed call (fetch_tasks -> query_tasks) counts towards the outer
+    one only. Works for plain, generator, coroutine and async generator methods.
+    """
+    if not config.METRICS_ENABLED:
+        return method
+    operation = method.__name__
+    if inspect.isasyncgenfunction(method):
+        return _wrap_async_generator(method, operation)
+    if inspect.iscoroutinefunction(method):
+        return _wrap_coroutine(method, operation)
+    if inspect.isgeneratorfunction(method):
+        return _wrap_generator(method, operation)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if _current.get() is not None:
+            return method(self, *args, **kwargs)
+        token = _current.set((self.name, operation))
+        start = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            record_error("call")
+            raise
+        finally:
+            DB_OPERATION_SECONDS.observe(perf_counter() - start, self.name, operation)
+            _current.reset(token)
+    return wrapper
+
+
+def _wrap_coroutine(method, operation):
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if _current.get() is not None:
+            return await method(self, *args, **kwargs)
+        token = _current.set((self.name, operation))
+        start = perf_counter()
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception:
+            record_error("call")
+            raise
+        finally:
+            DB_OPERATION_SECONDS.observe(perf_counter() - start, self.name, operation)
+            _current.reset(token)
+    return wrapper
+
+
+def _wrap_generator(method, operation):
+    # The label is set only while the generator runs, so it doesn't leak into the caller between items
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if _current.get() is not None:
+            yield from method(self, *args, **kwargs)
+            return
+        label = (self.name, operation)
+        generator = method(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            while True:
+                token = _current.set(label)
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield item
+        finally:
+            generator.close()
+            DB_OPERATION_SECONDS.observe(perf_counter() - start, self.name, operation)
+    return wrapper
+
+
+def _wrap_async_generator(method, operation):
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if _current.get() is not None:
+            async for item in method(self, *args, **kwargs):
+                yield item
+            return
+        label = (self.name, operation)
+        generator = method(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            while True:
+                token = _current.set(label)
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield item
+        finally:
+            await generator.aclose()
+            DB_OPERATION_SECONDS.observe(perf_counter() - start, self.name, operation)
+    return wrapper
+
+
+def instrument_backend(cls, skip=("connect", "close", "pool_stats", "change_listener", "sync_now", "sync_status")):
+    """Wraps every public method defined on ``cls`` with db_operation."""
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or name in skip or not inspect.isfunction(value):
+            continue
+        setattr(cls, name, db_operation(value))
+    return cls
+
+
+def service_operation(method):
+    """Times a TaskService-style method and counts the exceptions it raises, by class name."""
+    if not config.METRICS_ENABLED:
+        return method
+    operation = method.__name__
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception as e:
+                SERVICE_ERRORS.inc(1, operation, type(e).__name__)
+                raise
+            finally:
+                SERVICE_OPERATION_SECONDS.observe(perf_counter() - start, operation)
+        return async_wrapper
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        except Exception as e:
+            SERVICE_ERRORS.inc(1, operation, type(e).__name__)
+            raise
+        finally:
+            SERVICE_OPERATION_SECONDS.observe(perf_counter() - start, operation)
+    return wrapper
@@ -0,0 +1,309 @@
+import itertools
+import logging
+import re
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Must match the expression used in ORDER BY exactly, or the planner won't use the index
+PRIORITY_RANK_SQL = "CASE priority WHEN 'High' THEN 1 WHEN 'Medium' THEN 2 WHEN 'Low' THEN 3 END"
+
+# Text search configuration; "simple" skips stemming so prefix queries match what was typed
+SEARCH_CONFIG = "simple"
+
+# Arbitrary constant key so concurrent app instances don't apply migrations twice
+MIGRATION_LOCK_ID = 0x7A5C
+
+# Length of users.username, which renames during migration must fit in
+USERNAME_MAX_LENGTH = 255
+
+# A migration statement worked out in Python: the rows ``query`` returns go to ``plan``, and ``update`` runs once
+# for each parameter tuple it returns. SQL uses %s placeholders; each runner converts them to its own style.
+DataStep = namedtuple("DataStep", "query plan update")
+
+
+def rename_duplicate_usernames(users):
+    """Plans renames that make (id, username) rows unique ignoring case.
+
+    The lowest id keeps each name. Later duplicates become "name#<id>", or
+    "name#<id>-2", "-3", ... while that is taken too, with the name shortened
+    to fit USERNAME_MAX_LENGTH. Each rename is logged so the user can be told
+    their new login. Returns (new username, id) tuples.
+    """
+    users = sorted(users)
+    taken = {username.lower() for _, username in users}
+    owners = {}
+    renames = []
+    for user_id, username in users:
+        if owners.setdefault(username.lower(), user_id) == user_id:
+            continue
+        for attempt in itertools.count(1):
+            suffix = f"#{user_id}" if attempt == 1 else f"#{user_id}-{attempt}"
+            candidate = username[:USERNAME_MAX_LENGTH - len(suffix)] + suffix
+            if candidate.lower() not in taken:
+                break
+        taken.add(candidate.lower())
+        renames.append((candidate, user_id))
+        logger.warning(
+            "Renaming user_id=%s from %r to %r: the name is taken ignoring case", user_id, username, candidate
+        )
+    return renames
+
+
+# Login names made unique ignoring case, ahead of the unique index on lower(username)
+DEDUPLICATE_USERNAMES = DataStep(
+    "SELECT id, username FROM users;", rename_duplicate_usernames, "UPDATE users SET username = %s WHERE id = %s;"
+)
+
+# Ordered (version, description, statements). Never edit a released step; append a new one.
+MIGRATIONS = [
+    (1, "Create users and tasks tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(255) NOT NULL,
+            password VARCHAR(255) NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            priority VARCHAR(10) NOT NULL,
+            deadline_str VARCHAR(50) NOT NULL,
+            deadline_datetime TIMESTAMP NOT NULL,
+            duration INTEGER NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
+        );
+        """,
+    ]),
+    (2, "Index login and task list queries", [
+        "CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_deadline ON tasks (user_id, deadline_datetime, id);",
+        f"CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, ({PRIORITY_RANK_SQL}), deadline_datetime, id);",
+    ]),
+    (3, "Full-text search over task titles and descriptions", [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector;",
+        f"""
+        CREATE OR REPLACE FUNCTION tasks_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS tasks_search_vector_trigger ON tasks;",
+        """
+        CREATE TRIGGER tasks_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON tasks
+        FOR EACH ROW EXECUTE PROCEDURE tasks_search_vector_update();
+        """,
+        f"""
+        UPDATE tasks SET search_vector =
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B');
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_search ON tasks USING GIN (search_vector);",
+    ]),
+    (4, "Persisted login sessions", [
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id CHAR(64) PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            expires_at TIMESTAMP NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);",
+    ]),
+    (5, "Case-insensitive unique usernames", [
+        # Older duplicates keep working under a new name: the first account keeps "name", later ones become "name#<id>"
+        DEDUPLICATE_USERNAMES,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_lower ON users (lower(username));",
+        "DROP INDEX IF EXISTS idx_users_username;",
+    ]),
+    (6, "Notify clients of task changes", [
+        # Channel per user (see change_listener.py); the payload carries only the id, as NOTIFY is capped at 8000 bytes
+        """
+        CREATE OR REPLACE FUNCTION tasks_notify_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('task_changes_' || OLD.user_id, json_build_object('op', 'delete', 'id', OLD.id)::text);
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'UPDATE' AND OLD.user_id <> NEW.user_id THEN
+                PERFORM pg_notify('task_changes_' || OLD.user_id, json_build_object('op', 'delete', 'id', OLD.id)::text);
+            END IF;
+            PERFORM pg_notify('task_changes_' || NEW.user_id, json_build_object('op', lower(TG_OP), 'id', NEW.id)::text);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS tasks_notify_trigger ON tasks;",
+        """
+        CREATE TRIGGER tasks_notify_trigger
+        AFTER INSERT OR UPDATE OR DELETE ON tasks
+        FOR EACH ROW EXECUTE PROCEDURE tasks_notify_change();
+        """,
+    ]),
+    (7, "Row versions for replica sync", [
+        # Conditional writes (... WHERE version = %s) detect that another client changed a task first
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;",
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now();",
+        """
+        CREATE OR REPLACE FUNCTION tasks_bump_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.version := OLD.version + 1;
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS tasks_version_trigger ON tasks;",
+        """
+        CREATE TRIGGER tasks_version_trigger
+        BEFORE UPDATE ON tasks
+        FOR EACH ROW EXECUTE PROCEDURE tasks_bump_version();
+        """,
+    ]),
+]
+
+# Hot queries checked by check_query_plans, with the index each one should use
+HOT_QUERIES = {
+    "fetch_user": (
+        "SELECT id, username, password FROM users WHERE lower(username) = lower(%s);",
+        ("",),
+        "idx_users_username_lower",
+    ),
+    "fetch_tasks By Deadline": (
+        "SELECT id FROM tasks WHERE user_id = %s ORDER BY deadline_datetime, id;",
+        (0,),
+        "idx_tasks_user_deadline",
+    ),
+    "fetch_tasks By Priority": (
+        f"SELECT id FROM tasks WHERE user_id = %s ORDER BY {PRIORITY_RANK_SQL}, deadline_datetime, id;",
+        (0,),
+        "idx_tasks_user_priority",
+    ),
+    "search_tasks": (
+        f"SELECT id FROM tasks WHERE user_id = %s AND search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s);",
+        (0, "task:*"),
+        "idx_tasks_search",
+    ),
+}
+
+
+def numbered_placeholders(sql):
+    """Rewrites %s placeholders as asyncpg's $1, $2, ..."""
+    numbers = itertools.count(1)
+    return re.sub(r"%s", lambda match: f"${next(numbers)}", sql)
+
+
+def current_version(cur):
+    """Returns the highest applied schema version (0 for a fresh database)."""
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    return cur.fetchone()[0]
+
+
+def upgrade(conn, migrations=MIGRATIONS):
+    """Applies all pending migrations in one transaction and returns the resulting version.
+
+    Safe to call on every start-up: already-applied steps are skipped.
+    """
+    try:
+        with conn.cursor() as cur:
+            # Lock first: concurrent CREATE TABLE IF NOT EXISTS can still collide in pg_type
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            version = current_version(cur)
+            for step_version, description, statements in migrations:
+                if step_version <= version:
+                    continue
+                logger.info("Applying migration %s: %s", step_version, description)
+                for statement in statements:
+                    if isinstance(statement, DataStep):
+                        cur.execute(statement.query)
+                        cur.executemany(statement.update, statement.plan(cur.fetchall()))
+                    else:
+                        cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s);",
+                    (step_version, description)
+                )
+                version = step_version
+        conn.commit()
+        return version
+    except Exception:
+        conn.rollback()
+        raise
+
+
+async def upgrade_async(conn, migrations=MIGRATIONS):
+    """asyncpg counterpart of upgrade(); applies pending migrations and returns the version."""
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock($1);", MIGRATION_LOCK_ID)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        version = await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+        for step_version, description, statements in migrations:
+            if step_version <= version:
+                continue
+            logger.info("Applying migration %s: %s", step_version, description)
+            for statement in statements:
+                if isinstance(statement, DataStep):
+                    rows = await conn.fetch(statement.query)
+                    await conn.executemany(
+                        numbered_placeholders(statement.update), statement.plan([tuple(row) for row in rows])
+                    )
+                else:
+                    await conn.execute(statement)
+            await conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES ($1, $2);",
+                step_version, description
+            )
+            version = step_version
+    return version
+
+
+def check_query_plans(conn):
+    """Runs EXPLAIN on the hot queries and reports whether each uses its index.
+
+    Sequential scans are disabled for the check so a small table, where the
+    planner would rightly prefer a scan, doesn't hide a missing index.
+    Returns ``{query_name: (uses_expected_index, plan_text)}``.
+    """
+    results = {}
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL enable_seqscan = off;")
+        for name, (sql, params, index_name) in HOT_QUERIES.items():
+            cur.execute("EXPLAIN " + sql, params)
+            plan = "\n".join(row[0] for row in cur.fetchall())
+            results[name] = (index_name in plan, plan)
+    conn.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    import config
+    from db_operations import Database
+
+    logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s - %(levelname)s - %(message)s")
+    db = Database()
+    print(f"Schema version: {db.migrate()}")
+    for name, (ok, plan) in db.explain_hot_queries().items():
+        print(f"{'OK ' if ok else 'MISSING INDEX'} {name}")
+        if not ok:
+            print(plan)
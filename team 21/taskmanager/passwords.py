@@ -0,0 +1,189 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+import config
+
+# Stored form: "scrypt$N$r$p$salt$hash" or "pbkdf2_sha256$iterations$salt$hash" (salt and hash base64).
+# Anything else in users.password is a legacy plaintext password, replaced on the user's next login.
+SCHEME_PARAM_COUNTS = {"scrypt": 3, "pbkdf2_sha256": 1}
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def current_params():
+    """Returns the configured ``(scheme, params)`` for new hashes."""
+    if config.PASSWORD_SCHEME == "scrypt":
+        return "scrypt", (config.SCRYPT_N, config.SCRYPT_R, config.SCRYPT_P)
+    if config.PASSWORD_SCHEME == "pbkdf2_sha256":
+        return "pbkdf2_sha256", (config.PBKDF2_ITERATIONS,)
+    raise ValueError(f"Unknown password scheme {config.PASSWORD_SCHEME!r}")
+
+
+def _derive(scheme, params, password, salt):
+    """Runs the key derivation function for a scheme."""
+    if scheme == "scrypt":
+        n, r, p = params
+        # Allow the 128 * N * r bytes scrypt needs plus headroom; the hashlib default caps at 32 MiB
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=128 * r * (n + p + 2) + 2 ** 20, dklen=HASH_BYTES
+        )
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, params[0], dklen=HASH_BYTES)
+
+
+def hash_password(password, scheme=None, params=None):
+    """Returns a salted hash of ``password`` to store in users.password (the configured scheme by default)."""
+    if scheme is None:
+        scheme, params = current_params()
+    salt = os.urandom(SALT_BYTES)
+    digest = _derive(scheme, params, password, salt)
+    return "$".join([scheme, *map(str, params), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def _parse(stored):
+    """Returns ``(scheme, params, salt, digest)``, or None if ``stored`` isn't a hash this module wrote."""
+    parts = stored.split("$")
+    param_count = SCHEME_PARAM_COUNTS.get(parts[0])
+    if param_count is None or len(parts) != param_count + 3:
+        return None
+    try:
+        params = tuple(int(value) for value in parts[1:-2])
+        return parts[0], params, base64.b64decode(parts[-2], validate=True), base64.b64decode(parts[-1], validate=True)
+    except ValueError:
+        return None
+
+
+def verify_password(password, stored):
+    """True if ``password`` matches a stored hash (or a legacy plaintext password)."""
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    scheme, params, salt, digest = parsed
+    return hmac.compare_digest(_derive(scheme, params, password, salt), digest)
+
+
+def needs_rehash(stored, scheme=None, params=None):
+    """True if ``stored`` is plaintext or was hashed with other than the given (default: configured) parameters."""
+    if scheme is None:
+        scheme, params = current_params()
+    parsed = _parse(stored)
+    return parsed is None or parsed[:2] != (scheme, tuple(params))
+
+
+def _verify_and_rehash(password, stored, scheme, params):
+    """Worker entry point: returns ``(ok, new_hash)``; ``new_hash`` is set when ``stored`` is outdated.
+
+    With no stored hash (unknown user) a hash is still computed, so a failed
+    login takes as long whether or not the username exists.
+    """
+    if stored is None:
+        hash_password(password, scheme, params)
+        return False, None
+    if not verify_password(password, stored):
+        return False, None
+    if needs_rehash(stored, scheme, params):
+        return True, hash_password(password, scheme, params)
+    return True, None
+
+
+def _completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in worker processes, so the caller's thread never does the work.
+
+    Successful verifications are remembered for ``cache_ttl`` seconds, keyed by
+    the stored hash and a keyed digest of the password, so clients that send
+    credentials with every request (the HTTP API) pay for key derivation once.
+    """
+    def __init__(self, workers=None, cache_ttl=None, cache_size=None):
+        self.workers = config.PASSWORD_WORKERS if workers is None else workers
+        self.cache_ttl = config.LOGIN_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.cache_size = config.LOGIN_CACHE_SIZE if cache_size is None else cache_size
+        self.scheme, self.params = current_params()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()  # stored hash -> (password digest, expires at), oldest first
+        self._cache_key = os.urandom(32)  # per process, so cached digests are useless outside it
+        self.cache_hits = 0
+
+    def _submit(self, fn, *args):
+        """Returns a Future for ``fn(*args)`` run in a worker process, or inline when workers is 0."""
+        if self.workers <= 0:
+            try:
+                return _completed(fn(*args))
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+                return future
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: forking a process with Tk or server threads running is unsafe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor.submit(fn, *args)
+
+    def hash_async(self, password):
+        """Returns a Future for a new hash of ``password``."""
+        return self._submit(hash_password, password, self.scheme, self.params)
+
+    def hash(self, password):
+        """Returns a new hash of ``password``, computed in a worker process."""
+        return self.hash_async(password).result()
+
+    def verify_async(self, password, stored):
+        """Returns a Future for ``(ok, new_hash)``. Pass None as ``stored`` for an unknown user.
+
+        ``new_hash`` is set when the stored value is plaintext or uses outdated
+        parameters and should be written back.
+        """
+        if stored is None:
+            return self._submit(_verify_and_rehash, password, None, self.scheme, self.params)
+        digest = hmac.new(self._cache_key, password.encode("utf-8"), "sha256").digest()
+        if self._is_cached(stored, digest):
+            return _completed((True, None))
+        future = self._submit(_verify_and_rehash, password, stored, self.scheme, self.params)
+        future.add_done_callback(lambda done: self._remember(done, stored, digest))
+        return future
+
+    def verify(self, password, stored):
+        """Returns ``(ok, new_hash)``; see verify_async."""
+        return self.verify_async(password, stored).result()
+
+    def _is_cached(self, stored, digest):
+        with self._lock:
+            entry = self._verified.get(stored)
+            if entry is None:
+                return False
+            if entry[1] < time.monotonic():
+                del self._verified[stored]
+                return False
+            if not hmac.compare_digest(entry[0], digest):
+                return False
+            self.cache_hits += 1
+            return True
+
+    def _remember(self, future, stored, digest):
+        if future.cancelled() or future.exception() is not None or not future.result()[0]:
+            return
+        if self.cache_ttl <= 0 or self.cache_size <= 0:
+            return
+        with self._lock:
+            self._verified[stored] = (digest, time.monotonic() + self.cache_ttl)
+            self._verified.move_to_end(stored)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    def close(self):
+        """Stops the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
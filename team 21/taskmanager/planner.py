@@ -0,0 +1,317 @@
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate, compress, islice, repeat
+from operator import gt, mul, sub
+
+logger = logging.getLogger(__name__)
+
+# How much an hour late costs per priority when the planner has to choose which tasks run late
+PRIORITY_WEIGHTS = {"High": 4, "Medium": 2, "Low": 1}
+
+# Cap on the improvement passes over an overloaded schedule; each pass is linear in the overloaded stretch
+MAX_IMPROVEMENT_PASSES = 4
+
+# sync() rebuilds from scratch when more than this fraction of the tasks changed
+REBUILD_FRACTION = 0.125
+
+# Times are whole minutes since EPOCH, so the hot loops only do integer arithmetic
+EPOCH = datetime(2000, 1, 1)
+MINUTE = timedelta(minutes=1)
+
+
+def to_minutes(when):
+    return (when - EPOCH) // MINUTE
+
+
+def from_minutes(minutes):
+    return EPOCH + timedelta(minutes=minutes)
+
+
+@dataclass(slots=True)
+class PlannedTask:
+    """One task's slot in a schedule; ``late_by`` is in minutes (0 when it finishes by its deadline)."""
+    task: object
+    start: datetime
+    end: datetime
+    late_by: int
+
+
+@dataclass(slots=True)
+class OverloadWindow:
+    """A stretch where the work due can't all be done in time, however it is ordered.
+
+    ``demand`` is the minutes of work due in (start, end], ``excess`` how many of
+    them don't fit before ``end`` even when working through them deadline first.
+    """
+    start: datetime
+    end: datetime
+    demand: int
+    excess: int
+    task_ids: tuple
+
+
+class Schedule:
+    """Tasks in the order to work on them, back to back from ``start``.
+
+    Indexing builds a PlannedTask on demand, so a plan over thousands of tasks
+    costs nothing until its rows are shown.
+    """
+    def __init__(self, start, tasks, ends, deadlines, weights, overloads):
+        self.start = from_minutes(start)
+        self.tasks = tasks
+        self.overloads = overloads
+        self._ends = ends
+        self._late = list(map(max, map(sub, ends, deadlines), repeat(0)))
+        self.late_count = len(self._late) - self._late.count(0)
+        self.weighted_lateness = sum(map(mul, self._late, weights))  # weight x minutes late
+
+    @property
+    def feasible(self):
+        """True if every task can finish by its deadline."""
+        return not self.overloads
+
+    @property
+    def task_ids(self):
+        return [task.id for task in self.tasks]
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __getitem__(self, index):
+        task, end = self.tasks[index], self._ends[index]
+        return PlannedTask(task, from_minutes(end - task.duration), from_minutes(end), self._late[index])
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self.tasks)))
+
+
+class SchedulePlanner:
+    """Plans one user's tasks as a single back-to-back work queue, updated one task at a time.
+
+    Tasks are kept in earliest-deadline-first order (higher priority first on
+    equal deadlines) in parallel lists with their running end times. EDF
+    finishes every task on time whenever that is possible, so its late tasks
+    mark the overload windows. When there are any, a copy of the order is
+    improved to cut priority-weighted lateness: overdue tasks go by Smith's rule,
+    then adjacent swaps that lower the weighted lateness are applied back to
+    front. Changing a task moves only its own entry and recomputes end times
+    from there on; the result is the same as planning from scratch.
+    """
+    def __init__(self, tasks=(), weights=PRIORITY_WEIGHTS):
+        self.weights = weights
+        self._start = None
+        self.rebuild(tasks)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _key(self, task):
+        return (to_minutes(task.deadline_datetime), -self.weights.get(task.priority, 1), task.id)
+
+    def rebuild(self, tasks):
+        """Replaces every task, sorting once."""
+        self._key_of = {task.id: (self._key(task), task) for task in tasks}
+        entries = sorted(self._key_of.values(), key=lambda entry: entry[0])
+        self._keys = [key for key, task in entries]
+        self._tasks = [task for key, task in entries]
+        self._deadlines = [key[0] for key in self._keys]
+        self._durations = [task.duration for task in self._tasks]
+        self._weights = [-key[1] for key in self._keys]
+        self._ends = [0] * len(entries)
+        self._dirty_from = 0  # end times from here on need recomputing
+        self._schedule = None
+
+    def sync(self, tasks):
+        """Reconciles the planner with a full task list, touching only tasks that changed.
+
+        Tasks are compared by identity, which suits the cache's shared read-only rows.
+        """
+        tasks = list(tasks)
+        seen = set()
+        changed = []
+        for task in tasks:
+            seen.add(task.id)
+            current = self._key_of.get(task.id)
+            if current is None or current[1] is not task:
+                changed.append(task)
+        removed = [task_id for task_id in self._key_of if task_id not in seen]
+        if len(changed) + len(removed) > max(1, len(tasks) * REBUILD_FRACTION):
+            self.rebuild(tasks)
+            return
+        for task_id in removed:
+            self.remove_task(task_id)
+        for task in changed:
+            self.update_task(task)
+
+    def update_task(self, task):
+        """Adds a new task or replans around an edited one."""
+        key = self._key(task)
+        current = self._key_of.get(task.id)
+        self._schedule = None
+        if current is not None and current[0] == key and current[1].duration == task.duration:
+            self._tasks[bisect.bisect_left(self._keys, key)] = task  # same slot: only the title etc. changed
+            self._key_of[task.id] = (key, task)
+            return
+        if current is not None:
+            self._pop(current[0])
+        index = bisect.bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._tasks.insert(index, task)
+        self._deadlines.insert(index, key[0])
+        self._durations.insert(index, task.duration)
+        self._weights.insert(index, -key[1])
+        self._ends.insert(index, 0)
+        self._key_of[task.id] = (key, task)
+        self._dirty_from = min(self._dirty_from, index)
+
+    def remove_task(self, task_id):
+        """Forgets a deleted task."""
+        current = self._key_of.pop(task_id, None)
+        if current is not None:
+            self._pop(current[0])
+            self._schedule = None
+
+    def _pop(self, key):
+        index = bisect.bisect_left(self._keys, key)
+        for column in (self._keys, self._tasks, self._deadlines, self._durations, self._weights, self._ends):
+            del column[index]
+        self._dirty_from = min(self._dirty_from, index)
+
+    def _refresh_ends(self, start):
+        """Brings the EDF end times up to date from the first changed position."""
+        if start != self._start:
+            self._start = start
+            self._dirty_from = 0
+        i = self._dirty_from
+        if i < len(self._ends):
+            base = self._ends[i - 1] if i else start
+            self._ends[i:] = islice(accumulate(self._durations[i:], initial=base), 1, None)
+            self._schedule = None
+        self._dirty_from = len(self._ends)
+
+    def plan(self, start=None):
+        """Returns the Schedule for working through the tasks from ``start`` (default: now)."""
+        start = to_minutes((start or datetime.now()).replace(second=0, microsecond=0))
+        self._refresh_ends(start)
+        if self._schedule is not None:
+            return self._schedule
+        late = list(map(sub, self._ends, self._deadlines))
+        late_positions = list(compress(range(len(late)), map(gt, late, repeat(0))))
+        if not late_positions:
+            schedule = Schedule(start, list(self._tasks), list(self._ends), self._deadlines, self._weights, [])
+        else:
+            tasks, ends, deadlines, durations, weights = (
+                list(self._tasks), list(self._ends), list(self._deadlines), list(self._durations), list(self._weights)
+            )
+            reduce_weighted_lateness(start, tasks, durations, deadlines, weights, ends)
+            schedule = Schedule(start, tasks, ends, deadlines, weights, self._overloads(start, late, late_positions))
+            logger.debug("Planned %s tasks from %s: %s late, weighted lateness %s",
+                         len(tasks), schedule.start, schedule.late_count, schedule.weighted_lateness)
+        self._schedule = schedule
+        return schedule
+
+    def _overloads(self, start, late, late_positions):
+        """Groups the tasks EDF can't finish on time into windows, one per run of consecutive late tasks."""
+        windows = []
+        runs = []
+        for position in late_positions:
+            if runs and runs[-1][1] == position - 1:
+                runs[-1][1] = position
+            else:
+                runs.append([position, position])
+        deadlines = self._deadlines
+        for first, last in runs:
+            # The window opens at the last earlier deadline; everything due after that competes for the time
+            lo = bisect.bisect_left(deadlines, deadlines[first])
+            opens = deadlines[lo - 1] if lo else min(start, deadlines[0])
+            hi = bisect.bisect_right(deadlines, deadlines[last])
+            windows.append(OverloadWindow(
+                start=from_minutes(opens), end=from_minutes(deadlines[last]),
+                demand=sum(self._durations[lo:hi]), excess=max(late[first:last + 1]),
+                task_ids=tuple(task.id for task in self._tasks[lo:hi])
+            ))
+        return windows
+
+
+def weighted_lateness(base, durations, deadlines, weights):
+    """Total of weight x minutes late for tasks worked through in order from ``base``."""
+    ends = islice(accumulate(durations, initial=base), 1, None)
+    return sum(map(mul, map(max, map(sub, ends, deadlines), repeat(0)), weights))
+
+
+def reduce_weighted_lateness(start, tasks, durations, deadlines, weights, ends):
+    """Reorders EDF-ordered parallel lists in place to lower the total of weight x minutes late.
+
+    Tasks already overdue at ``start`` are late whatever happens, so they go by
+    Smith's rule (most weight per minute of work first), which is optimal among
+    them. The overloaded stretch after them is then re-sorted by weighted
+    modified due date (slack over weight, but never less than the task's own
+    length), if that beats EDF there. Finally, passes walk back from the last
+    late task swapping adjacent tasks whenever that lowers their combined
+    weighted lateness; a pass stops once it is below the first late task and
+    finds nothing to swap, so feasible stretches of the schedule cost nothing.
+    """
+    overdue = bisect.bisect_right(deadlines, start)
+    if overdue > 1:
+        _reorder(sorted(range(overdue), key=lambda i: (-weights[i] / durations[i], deadlines[i])),
+                 0, start, tasks, durations, deadlines, weights, ends)
+
+    late_positions = list(compress(range(len(ends)), map(gt, ends, deadlines)))
+    if not late_positions:
+        return
+    lo, hi = late_positions[0], late_positions[-1] + 1
+    # Start from the last deadline met; the overdue prefix is no longer in deadline order
+    lo = bisect.bisect_right(deadlines, deadlines[lo - 1], overdue) if lo > overdue else overdue
+    base = ends[lo - 1] if lo else start
+    order = sorted(range(lo, hi), key=lambda i: (
+        max(durations[i], deadlines[i] - ends[i] + durations[i]) / weights[i], deadlines[i]
+    ))
+    if weighted_lateness(base, [durations[i] for i in order], [deadlines[i] for i in order],
+                         [weights[i] for i in order]) < weighted_lateness(
+                             base, durations[lo:hi], deadlines[lo:hi], weights[lo:hi]):
+        _reorder(order, lo, base, tasks, durations, deadlines, weights, ends)
+
+    for _ in range(MAX_IMPROVEMENT_PASSES):
+        if not _swap_pass(tasks, durations, deadlines, weights, ends):
+            return
+
+
+def _reorder(order, lo, base, tasks, durations, deadlines, weights, ends):
+    """Puts positions ``lo`` onward into ``order`` (a permutation of them) and recomputes their end times."""
+    hi = lo + len(order)
+    for column in (tasks, durations, deadlines, weights):
+        column[lo:hi] = [column[i] for i in order]
+    ends[lo:hi] = islice(accumulate(durations[lo:hi], initial=base), 1, None)
+
+
+def _swap_pass(tasks, durations, deadlines, weights, ends):
+    """One back-to-front pass of improving adjacent swaps; returns True if anything moved."""
+    late_positions = list(compress(range(len(ends)), map(gt, ends, deadlines)))
+    if not late_positions:
+        return False
+    first = late_positions[0]
+    swapped = False
+    k = late_positions[-1] - 1
+    while k >= 0:
+        d_i, d_j, w_i, w_j = deadlines[k], deadlines[k + 1], weights[k], weights[k + 1]
+        late_i, late_j = ends[k] - d_i, ends[k + 1] - d_j
+        before = (w_i * late_i if late_i > 0 else 0) + (w_j * late_j if late_j > 0 else 0)
+        if not before:
+            if k < first:
+                break  # everything from here back is on time and unchanged this pass
+            k -= 1
+            continue
+        swapped_end = ends[k] - durations[k] + durations[k + 1]
+        late_j, late_i = swapped_end - d_j, ends[k + 1] - d_i
+        after = (w_j * late_j if late_j > 0 else 0) + (w_i * late_i if late_i > 0 else 0)
+        if after < before:
+            for column in (tasks, durations, deadlines, weights):
+                column[k], column[k + 1] = column[k + 1], column[k]
+            ends[k] = swapped_end
+            swapped = True
+            if late_j > 0 and k < first:
+                first = k
+        k -= 1
+    return swapped
@@ -0,0 +1,45 @@
+def format_row(task):
+    """Returns the displayed column values for a Task."""
+    return (task.title, task.description or "", task.priority, task.deadline_str, task.duration)
+
+
+class RowModel:
+    """The tasks currently shown in the task list, formatted only when a row is on screen.
+
+    ``update()`` swaps in a freshly fetched list without formatting it and
+    keeps the view scrolled to the task that was at the top of its window, so
+    the rows on screen stay put when tasks above them are added, removed or
+    moved. The view reads ``rows[i]`` for the few rows it shows, and only
+    those are formatted.
+    """
+    def __init__(self):
+        self.tasks = []
+        self.task_ids = []
+        self._positions = None  # task_id -> index, rebuilt lazily after each update
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def index_of(self, task_id):
+        """Returns the displayed position of a task, or None."""
+        if self._positions is None:
+            self._positions = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        return self._positions.get(task_id)
+
+    @property
+    def rows(self):
+        return self
+
+    def __getitem__(self, index):
+        return format_row(self.tasks[index])
+
+    def update(self, tasks, view):
+        """Shows ``tasks`` and moves ``view.offset`` to wherever its top task went; the caller renders."""
+        anchor = self.task_ids[view.offset] if 0 < view.offset < len(self.task_ids) else None
+        self.tasks = tasks
+        self.task_ids = [task.id for task in tasks]
+        self._positions = None
+        if anchor is not None:
+            index = self.index_of(anchor)
+            if index is not None:
+                view.offset = index
@@ -0,0 +1,111 @@
+import bisect
+import heapq
+import re
+
+# Letters and digits only, so "to-do_list" matches the words PostgreSQL's parser extracts
+WORD_RE = re.compile(r"[^\W_]+")
+
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+EXACT_MATCH_BOOST = 1.5
+
+
+def tokenize(text):
+    """Returns the lowercase words in ``text``."""
+    return WORD_RE.findall(text.lower()) if text else []
+
+
+def prefix_tsquery(text):
+    """Returns a PostgreSQL tsquery matching every word of ``text`` as a prefix ("" if it has none)."""
+    return " & ".join(f"{word}:*" for word in tokenize(text))
+
+
+def _word_weights(title, description):
+    """Returns {word: weight} for a task, a title word taking precedence over the same description word."""
+    weights = dict.fromkeys(tokenize(description), DESCRIPTION_WEIGHT)
+    weights.update(dict.fromkeys(tokenize(title), TITLE_WEIGHT))
+    return weights
+
+
+class PrefixSearchIndex:
+    """In-memory inverted index over task titles and descriptions with prefix matching.
+
+    Used where the database has no full-text index (SQLite, or Postgres while
+    offline). Every query word must match the start of some word in the task;
+    title hits outweigh description hits and whole-word hits outweigh prefixes.
+    """
+    def __init__(self):
+        self._postings = {}  # word -> {task_id: weight}
+        self._words = []  # sorted vocabulary, so a prefix maps to one contiguous slice
+        self._task_words = {}  # task_id -> words, for removal
+
+    def __len__(self):
+        return len(self._task_words)
+
+    def add(self, task_id, title, description):
+        """Indexes a task, replacing any previous version of it."""
+        self.remove(task_id)
+        weights = _word_weights(title, description)
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._words, word)
+            postings[task_id] = weight
+        self._task_words[task_id] = tuple(weights)
+
+    def remove(self, task_id):
+        """Drops a task from the index if present."""
+        for word in self._task_words.pop(task_id, ()):
+            postings = self._postings[word]
+            del postings[task_id]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    @classmethod
+    def build(cls, tasks):
+        """Builds an index from (task_id, title, description) triples in one pass."""
+        index = cls()
+        for task_id, title, description in tasks:
+            weights = _word_weights(title, description)
+            for word, weight in weights.items():
+                index._postings.setdefault(word, {})[task_id] = weight
+            index._task_words[task_id] = tuple(weights)
+        index._words = sorted(index._postings)
+        return index
+
+    def _match_term(self, term):
+        """Returns {task_id: best score} for tasks with a word starting with ``term``."""
+        scores = {}
+        words = self._words
+        for position in range(bisect.bisect_left(words, term), len(words)):
+            word = words[position]
+            if not word.startswith(term):
+                break
+            boost = EXACT_MATCH_BOOST if word == term else 1.0
+            for task_id, weight in self._postings[word].items():
+                score = weight * boost
+                if score > scores.get(task_id, 0.0):
+                    scores[task_id] = score
+        return scores
+
+    def search(self, text, limit=50, tiebreak=None):
+        """Returns up to ``limit`` task ids matching every word of ``text``, best first.
+
+        ``tiebreak`` maps a task id to a sort key for equal scores (e.g. its deadline).
+        """
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)  # longest prefixes match the fewest tasks
+        if not terms:
+            return []
+        totals = self._match_term(terms[0])
+        for term in terms[1:]:
+            if not totals:
+                break
+            scores = self._match_term(term)
+            totals = {task_id: total + scores[task_id] for task_id, total in totals.items() if task_id in scores}
+        if tiebreak is None:
+            key = lambda item: (-item[1], item[0])
+        else:
+            key = lambda item: (-item[1], tiebreak(item[0]))
+        return [task_id for task_id, _ in heapq.nsmallest(limit, totals.items(), key=key)]
@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import config
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_BYTES = 24
+SIGNATURE_BYTES = 16
+
+
+@dataclass(slots=True)
+class Session:
+    """A logged-in user's session. ``key`` is the SHA-256 of the token's session id."""
+    key: str
+    user_id: int
+    expires_at: float  # time.time() seconds
+
+
+class SessionStore:
+    """Issues and checks signed session tokens; authorization is a dictionary lookup.
+
+    A token is ``<session id>.<HMAC signature>``. A bad signature is rejected
+    without touching the store, so guessed tokens cost nothing. Sessions live in
+    memory with a fixed TTL, in expiry order, so expired ones are dropped from the
+    front as new ones arrive and the oldest go first when ``max_sessions`` is
+    reached. With a storage backend, sessions are also written to its sessions
+    table and reloaded on a miss, so they survive a restart when SESSION_SECRET is
+    set. Only hashed session ids are kept anywhere.
+    """
+    def __init__(self, db=None, ttl=None, max_sessions=None, secret=None):
+        self.db = db
+        self.ttl = config.SESSION_TTL if ttl is None else ttl
+        self.max_sessions = config.SESSION_MAX if max_sessions is None else max_sessions
+        secret = secret if secret is not None else config.SESSION_SECRET
+        if secret is None and db is not None:
+            logger.warning("SESSION_SECRET is not set; persisted sessions won't survive a restart")
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else (secret or os.urandom(32))
+        self._sessions = OrderedDict()  # key -> Session, soonest expiry first
+        self._lock = threading.Lock()
+
+    def _sign(self, session_id):
+        """Returns the token signature for an ASCII session id, as bytes."""
+        digest = hmac.new(self._secret, session_id.encode("ascii"), "sha256").digest()[:SIGNATURE_BYTES]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=")
+
+    def _verified_id(self, token):
+        """Returns the session id of a correctly signed token, or None for anything else, garbage included."""
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not session_id.isascii() or not signature.isascii():
+            return None
+        if not hmac.compare_digest(signature.encode("ascii"), self._sign(session_id)):
+            return None
+        return session_id
+
+    @staticmethod
+    def _key(session_id):
+        return hashlib.sha256(session_id.encode("ascii")).hexdigest()
+
+    def create(self, user_id):
+        """Starts a session for ``user_id`` and returns ``(token, expires_at)``."""
+        session_id = secrets.token_urlsafe(SESSION_ID_BYTES)
+        session = Session(self._key(session_id), user_id, time.time() + self.ttl)
+        if self.db is not None and not self.db.insert_session(
+            session.key, user_id, datetime.fromtimestamp(session.expires_at)
+        ):
+            logger.warning("Session for user_id=%s not persisted; it will end on restart", user_id)
+        self._remember(session)
+        return f"{session_id}.{self._sign(session_id).decode('ascii')}", session.expires_at
+
+    def _remember(self, session):
+        with self._lock:
+            self._sessions[session.key] = session
+            self._sessions.move_to_end(session.key)
+            self._evict(time.time())
+
+    def _evict(self, now):
+        """Drops expired sessions from the front, then the oldest beyond max_sessions. Caller holds the lock."""
+        sessions = self._sessions
+        while sessions:
+            session = next(iter(sessions.values()))
+            if session.expires_at > now and len(sessions) <= self.max_sessions:
+                break
+            del sessions[session.key]
+
+    def authorize(self, token):
+        """Returns the user id for a live session token, otherwise None."""
+        session_id = self._verified_id(token)
+        if session_id is None:
+            return None
+        key = self._key(session_id)
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(key)
+        if session is None and self.db is not None:
+            row = self.db.fetch_session(key)
+            if row is not None:
+                session = Session(key, row[0], row[1].timestamp())
+                if session.expires_at > now:
+                    self._remember(session)
+        if session is None or session.expires_at <= now:
+            return None
+        return session.user_id
+
+    def revoke(self, token):
+        """Ends a session (logout). Unknown or invalid tokens are ignored."""
+        session_id = self._verified_id(token)
+        if session_id is None:
+            return
+        key = self._key(session_id)
+        with self._lock:
+            self._sessions.pop(key, None)
+        if self.db is not None:
+            self.db.delete_session(key)
+
+    def purge_expired(self):
+        """Drops expired sessions from memory and the database; returns how many were removed from the database."""
+        with self._lock:
+            self._evict(time.time())
+        if self.db is None:
+            return 0
+        return self.db.delete_expired_sessions(datetime.now()) or 0
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,715 @@
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from time import perf_counter
+import config
+import metrics
+from migrations import DEDUPLICATE_USERNAMES, PRIORITY_RANK_SQL, DataStep
+from storage import StorageBackend
+from task import Task, tasks_from_rows
+from user import User
+from task_query import TASK_COLUMNS, TaskQuery
+
+logger = logging.getLogger(__name__)
+
+# Ids per DELETE ... IN (...) statement, well under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+# Store datetimes as ISO text and read TIMESTAMP columns back as datetime
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+# Ordered (version, description, statements), mirroring migrations.MIGRATIONS
+SQLITE_MIGRATIONS = [
+    (1, "Create users and tasks tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username VARCHAR(255) NOT NULL,
+            password VARCHAR(255) NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            priority VARCHAR(10) NOT NULL,
+            deadline_str VARCHAR(50) NOT NULL,
+            deadline_datetime TIMESTAMP NOT NULL,
+            duration INTEGER NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
+        );
+        """,
+    ]),
+    (2, "Index login and task list queries", [
+        "CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_deadline ON tasks (user_id, deadline_datetime, id);",
+        f"CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, ({PRIORITY_RANK_SQL}), deadline_datetime, id);",
+    ]),
+    # Search is served by TaskService's in-memory prefix index; kept so versions line up with Postgres
+    (3, "Full-text search over task titles and descriptions", []),
+    (4, "Persisted login sessions", [
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id CHAR(64) PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            expires_at TIMESTAMP NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);",
+    ]),
+    (5, "Case-insensitive unique usernames", [
+        # Older duplicates keep working under a new name: the first account keeps "name", later ones become "name#<id>"
+        DEDUPLICATE_USERNAMES,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_lower ON users (lower(username));",
+        "DROP INDEX IF EXISTS idx_users_username;",
+    ]),
+    # No LISTEN/NOTIFY in SQLite; kept so versions line up with Postgres
+    (6, "Notify clients of task changes", []),
+    # Set by the statements that write tasks, not by a trigger, so the replica (a SQLite file too) can store the
+    # server's versions as they are
+    (7, "Row versions for replica sync", [
+        "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1;",
+        "ALTER TABLE tasks ADD COLUMN updated_at TIMESTAMP;",
+        "UPDATE tasks SET updated_at = datetime('now', 'localtime');",
+    ]),
+]
+
+HOT_QUERIES = {
+    "fetch_user": (
+        "SELECT id, username, password FROM users WHERE lower(username) = lower(?);", ("",),
+        "idx_users_username_lower"
+    ),
+    "fetch_tasks By Deadline": (
+        "SELECT id FROM tasks WHERE user_id = ? ORDER BY deadline_datetime, id;", (0,), "idx_tasks_user_deadline"
+    ),
+    "fetch_tasks By Priority": (
+        f"SELECT id FROM tasks WHERE user_id = ? ORDER BY {PRIORITY_RANK_SQL}, deadline_datetime, id;",
+        (0,), "idx_tasks_user_priority"
+    ),
+}
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records execute/fetch latency, rows and driver errors in metrics.py."""
+    def execute(self, sql, parameters=()):
+        metrics.timed_call("execute", super().execute, sql, parameters)
+        if self.description is None:
+            metrics.count_rows(self.rowcount)  # rows changed; fetched rows are counted on fetch
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        metrics.timed_call("execute", super().executemany, sql, seq_of_parameters)
+        metrics.count_rows(self.rowcount)
+        return self
+
+    def fetchone(self):
+        row = metrics.timed_call("fetch", super().fetchone)
+        metrics.count_rows(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = metrics.timed_call("fetch", super().fetchmany, self.arraysize if size is None else size)
+        metrics.count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = metrics.timed_call("fetch", super().fetchall)
+        metrics.count_rows(len(rows))
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors are TimedCursors and whose commits (including ``with conn:``) are timed."""
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        return metrics.timed_call("commit", super().commit)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return metrics.timed_call("commit", super().__exit__, exc_type, exc_value, traceback)
+
+
+class SQLiteDatabase(StorageBackend):
+    """Embedded SQLite task storage for laptops and tests; no server needed.
+
+    Each thread gets its own connection (sqlite3 connections can't be shared
+    across threads). The database runs in WAL mode so readers don't block the
+    writer, and sqlite3's per-connection statement cache keeps the hot
+    queries prepared.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or config.SQLITE_PATH
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._memory_anchor = None
+
+    def _target(self):
+        """Returns (database, uri); a private shared-cache URI keeps ':memory:' one database across threads."""
+        if self.path == ":memory:":
+            return f"file:taskmanager-{id(self)}?mode=memory&cache=shared", True
+        return self.path, False
+
+    def _open(self):
+        database, uri = self._target()
+        start = perf_counter()
+        conn = sqlite3.connect(
+            database, uri=uri, detect_types=sqlite3.PARSE_DECLTYPES,
+            timeout=config.POOL_TIMEOUT, cached_statements=256, check_same_thread=False,
+            factory=TimedConnection if config.METRICS_ENABLED else sqlite3.Connection
+        )
+        conn.execute("PRAGMA foreign_keys = ON;")
+        if not uri:
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+        metrics.record_phase("connect", perf_counter() - start)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _conn(self):
+        """Returns this thread's connection, opening it on first use (None on failure)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not self.connect():
+                return None
+            try:
+                conn = self._open()
+            except sqlite3.Error as e:
+                logger.error("Database connection failed: %s", e)
+                return None
+            self._local.conn = conn
+        return conn
+
+    def connect(self):
+        """Opens the database file (or in-memory database)."""
+        if self._memory_anchor is not None or self.path != ":memory:":
+            return True
+        try:
+            # Keeps the shared in-memory database alive while other threads come and go
+            self._memory_anchor = self._open()
+            return True
+        except sqlite3.Error as e:
+            logger.error("Database connection failed: %s", e)
+            return False
+
+    def close(self):
+        """Closes every thread's connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        self._memory_anchor = None
+
+    def migrate(self):
+        """Brings the schema up to the latest version. Returns the version, or None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE;")  # serializes concurrent upgrades
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;").fetchone()[0]
+            for step_version, description, statements in SQLITE_MIGRATIONS:
+                if step_version <= version:
+                    continue
+                for statement in statements:
+                    if isinstance(statement, DataStep):
+                        rows = conn.execute(statement.query).fetchall()
+                        conn.executemany(statement.update.replace("%s", "?"), statement.plan(rows))
+                    else:
+                        conn.execute(statement)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?);",
+                    (step_version, description)
+                )
+                version = step_version
+            conn.commit()
+            logger.info("Schema at version %s", version)
+            return version
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error("Schema migration failed: %s", e)
+            return None
+
+    def explain_hot_queries(self):
+        """Checks with EXPLAIN QUERY PLAN that login and task list queries use their indexes."""
+        conn = self._conn()
+        if conn is None:
+            return {}
+        results = {}
+        try:
+            for name, (sql, params, index_name) in HOT_QUERIES.items():
+                plan = "\n".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+                results[name] = (index_name in plan, plan)
+        except sqlite3.Error as e:
+            logger.error("Query plan check failed: %s", e)
+        return results
+
+    def insert_user(self, username, password_hash):
+        """Inserts a new user with an already hashed password.
+
+        Returns the id, False if the username is taken (ignoring case), or None on failure.
+        """
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                row = conn.execute(
+                    "INSERT INTO users (username, password) VALUES (?, ?) ON CONFLICT DO NOTHING RETURNING id;",
+                    (username, password_hash)
+                ).fetchone()
+            if row is None:
+                logger.info("Username taken: %s", username)
+                return False
+            logger.info("Registered user_id=%s", row[0])
+            return row[0]
+        except sqlite3.Error as e:
+            logger.error("User creation failed: %s", e)
+            return None
+
+    def fetch_user(self, username):
+        """Returns the User with this username, ignoring case, or None."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT id, username, password FROM users WHERE lower(username) = lower(?);", (username,)
+            ).fetchone()
+            return User(*row) if row else None
+        except sqlite3.Error as e:
+            logger.error("Fetch user failed: %s", e)
+            return None
+
+    def update_user_password(self, user_id, password_hash):
+        """Replaces a user's stored password hash; returns True if the user exists."""
+        conn = self._conn()
+        if conn is None:
+            return False
+        try:
+            with conn:
+                cur = conn.execute("UPDATE users SET password = ? WHERE id = ?;", (password_hash, user_id))
+            return cur.rowcount == 1
+        except sqlite3.Error as e:
+            logger.error("Password update failed: %s", e)
+            return False
+
+    def insert_session(self, session_key, user_id, expires_at):
+        """Stores a login session."""
+        conn = self._conn()
+        if conn is None:
+            return False
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO sessions (id, user_id, expires_at) VALUES (?, ?, ?);", (session_key, user_id, expires_at)
+                )
+            return True
+        except sqlite3.Error as e:
+            logger.error("Session insert failed: %s", e)
+            return False
+
+    def fetch_session(self, session_key):
+        """Returns ``(user_id, expires_at)`` for a stored session, or None."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            return conn.execute("SELECT user_id, expires_at FROM sessions WHERE id = ?;", (session_key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Session fetch failed: %s", e)
+            return None
+
+    def delete_session(self, session_key):
+        """Removes a stored session."""
+        conn = self._conn()
+        if conn is None:
+            return False
+        try:
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE id = ?;", (session_key,))
+            return True
+        except sqlite3.Error as e:
+            logger.error("Session delete failed: %s", e)
+            return False
+
+    def delete_expired_sessions(self, now):
+        """Removes sessions that expired before ``now``; returns how many, or None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                return conn.execute("DELETE FROM sessions WHERE expires_at <= ?;", (now,)).rowcount
+        except sqlite3.Error as e:
+            logger.error("Session purge failed: %s", e)
+            return None
+
+    def insert_task(self, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Inserts a new task into the database."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                task_id = conn.execute("""
+                    INSERT INTO tasks (
+                        title, description, priority, deadline_str, deadline_datetime, duration, user_id, updated_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?) RETURNING id;
+                """, (
+                    title, description, priority, deadline_str, deadline_datetime, duration, user_id, datetime.now()
+                )).fetchone()[0]
+            logger.debug("Inserted task_id=%s for user_id=%s", task_id, user_id)
+            return task_id
+        except sqlite3.Error as e:
+            logger.error("Insert task failed: %s", e)
+            return None
+
+    def update_task(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Updates an existing task in the database."""
+        conn = self._conn()
+        if conn is None:
+            return False
+        try:
+            with conn:
+                cur = conn.execute("""
+                    UPDATE tasks
+                    SET title = ?, description = ?, priority = ?, deadline_str = ?,
+                        deadline_datetime = ?, duration = ?, version = version + 1, updated_at = ?
+                    WHERE id = ? AND user_id = ?;
+                """, (
+                    title, description, priority, deadline_str, deadline_datetime, duration, datetime.now(),
+                    task_id, user_id
+                ))
+            success = cur.rowcount > 0
+            if success:
+                logger.debug("Successfully updated task_id=%s", task_id)
+            else:
+                logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
+            return success
+        except sqlite3.Error as e:
+            logger.error("Update task failed: %s", e)
+            return False
+
+    def delete_task(self, task_id, user_id):
+        """Deletes a task from the database."""
+        conn = self._conn()
+        if conn is None:
+            return False
+        try:
+            with conn:
+                cur = conn.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?;", (task_id, user_id))
+            if cur.rowcount == 0:
+                logger.debug("No task found with task_id=%s for user_id=%s", task_id, user_id)
+                return False
+            logger.debug("Successfully deleted task_id=%s", task_id)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Delete task failed: %s", e)
+            return False
+
+    def insert_tasks(self, tasks, user_id):
+        """Inserts many tasks in a single transaction; returns the new ids in input order, or None."""
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            now = datetime.now()
+            with conn:
+                # executemany can't return rows; the prepared statement is reused from the cache
+                task_ids = [
+                    conn.execute("""
+                        INSERT INTO tasks (
+                            title, description, priority, deadline_str, deadline_datetime, duration, user_id, updated_at
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?) RETURNING id;
+                    """, tuple(task) + (user_id, now)).fetchone()[0]
+                    for task in tasks
+                ]
+            logger.debug("Inserted %s tasks for user_id=%s", len(task_ids), user_id)
+            return task_ids
+        except sqlite3.Error as e:
+            logger.error("Insert tasks failed: %s", e)
+            return None
+
+    def update_tasks(self, tasks, user_id):
+        """Updates many tasks in a single transaction; returns one bool per task, or None."""
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            results = []
+            now = datetime.now()
+            with conn:
+                for task_id, title, description, priority, deadline_str, deadline_datetime, duration in tasks:
+                    cur = conn.execute("""
+                        UPDATE tasks
+                        SET title = ?, description = ?, priority = ?, deadline_str = ?,
+                            deadline_datetime = ?, duration = ?, version = version + 1, updated_at = ?
+                        WHERE id = ? AND user_id = ?;
+                    """, (
+                        title, description, priority, deadline_str, deadline_datetime, duration, now, task_id, user_id
+                    ))
+                    results.append(cur.rowcount > 0)
+            logger.debug("Updated %s of %s tasks for user_id=%s", sum(results), len(tasks), user_id)
+            return results
+        except sqlite3.Error as e:
+            logger.error("Update tasks failed: %s", e)
+            return None
+
+    def delete_tasks(self, task_ids, user_id):
+        """Deletes many tasks with DELETE ... RETURNING in a single transaction; returns one bool per id, or None."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            deleted = set()
+            with conn:
+                for start in range(0, len(task_ids), BATCH_SIZE):
+                    chunk = task_ids[start:start + BATCH_SIZE]
+                    rows = conn.execute(
+                        f"DELETE FROM tasks WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))}) RETURNING id;",
+                        [user_id, *chunk]
+                    ).fetchall()
+                    deleted.update(row[0] for row in rows)
+            logger.debug("Deleted %s of %s tasks for user_id=%s", len(deleted), len(task_ids), user_id)
+            return [task_id in deleted for task_id in task_ids]
+        except sqlite3.Error as e:
+            logger.error("Delete tasks failed: %s", e)
+            return None
+
+    def fetch_tasks(self, user_id, sort_option="By Deadline"):
+        """Fetches all tasks for a user with sorting."""
+        result = self.query_tasks(user_id, TaskQuery.for_sort_option(sort_option))
+        return result[0] if result is not None else []
+
+    def query_tasks(self, user_id, query):
+        """Runs a TaskQuery for a user. Returns ``(tasks, next_cursor)``, or None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            return query.paginate(conn.execute(*query.compile(user_id, "sqlite")).fetchall())
+        except sqlite3.Error as e:
+            logger.error("Query tasks failed: %s", e)
+            return None
+
+    def fetch_all_tasks(self, user_id):
+        """Fetches all of a user's task rows in no particular order; None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            rows = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ?;", (user_id,)).fetchall()
+            return list(tasks_from_rows(rows))
+        except sqlite3.Error as e:
+            logger.error("Fetch tasks failed: %s", e)
+            return None
+
+    def fetch_tasks_by_ids(self, user_id, task_ids):
+        """Fetches the user's tasks with these ids, BATCH_SIZE ids per query; None on failure."""
+        task_ids = list(task_ids)
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            tasks = []
+            for start in range(0, len(task_ids), BATCH_SIZE):
+                chunk = task_ids[start:start + BATCH_SIZE]
+                tasks.extend(tasks_from_rows(conn.execute(
+                    f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))});",
+                    [user_id, *chunk]
+                ).fetchall()))
+            return tasks
+        except sqlite3.Error as e:
+            logger.error("Fetch tasks by id failed: %s", e)
+            return None
+
+    def fetch_task_versions(self, user_id):
+        """Returns ``{task_id: version}`` for all of a user's tasks, or None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            return dict(conn.execute("SELECT id, version FROM tasks WHERE user_id = ?;", (user_id,)).fetchall())
+        except sqlite3.Error as e:
+            logger.error("Fetch task versions failed: %s", e)
+            return None
+
+    def fetch_versioned_tasks(self, user_id, task_ids):
+        """Fetches ``(task, version, updated_at)`` for the user's tasks with these ids, BATCH_SIZE per query."""
+        task_ids = list(task_ids)
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            tasks = []
+            for start in range(0, len(task_ids), BATCH_SIZE):
+                chunk = task_ids[start:start + BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT {TASK_COLUMNS}, version, updated_at FROM tasks "
+                    f"WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))});",
+                    [user_id, *chunk]
+                ).fetchall()
+                tasks.extend((Task(*row[:-2]), row[-2], row[-1]) for row in rows)
+            return tasks
+        except sqlite3.Error as e:
+            logger.error("Fetch versioned tasks failed: %s", e)
+            return None
+
+    def update_task_at_version(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration,
+                               user_id, version):
+        """Updates a task if it is still at ``version``; returns the new version, False if not, None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                row = conn.execute("""
+                    UPDATE tasks
+                    SET title = ?, description = ?, priority = ?, deadline_str = ?,
+                        deadline_datetime = ?, duration = ?, version = version + 1, updated_at = ?
+                    WHERE id = ? AND user_id = ? AND version = ?
+                    RETURNING version;
+                """, (
+                    title, description, priority, deadline_str, deadline_datetime, duration, datetime.now(),
+                    task_id, user_id, version
+                )).fetchone()
+            return row[0] if row else False
+        except sqlite3.Error as e:
+            logger.error("Versioned task update failed: %s", e)
+            return None
+
+    def delete_task_at_version(self, task_id, user_id, version):
+        """Deletes a task if it is still at ``version``; returns True, False if not, or None on failure."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM tasks WHERE id = ? AND user_id = ? AND version = ?;", (task_id, user_id, version)
+                )
+            return cur.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Versioned task delete failed: %s", e)
+            return None
+
+    def fetch_tasks_page(self, user_id, sort_option="By Deadline", limit=100, after=None):
+        """Fetches one page of tasks using keyset pagination; returns ``(tasks, next_cursor)``."""
+        query = TaskQuery.for_sort_option(sort_option).limit(limit).after(after)
+        return self.query_tasks(user_id, query) or ([], None)
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Streams a user's tasks ``batch_size`` rows at a time."""
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            cur = conn.execute(*TaskQuery.for_sort_option(sort_option).compile(user_id, "sqlite", with_keys=False))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from tasks_from_rows(rows)
+        except sqlite3.Error as e:
+            logger.error("Stream tasks failed: %s", e)
+
+    def copy_tasks_in(self, stream):
+        """Bulk-loads CSV task rows from a file-like ``stream`` in one transaction."""
+        conn = self._conn()
+        if conn is None:
+            return None
+        now = datetime.now()
+        rows = (
+            (title, description or None, priority, deadline_str, deadline_datetime, int(duration), int(user_id), now)
+            for title, description, priority, deadline_str, deadline_datetime, duration, user_id
+            in csv.reader(_iter_lines(stream))
+        )
+        try:
+            with conn:
+                cur = conn.executemany("""
+                    INSERT INTO tasks (
+                        title, description, priority, deadline_str, deadline_datetime, duration, user_id, updated_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """, rows)
+            logger.debug("Copied %s tasks in", cur.rowcount)
+            return cur.rowcount
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Bulk task import failed: %s", e)
+            return None
+
+    def copy_tasks_out(self, user_id, out, as_json=False):
+        """Writes a user's tasks to ``out`` as CSV with a header, or as JSON lines."""
+        count = 0
+        rows = self.iter_tasks(user_id)
+        if as_json:
+            for task in rows:
+                out.write(json.dumps({
+                    "title": task.title, "description": task.description, "priority": task.priority,
+                    "deadline": task.deadline_str, "duration": task.duration
+                }) + "\n")
+                count += 1
+        else:
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(["title", "description", "priority", "deadline", "duration"])
+            for task in rows:
+                writer.writerow((task.title, task.description, task.priority, task.deadline_str, task.duration))
+                count += 1
+        logger.debug("Copied %s tasks out for user_id=%s", count, user_id)
+        return count
+
+
+def _iter_lines(stream, chunk_size=65536):
+    """Yields lines from a file-like object that only supports read(size)."""
+    partial = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8")
+        lines = (partial + chunk).split("\n")
+        partial = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if partial:
+        yield partial
@@ -0,0 +1,200 @@
+import importlib
+from abc import ABC, abstractmethod
+import config
+import metrics
+
+# Backend name -> (module, class or factory); imported lazily so e.g. SQLite users don't need psycopg2
+BACKENDS = {
+    "postgres": ("db_operations", "Database"),
+    "sqlite": ("sqlite_backend", "SQLiteDatabase"),
+    "replica": ("local_replica", "open_replica"),  # one shared instance per replica file
+}
+
+
+class StorageBackend(ABC):
+    """Interface implemented by every task storage engine.
+
+    Methods never raise for database errors: like the original Database class
+    they log the problem and return None/False/[] so callers can report it.
+    Task rows are returned as task.Task objects, which also carry the parsed
+    deadline_datetime. Sort options are the names in task_query.SORT_OPTIONS,
+    e.g. "By Deadline" orders by (deadline_datetime, id) and "By Priority" by
+    (priority rank, deadline_datetime, id). Every task also has a version,
+    starting at 1 and bumped by each update, and an updated_at time, which the
+    offline replica syncs by.
+    """
+    name = None
+    full_text_search = False  # True if search_tasks is served by a database index
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every storage call is timed per backend and operation (see metrics.py)
+        metrics.instrument_backend(cls)
+
+    @abstractmethod
+    def connect(self):
+        """Prepares connections. Returns False if the store is unreachable."""
+
+    @abstractmethod
+    def close(self):
+        """Releases every connection."""
+
+    @abstractmethod
+    def migrate(self):
+        """Brings the schema up to date. Returns the version, or None on failure."""
+
+    def create_tables(self):
+        """Creates users and tasks tables if they don't exist."""
+        return self.migrate() is not None
+
+    def pool_stats(self):
+        """Returns connection statistics, if the backend keeps any."""
+        return {}
+
+    def explain_hot_queries(self):
+        """Reports whether login and task list queries use their indexes."""
+        return {}
+
+    @abstractmethod
+    def insert_user(self, username, password_hash):
+        """Inserts a user with an already hashed password.
+
+        Returns the id, False if the username is taken (ignoring case), or None on failure.
+        """
+
+    @abstractmethod
+    def fetch_user(self, username):
+        """Returns the User with this username, ignoring case, or None if there is none or the lookup failed."""
+
+    @abstractmethod
+    def update_user_password(self, user_id, password_hash):
+        """Replaces a user's stored password hash; returns True on success."""
+
+    @abstractmethod
+    def insert_session(self, session_key, user_id, expires_at):
+        """Stores a login session; returns True on success."""
+
+    @abstractmethod
+    def fetch_session(self, session_key):
+        """Returns ``(user_id, expires_at)`` for a stored session, or None."""
+
+    @abstractmethod
+    def delete_session(self, session_key):
+        """Removes a stored session; returns True on success."""
+
+    @abstractmethod
+    def delete_expired_sessions(self, now):
+        """Removes sessions that expired before ``now``; returns how many, or None on failure."""
+
+    @abstractmethod
+    def insert_task(self, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Inserts a task and returns the id, or None."""
+
+    @abstractmethod
+    def update_task(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration, user_id):
+        """Updates a task owned by ``user_id``. Returns True if a row changed."""
+
+    @abstractmethod
+    def delete_task(self, task_id, user_id):
+        """Deletes a task owned by ``user_id``. Returns True if a row was removed."""
+
+    @abstractmethod
+    def insert_tasks(self, tasks, user_id):
+        """Inserts (title, description, priority, deadline_str, deadline_datetime,
+        duration) tuples in one transaction. Returns the new ids in input order,
+        or None if the batch failed and nothing was inserted."""
+
+    @abstractmethod
+    def update_tasks(self, tasks, user_id):
+        """Applies (task_id, title, description, priority, deadline_str,
+        deadline_datetime, duration) tuples in one transaction. Returns one bool
+        per task (False if it wasn't found), or None if the batch failed."""
+
+    @abstractmethod
+    def delete_tasks(self, task_ids, user_id):
+        """Deletes tasks in one transaction. Returns one bool per id (False if
+        it wasn't found), or None if the batch failed."""
+
+    @abstractmethod
+    def fetch_tasks(self, user_id, sort_option="By Deadline"):
+        """Returns all of a user's task rows in display order ([] on failure)."""
+
+    @abstractmethod
+    def query_tasks(self, user_id, query):
+        """Runs a task_query.TaskQuery. Returns ``(tasks, next_cursor)``, or None on failure."""
+
+    def search_tasks(self, user_id, text, limit=50):
+        """Returns the user's best ``limit`` task rows matching ``text``, best first.
+
+        None means the backend can't search right now (no full-text index, or the
+        database is down); TaskService then searches its in-memory index instead.
+        """
+        return None
+
+    @abstractmethod
+    def fetch_all_tasks(self, user_id):
+        """Returns all of a user's task rows, or None on failure."""
+
+    @abstractmethod
+    def fetch_tasks_by_ids(self, user_id, task_ids):
+        """Returns the user's tasks with these ids in no particular order (missing ones are left out), or None on failure."""
+
+    @abstractmethod
+    def fetch_task_versions(self, user_id):
+        """Returns ``{task_id: version}`` for all of a user's tasks, or None on failure."""
+
+    @abstractmethod
+    def fetch_versioned_tasks(self, user_id, task_ids):
+        """Like fetch_tasks_by_ids, but returns ``(task, version, updated_at)`` tuples."""
+
+    @abstractmethod
+    def update_task_at_version(self, task_id, title, description, priority, deadline_str, deadline_datetime, duration,
+                               user_id, version):
+        """Updates a task only if it is still at ``version``.
+
+        Returns the new version, False if the task has changed since or is gone, or None on failure.
+        """
+
+    @abstractmethod
+    def delete_task_at_version(self, task_id, user_id, version):
+        """Deletes a task only if it is still at ``version``.
+
+        Returns True, False if the task has changed since or is gone, or None on failure.
+        """
+
+    def change_listener(self):
+        """Returns the change_feed.ChangeFeed publishing other clients' task changes, or None if it can't notify."""
+        return None
+
+    def sync_status(self):
+        """Returns the offline replica's sync state (see local_replica.py), or None if the backend doesn't sync."""
+        return None
+
+    @abstractmethod
+    def fetch_tasks_page(self, user_id, sort_option="By Deadline", limit=100, after=None):
+        """Returns ``(tasks, next_cursor)`` for one keyset page."""
+
+    @abstractmethod
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Yields a user's task rows in display order without loading them all."""
+
+    @abstractmethod
+    def copy_tasks_in(self, stream):
+        """Bulk-loads CSV rows (title, description, priority, deadline_str,
+        deadline_datetime, duration, user_id) from a file-like object in one
+        transaction. Returns the row count, or None."""
+
+    @abstractmethod
+    def copy_tasks_out(self, user_id, out, as_json=False):
+        """Writes a user's tasks to ``out`` as CSV with a header, or as JSON lines.
+        Returns the row count, or None."""
+
+
+def create_backend(name=None, **kwargs):
+    """Instantiates the storage backend named in config (or ``name``)."""
+    name = (name or config.STORAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {name!r}; choose from {', '.join(BACKENDS)}")
+    module_name, factory_name = BACKENDS[name]
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return factory(**kwargs)
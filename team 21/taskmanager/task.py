@@ -1,10 +1,29 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from itertools import starmap
+
+
+@dataclass(slots=True)
 class Task:
-    def __init__(self, title, priority, deadline_datetime, deadline_str, duration, description, user_id):
-        # Initialize task attributes
-        self.title = title
-        self.priority = priority
-        self.deadline_datetime = deadline_datetime
-        self.deadline_str = deadline_str
-        self.duration = duration
-        self.description = description
-        self.user_id = user_id
\ No newline at end of file
+    """One task as fetched from the database.
+
+    Fields are in TASK_COLUMNS order, so ``Task(*row)`` maps a fetched row. With
+    slots an instance is smaller than the equivalent tuple and has no __dict__.
+    Rows handed out by the cache are shared; treat them as read-only.
+    """
+    id: int
+    title: str
+    description: str | None
+    priority: str
+    deadline_str: str
+    duration: int
+    deadline_datetime: datetime
+
+
+# The SELECT list that fills a Task, e.g. "id, title, ..., deadline_datetime"
+TASK_FIELDS = tuple(field.name for field in fields(Task))
+
+
+def tasks_from_rows(rows):
+    """Maps fetched rows to Tasks lazily. starmap calls Task directly from C, avoiding a per-row lambda."""
+    return starmap(Task, rows)
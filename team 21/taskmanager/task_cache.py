@@ -0,0 +1,229 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from search_index import PrefixSearchIndex
+
+PRIORITY_RANK = {"High": 1, "Medium": 2, "Low": 3}
+
+# Sort options UserTasks keeps orderings for; others are answered by the database
+CACHED_SORT_OPTIONS = ("By Deadline", "By Priority")
+
+
+class UserTasks:
+    """One user's cached tasks, keyed by id, with deadline and priority orderings kept sorted.
+
+    Rows are the same Task objects returned by Database.fetch_tasks, and the
+    orderings match its SQL.
+    """
+    def __init__(self, rows):
+        self.loaded_at = time.monotonic()
+        self.rows = {}
+        self._keys = {}  # task_id -> (deadline_key, priority_key)
+        self._by_deadline = []
+        self._by_priority = []
+        self._views = {}
+        self._search_index = None  # built on first search
+        for task in rows:
+            self.rows[task.id] = task
+            self._keys[task.id] = self._sort_keys(task)
+        self._by_deadline = sorted(keys[0] for keys in self._keys.values())
+        self._by_priority = sorted(keys[1] for keys in self._keys.values())
+
+    @staticmethod
+    def _sort_keys(task):
+        task_id, priority, deadline = task.id, task.priority, task.deadline_datetime
+        return (deadline, task_id), (PRIORITY_RANK.get(priority, 4), deadline, task_id)
+
+    def put(self, task):
+        """Inserts or replaces a task, keeping both orderings sorted."""
+        self.remove(task.id)
+        deadline_key, priority_key = self._sort_keys(task)
+        self.rows[task.id] = task
+        self._keys[task.id] = (deadline_key, priority_key)
+        bisect.insort(self._by_deadline, deadline_key)
+        bisect.insort(self._by_priority, priority_key)
+        self._views.clear()
+        if self._search_index is not None:
+            self._search_index.add(task.id, task.title, task.description)
+
+    def remove(self, task_id):
+        """Drops a task if present."""
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        del self.rows[task_id]
+        for ordering, key in ((self._by_deadline, keys[0]), (self._by_priority, keys[1])):
+            del ordering[bisect.bisect_left(ordering, key)]
+        self._views.clear()
+        if self._search_index is not None:
+            self._search_index.remove(task_id)
+
+    def view(self, sort_option):
+        """Returns the tasks in display order for a sort option."""
+        view = self._views.get(sort_option)
+        if view is None:
+            ordering = self._by_priority if sort_option == "By Priority" else self._by_deadline
+            view = [self.rows[key[-1]] for key in ordering]
+            self._views[sort_option] = view
+        return list(view)
+
+    def search_index(self):
+        """Returns the prefix search index, building it on first use."""
+        if self._search_index is None:
+            self._search_index = PrefixSearchIndex.build(
+                (task.id, task.title, task.description) for task in self.rows.values()
+            )
+        return self._search_index
+
+    def search(self, text, limit):
+        """Returns up to ``limit`` tasks matching ``text``, best first, ties by deadline."""
+        task_ids = self.search_index().search(text, limit, tiebreak=lambda task_id: self._keys[task_id][0])
+        return [self.rows[task_id] for task_id in task_ids]
+
+
+class TaskCache:
+    """Thread-safe per-user task cache with TTL expiry and LRU eviction across users.
+
+    Every write-through and invalidation bumps the user's write generation,
+    cached or not, so a load whose fetch started before a write can tell that
+    its rows may be older than the write (see load()).
+    """
+    def __init__(self, ttl=300.0, max_users=64):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> UserTasks, least recently used first
+        self._generations = {}  # user_id -> writes seen; one small int per user that ever wrote
+        self._epoch = 0  # bumped when everything is invalidated
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_loads = 0
+
+    def _entry(self, user_id):
+        """Returns a fresh entry for the user (marking it recently used) or None."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl:
+            del self._entries[user_id]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def get_tasks(self, user_id, sort_option="By Deadline"):
+        """Returns the user's tasks in display order, or None on a cache miss."""
+        with self._lock:
+            entry = self._entry(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.view(sort_option)
+
+    def get_task(self, user_id, task_id):
+        """Returns ``(found, row)``; ``found`` is False when the user's tasks aren't cached."""
+        with self._lock:
+            entry = self._entry(user_id)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, entry.rows.get(task_id)
+
+    def search_tasks(self, user_id, text, limit=50):
+        """Searches the user's cached tasks, or returns None on a cache miss."""
+        with self._lock:
+            entry = self._entry(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.search(text, limit)
+
+    def prepare_search(self, user_id):
+        """Builds the user's search index ahead of the first query. Returns False on a cache miss."""
+        with self._lock:
+            entry = self._entry(user_id)
+            if entry is None:
+                return False
+            entry.search_index()
+            return True
+
+    def generation(self, user_id):
+        """Returns a token to pass to load() with rows fetched after this call."""
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def _bump(self, user_id):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def load(self, user_id, rows, generation=None):
+        """Caches a freshly fetched task list, evicting least recently used users if full.
+
+        With the ``generation`` taken before the fetch, the rows are discarded
+        if the user's tasks were written since, since the fetch may have missed
+        the write; None is returned and the caller should fetch again.
+        """
+        entry = UserTasks(rows)
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(user_id, 0)):
+                self.stale_loads += 1
+                return None
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def __contains__(self, user_id):
+        """True if the user's tasks are cached (expired or not); doesn't count as a lookup."""
+        with self._lock:
+            return user_id in self._entries
+
+    def put_task(self, user_id, task):
+        """Write-through for an inserted or updated task. No-op if the user isn't cached."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.put(task)
+
+    def remove_task(self, user_id, task_id):
+        """Write-through for a deleted task. No-op if the user isn't cached."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.remove(task_id)
+
+    def invalidate(self, user_id=None):
+        """Forgets one user's tasks, or everything when ``user_id`` is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._epoch += 1
+            else:
+                self._entries.pop(user_id, None)
+                self._bump(user_id)
+
+    def read(self, entry, lookup):
+        """Returns ``lookup(entry)`` for a UserTasks from load(), under the lock that guards cached entries."""
+        with self._lock:
+            return lookup(entry)
+
+    def stats(self):
+        """Returns hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_loads": self.stale_loads,
+                "users": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
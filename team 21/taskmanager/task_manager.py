@@ -1,137 +1,272 @@
-from datetime import datetime
 from tkinter import messagebox as msgbox
-from task import Task
-from db_operations import Database
+from errors import TaskManagerError, TaskNotFoundError, UsernameTakenError
+from task_service import TaskService
+from validation import TaskValidationError
 import logging
+import config
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=config.LOG_LEVEL,
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
 
 class TaskManager:
-    """Manages task operations and coordinates UI and database."""
-    def __init__(self):
-        self.db = Database()
-        self.db.create_tables()
+    """Tkinter adapter over TaskService: reports results with message boxes and refreshes the main window."""
+    def __init__(self, service=None):
+        """Wraps ``service``, which its creator starts and closes, or else a TaskService of its own."""
+        self.session_token = None
+        if service is not None:
+            self.service = service
+            return
+        self.service = TaskService()
+        try:
+            self.service.start()
+        except TaskManagerError as e:
+            logger.error("Task service unavailable: %s", e)
 
     def login(self, username, password):
-        """Authenticates user credentials."""
-        logger.info(f"Attempting login for username={username}")
-        return self.db.authenticate_user(username, password)
+        """Authenticates user credentials and opens a session; returns the user id or None."""
+        session = self.service.open_session(username, password)
+        if session is None:
+            return None
+        user_id, self.session_token, _ = session
+        return user_id
+
+    def logout(self, worker=None):
+        """Ends the current session; given a GuiWorker, the revoke runs on it and isn't waited for."""
+        token, self.session_token = self.session_token, None
+        if token is None:
+            return
+        if worker is None:
+            self.service.close_session(token)
+        else:
+            worker.submit(self.service.close_session, token)
 
     def register(self, username, password):
-        """Registers a new user."""
-        logger.info(f"Attempting registration for username={username}")
-        return self.db.insert_user(username, password)
-
-    def validate_task_input(self, title, description, priority, deadline, duration):
-        """Validates task input fields."""
-        if not title or not deadline or not duration:
-            msgbox.showerror("Missing Entries", "Please fill in all non-optional fields")
-            logger.error("Missing required fields: title, deadline, or duration")
-            return False
-        if priority not in ["High", "Medium", "Low"]:
-            msgbox.showerror("Error", "Priority must be High, Medium, or Low")
-            logger.error(f"Invalid priority: {priority}")
-            return False
-        try:
-            duration = int(duration)
-            if duration <= 0:
-                raise ValueError("Duration must be positive")
-        except ValueError:
-            msgbox.showerror("Error", "Duration must be a positive integer")
-            logger.error(f"Invalid duration: {duration}")
-            return False
+        """Registers a new user; a taken username is raised for the login window to report."""
         try:
-            deadline_datetime = datetime.strptime(deadline, "%d/%m/%Y %I:%M %p")
-        except ValueError:
-            msgbox.showerror("Error", "Deadline format: DD/MM/YYYY HH:MM AM/PM")
-            logger.error(f"Invalid deadline format: {deadline}")
-            return False
-        return (title, description, priority, deadline, deadline_datetime, duration)
-
-    def add_task(self, main_window, user_id, title, description, priority, deadline, duration):
-        """Adds a new task."""
-        validated = self.validate_task_input(title, description, priority, deadline, duration)
-        if not validated:
-            return
-        title, description, priority, deadline, deadline_datetime, duration = validated
-        task_id = self.db.insert_task(title, description, priority, deadline, deadline_datetime, duration, user_id)
-        if task_id:
-            Task(task_id, title, description, priority, deadline, deadline_datetime, duration)
-            logger.info(f"Inserted task_id={task_id} for user_id={user_id}")
-            msgbox.showinfo("Success", "Task added successfully")
-            main_window._update_listboxes()
+            return self.service.register(username, password)
+        except UsernameTakenError:
+            raise
+        except TaskManagerError as e:
+            logger.error("Registration failed for username=%s: %s", username, e)
+            return None
+
+    def _show_failure(self, e, action):
+        """Shows a message box for a failed service call."""
+        if isinstance(e, TaskValidationError):
+            msgbox.showerror(e.title, str(e))
+            logger.error("Invalid task input: %s", e)
         else:
-            msgbox.showerror("Error", "Failed to add task")
-            logger.error(f"Failed to insert task for user_id={user_id}")
+            msgbox.showerror("Error", str(e))
+            logger.error("Failed to %s: %s", action, e)
+
+    def _saved(self, main_window, message, on_success):
+        """Reports a finished write on the main loop and refreshes the task table."""
+        msgbox.showinfo("Success", message)
+        main_window._update_listboxes()
+        if on_success:
+            on_success()
+
+    def _failed(self, e, action, on_error):
+        self._show_failure(e, action)
+        if on_error:
+            on_error()
 
-    def edit_task(self, main_window, user_id, task_id, title, description, priority, deadline, duration):
-        """Edits an existing task."""
+    def add_task(self, main_window, user_id, title, description, priority, deadline, duration,
+                 on_success=None, on_error=None):
+        """Adds a new task on the window's worker; ``on_success()`` or ``on_error()`` then runs on the main loop."""
+        main_window.worker.submit(
+            self.service.add_task, user_id, title, description, priority, deadline, duration,
+            on_success=lambda task_id: self._saved(main_window, "Task added successfully", on_success),
+            on_error=lambda e: self._failed(e, f"insert task for user_id={user_id}", on_error)
+        )
+
+    def edit_task(self, main_window, user_id, task_id, title, description, priority, deadline, duration,
+                  on_success=None, on_error=None):
+        """Edits an existing task on the window's worker, calling back like add_task()."""
         if task_id is None:
             msgbox.showwarning("Warning", "Please select a task to edit")
             logger.warning("No task selected for edit")
             return
-        
-        validated = self.validate_task_input(title, description, priority, deadline, duration)
-        if not validated:
-            return
-        title, description, priority, deadline, deadline_datetime, duration = validated
-        if self.db.update_task(task_id, title, description, priority, deadline, deadline_datetime, duration, user_id):
-            logger.info(f"Updated task_id={task_id} for user_id={user_id}")
-            msgbox.showinfo("Success", "Task updated successfully")
-            main_window._update_listboxes()
-        else:
-            msgbox.showerror("Error", f"Failed to update task with task_id={task_id}")
-            logger.error(f"Failed to update task_id={task_id} for user_id={user_id}")
+        main_window.worker.submit(
+            self.service.edit_task, user_id, task_id, title, description, priority, deadline, duration,
+            on_success=lambda result: self._saved(main_window, "Task updated successfully", on_success),
+            on_error=lambda e: self._failed(e, f"update task_id={task_id} for user_id={user_id}", on_error)
+        )
 
     def open_edit_task(self, main_window, user_id, task_id):
-        """Opens the edit task form with pre-filled data."""
+        """Loads the task on the window's worker, then opens the edit form pre-filled with it."""
         if task_id is None:
             msgbox.showwarning("Warning", "Please select a task to edit")
             logger.warning("No task selected for edit")
             return
-        tasks = self.db.fetch_tasks(user_id)
-        selected_task = None
-        for task in tasks:
-            if task[0] == task_id:
-                selected_task = {
-                    "id": task[0], "title": task[1], "description": task[2],
-                    "priority": task[3], "deadline_str": task[4], "duration": task[5]
-                }
-                break
-        if selected_task:
-            from gui import TaskFormWindow
-            TaskFormWindow(main_window, user_id, self, selected_task)
-        else:
-            msgbox.showerror("Error", f"Task with ID {task_id} not found")
-            logger.error(f"Task_id={task_id} not found for user_id={user_id}")
+        from gui import TaskFormWindow
+        main_window.worker.submit(
+            self.edit_form_values, user_id, task_id, key="edit-form",
+            on_success=lambda values: TaskFormWindow(main_window, user_id, self, values),
+            on_error=lambda e: self._show_failure(e, f"load task_id={task_id} for user_id={user_id}")
+        )
+
+    def edit_form_values(self, user_id, task_id):
+        """Returns a task's fields for the edit form; raises TaskNotFoundError or TaskManagerError."""
+        task = self.service.get_task(user_id, task_id)
+        return {
+            "id": task.id, "title": task.title, "description": task.description,
+            "priority": task.priority, "deadline_str": task.deadline_str, "duration": task.duration
+        }
 
-    def delete_task(self, main_window, user_id, task_id):
-        """Deletes a selected task."""
+    def delete_task(self, main_window, user_id, task_id, on_success=None):
+        """Deletes a selected task on the window's worker; ``on_success()`` runs on the main loop once it's gone."""
         if task_id is None:
             msgbox.showwarning("Warning", "Please select a task to delete")
             logger.warning("No task selected for deletion")
             return
-        logger.info(f"Attempting to delete task_id={task_id} for user_id={user_id}")
-        if self.db.delete_task(task_id, user_id):
-            msgbox.showinfo("Success", "Task deleted successfully")
+        logger.info("Attempting to delete task_id=%s for user_id=%s", task_id, user_id)
+        main_window.worker.submit(
+            self.service.delete_task, user_id, task_id,
+            on_success=lambda result: self._saved(main_window, "Task deleted successfully", on_success),
+            on_error=lambda e: self._show_failure(e, f"delete task_id={task_id} for user_id={user_id}")
+        )
+
+    def add_tasks(self, main_window, user_id, tasks, on_success=None, on_error=None):
+        """Adds many (title, description, priority, deadline, duration) tasks in one transaction on the window's worker.
+
+        ``on_success(task_ids)`` or ``on_error()`` then runs on the main loop.
+        """
+        def saved(task_ids):
+            msgbox.showinfo("Success", f"{len(task_ids)} tasks added successfully")
             main_window._update_listboxes()
+            if on_success:
+                on_success(task_ids)
+        main_window.worker.submit(
+            self.service.add_tasks, user_id, tasks, on_success=saved,
+            on_error=lambda e: self._failed(e, f"insert tasks for user_id={user_id}", on_error)
+        )
+
+    def edit_tasks(self, main_window, user_id, tasks, on_success=None, on_error=None):
+        """Edits many (task_id, title, description, priority, deadline, duration) tasks in one transaction.
+
+        Runs on the window's worker; ``on_success(results)``, one bool per task, or ``on_error()`` follows on the
+        main loop.
+        """
+        tasks = list(tasks)
+        main_window.worker.submit(
+            self.service.edit_tasks, user_id, tasks,
+            on_success=lambda results: self._batch_saved(
+                main_window, "updated", user_id, [task[0] for task in tasks], results, on_success
+            ),
+            on_error=lambda e: self._failed(e, f"update tasks for user_id={user_id}", on_error)
+        )
+
+    def delete_tasks(self, main_window, user_id, task_ids, on_success=None, on_error=None):
+        """Deletes many tasks in one transaction on the window's worker, calling back like edit_tasks()."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            msgbox.showwarning("Warning", "Please select tasks to delete")
+            logger.warning("No tasks selected for deletion")
+            return
+        main_window.worker.submit(
+            self.service.delete_tasks, user_id, task_ids,
+            on_success=lambda results: self._batch_saved(
+                main_window, "deleted", user_id, task_ids, results, on_success
+            ),
+            on_error=lambda e: self._failed(e, f"delete tasks for user_id={user_id}", on_error)
+        )
+
+    def _batch_saved(self, main_window, action, user_id, task_ids, results, on_success):
+        self._report_batch(action, user_id, task_ids, results)
+        main_window._update_listboxes()
+        if on_success:
+            on_success(results)
+
+    def _report_batch(self, action, user_id, task_ids, results):
+        """Tells the user how many tasks in a batch were written and which ones were missing."""
+        missing = [task_id for task_id, ok in zip(task_ids, results) if not ok]
+        done = len(task_ids) - len(missing)
+        if missing:
+            msgbox.showwarning("Warning", f"{done} tasks {action}; not found: {', '.join(map(str, missing))}")
+            logger.warning("Tasks not found for user_id=%s: %s", user_id, missing)
         else:
-            msgbox.showerror("Error", f"Failed to delete task with task_id={task_id}")
-            logger.error(f"Failed to delete task_id={task_id} for user_id={user_id}")
+            msgbox.showinfo("Success", f"{done} tasks {action} successfully")
 
-    def get_tasks(self, user_id, sort_option="By Deadline"):
-        """Fetches tasks with sorting."""
-        logger.info(f"Fetching tasks for user_id={user_id}, sort={sort_option}")
+    def get_tasks(self, user_id, sort_option="By Deadline", query=None):
+        """Fetches tasks with sorting, or matching a TaskQuery, served from the cache when possible."""
+        logger.info("Fetching tasks for user_id=%s, sort=%s", user_id, sort_option)
         try:
-            tasks = self.db.fetch_tasks(user_id, sort_option)
+            tasks = self.service.get_tasks(user_id, sort_option, query)
             if not tasks:
-                logger.info(f"No tasks found for user_id={user_id}")
+                logger.info("No tasks found for user_id=%s", user_id)
             return tasks
         except Exception as e:
-            logger.exception(f"Error fetching tasks for user_id={user_id}: {e}")
-            return []
\ No newline at end of file
+            logger.exception("Error fetching tasks for user_id=%s: %s", user_id, e)
+            return []
+
+    def search_tasks(self, user_id, text, limit=50):
+        """Returns tasks matching ``text``, best match first."""
+        logger.info("Searching tasks for user_id=%s, text=%r", user_id, text)
+        try:
+            return self.service.search_tasks(user_id, text, limit)
+        except Exception as e:
+            logger.exception("Error searching tasks for user_id=%s: %s", user_id, e)
+            return []
+
+    def prepare_search(self, user_id):
+        """Warms the search index so the first query is fast."""
+        try:
+            self.service.prepare_search(user_id)
+        except TaskManagerError as e:
+            logger.error("Could not prepare search for user_id=%s: %s", user_id, e)
+
+    def get_task(self, user_id, task_id):
+        """Returns one task row by id, or None if it doesn't exist."""
+        try:
+            return self.service.get_task(user_id, task_id)
+        except TaskNotFoundError:
+            return None
+        except TaskManagerError as e:
+            logger.error("Error fetching task_id=%s for user_id=%s: %s", task_id, user_id, e)
+            return None
+
+    def watch_tasks(self, user_id, callback):
+        """Calls ``callback(user_id)`` from a background thread when another client changes the user's tasks.
+
+        Returns False if the database can't send change notifications.
+        """
+        return self.service.watch(user_id, callback)
+
+    def unwatch_tasks(self, user_id, callback):
+        self.service.unwatch(user_id, callback)
+
+    def plan_schedule(self, user_id, start=None):
+        """Returns a Schedule of the user's tasks worked back to back from ``start`` (default: now), or None."""
+        logger.info("Planning schedule for user_id=%s", user_id)
+        try:
+            return self.service.plan_schedule(user_id, start)
+        except TaskManagerError as e:
+            logger.error("Could not plan schedule for user_id=%s: %s", user_id, e)
+            return None
+
+    def refresh_tasks(self, user_id):
+        """Drops the cached tasks for a user so the next read goes to the database."""
+        self.service.refresh_tasks(user_id)
+
+    def cache_stats(self):
+        """Returns task cache hit/miss counters."""
+        return self.service.cache_stats()
+
+    def get_tasks_page(self, user_id, sort_option="By Deadline", limit=100, cursor=None):
+        """Fetches one page of tasks; returns (tasks, next_cursor)."""
+        logger.info("Fetching task page for user_id=%s, sort=%s, limit=%s", user_id, sort_option, limit)
+        try:
+            return self.service.get_tasks_page(user_id, sort_option, limit, cursor)
+        except Exception as e:
+            logger.exception("Error fetching task page for user_id=%s: %s", user_id, e)
+            return [], None
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Yields tasks one at a time without loading the whole list into memory."""
+        logger.info("Streaming tasks for user_id=%s, sort=%s", user_id, sort_option)
+        return self.service.iter_tasks(user_id, sort_option, batch_size)
@@ -0,0 +1,217 @@
+import copy
+from migrations import PRIORITY_RANK_SQL
+from task import TASK_FIELDS, Task
+from validation import PRIORITIES
+
+# Selected in Task field order; rows end with the stored deadline timestamp so nobody re-parses deadline_str
+TASK_COLUMNS = ", ".join(TASK_FIELDS)
+
+# Sortable fields and the SQL they order by; the expressions match the v2 indexes
+SORT_FIELDS = {
+    "deadline": "deadline_datetime",
+    "priority": PRIORITY_RANK_SQL,
+    "duration": "duration",
+    "title": "lower(title)",
+    "id": "id",
+}
+
+# Named orderings offered by the GUI and accepted wherever a sort_option string is
+SORT_OPTIONS = {
+    "By Deadline": ("deadline",),
+    "By Priority": ("priority", "deadline"),
+    "By Duration": ("duration", "deadline"),
+    "By Title": ("title",),
+}
+
+PRIORITY_RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES, start=1)}
+
+DIALECTS = {
+    "postgres": {"param": "%s", "like": "ILIKE"},
+    "sqlite": {"param": "?", "like": "LIKE"},  # LIKE is case-insensitive for ASCII in SQLite
+}
+
+
+class TaskQuery:
+    """Immutable, composable description of a task list query.
+
+    Builder methods return a new query, so presets can be shared and refined:
+
+        TaskQuery().priority("High").due_between(start, end).order_by("-duration").limit(50)
+
+    compile() turns it into parameterized SQL for one user's tasks. Filters are
+    half-open for deadlines (``start <= deadline < end``) and inclusive for
+    durations. Sort keys are SORT_FIELDS names, prefixed with "-" for
+    descending; the task id is always appended so keyset cursors are unique.
+    """
+    def __init__(self):
+        self.priorities = None
+        self.deadline_from = None
+        self.deadline_to = None
+        self.duration_min = None
+        self.duration_max = None
+        self.text = None
+        self.sort_keys = ("deadline",)
+        self.limit_count = None
+        self.offset_count = 0
+        self.after_key = None
+
+    @classmethod
+    def for_sort_option(cls, sort_option):
+        """Returns an unfiltered query ordered like a named sort option ("By Deadline" if unknown)."""
+        return cls().order_by(*SORT_OPTIONS.get(sort_option, SORT_OPTIONS["By Deadline"]))
+
+    def _replace(self, **changes):
+        query = copy.copy(self)
+        query.__dict__.update(changes)
+        return query
+
+    def priority(self, *priorities):
+        """Keeps only tasks with one of these priorities (no arguments clears the filter)."""
+        for priority in priorities:
+            if priority not in PRIORITY_RANKS:
+                raise ValueError(f"Unknown priority {priority!r}")
+        return self._replace(priorities=tuple(priorities) or None)
+
+    def due_between(self, start=None, end=None):
+        """Keeps tasks whose deadline is at or after ``start`` and before ``end``; None leaves a side open."""
+        return self._replace(deadline_from=start, deadline_to=end)
+
+    def duration_between(self, minimum=None, maximum=None):
+        """Keeps tasks whose duration in minutes is within [minimum, maximum]."""
+        return self._replace(duration_min=minimum, duration_max=maximum)
+
+    def matching(self, text):
+        """Keeps tasks whose title or description contains ``text``, ignoring case."""
+        return self._replace(text=text.strip() if text and text.strip() else None)
+
+    def order_by(self, *keys):
+        """Sets the sort keys, e.g. ``order_by("priority", "-deadline")``."""
+        for key in keys:
+            if key.lstrip("-") not in SORT_FIELDS:
+                raise ValueError(f"Unknown sort key {key!r}; choose from {', '.join(SORT_FIELDS)}")
+        return self._replace(sort_keys=tuple(keys) or ("deadline",), after_key=None)
+
+    def limit(self, count):
+        """Returns at most ``count`` tasks (None for no limit)."""
+        if count is not None and count < 1:
+            raise ValueError("limit must be positive")
+        return self._replace(limit_count=count)
+
+    def offset(self, count):
+        """Skips the first ``count`` matching tasks. Prefer after() for deep pages."""
+        if count < 0:
+            raise ValueError("offset must not be negative")
+        return self._replace(offset_count=count)
+
+    def after(self, cursor):
+        """Continues after a cursor returned by paginate() for the same sort keys."""
+        if cursor is not None and len(cursor) != len(self._key_columns()):
+            raise ValueError("Cursor doesn't match the query's sort keys")
+        return self._replace(after_key=tuple(cursor) if cursor is not None else None)
+
+    @property
+    def filtered(self):
+        """True if the query returns a subset of the user's tasks rather than all of them."""
+        return any(value is not None for value in (
+            self.priorities, self.deadline_from, self.deadline_to, self.duration_min,
+            self.duration_max, self.text, self.limit_count, self.after_key
+        )) or self.offset_count > 0
+
+    @property
+    def sort_option(self):
+        """Returns the named sort option this query's ordering matches, or None."""
+        for name, keys in SORT_OPTIONS.items():
+            if keys == self.sort_keys:
+                return name
+        return None
+
+    def _key_columns(self):
+        """Returns [(sql, descending)] for the ORDER BY, ending with the id tiebreaker."""
+        columns = [(SORT_FIELDS[key.lstrip("-")], key.startswith("-")) for key in self.sort_keys]
+        if columns[-1][0] != "id":
+            columns.append(("id", columns[-1][1]))
+        return columns
+
+    def compile(self, user_id, dialect="postgres", with_keys=True):
+        """Returns ``(sql, params)`` selecting the user's matching tasks in order.
+
+        With ``with_keys`` each row ends with its sort key values for paginate().
+        A limit fetches one extra row so paginate() can tell if another page exists.
+        """
+        param, like = DIALECTS[dialect]["param"], DIALECTS[dialect]["like"]
+        where, params = [f"user_id = {param}"], [user_id]
+        if self.priorities:
+            # Filtering on the rank expression lets idx_tasks_user_priority serve the query
+            where.append(f"{PRIORITY_RANK_SQL} IN ({', '.join([param] * len(self.priorities))})")
+            params.extend(PRIORITY_RANKS[priority] for priority in self.priorities)
+        if self.deadline_from is not None:
+            where.append(f"deadline_datetime >= {param}")
+            params.append(self.deadline_from)
+        if self.deadline_to is not None:
+            where.append(f"deadline_datetime < {param}")
+            params.append(self.deadline_to)
+        if self.duration_min is not None:
+            where.append(f"duration >= {param}")
+            params.append(self.duration_min)
+        if self.duration_max is not None:
+            where.append(f"duration <= {param}")
+            params.append(self.duration_max)
+        if self.text:
+            pattern = "%" + self.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append(
+                f"(title {like} {param} ESCAPE '\\' OR coalesce(description, '') {like} {param} ESCAPE '\\')"
+            )
+            params.extend([pattern, pattern])
+        key_columns = self._key_columns()
+        if self.after_key is not None:
+            where.append(self._keyset_condition(key_columns, param))
+            params.extend(self._keyset_params(key_columns))
+
+        select = TASK_COLUMNS
+        if with_keys:
+            select += ", " + ", ".join(column for column, _ in key_columns)
+        order = ", ".join(f"{column} DESC" if descending else column for column, descending in key_columns)
+        sql = f"SELECT {select} FROM tasks WHERE {' AND '.join(where)} ORDER BY {order}"
+        if self.limit_count is not None:
+            sql += f" LIMIT {param}"
+            params.append(self.limit_count + 1)
+        elif self.offset_count and dialect == "sqlite":
+            sql += " LIMIT -1"  # SQLite only accepts OFFSET after a LIMIT
+        if self.offset_count:
+            sql += f" OFFSET {param}"
+            params.append(self.offset_count)
+        return sql + ";", params
+
+    def _keyset_condition(self, key_columns, param):
+        """Returns the WHERE clause selecting rows after ``after_key`` in sort order."""
+        directions = {descending for _, descending in key_columns}
+        if len(directions) == 1:
+            # A single row-value comparison can be answered with one index range scan
+            operator = "<" if directions.pop() else ">"
+            columns = ", ".join(column for column, _ in key_columns)
+            return f"({columns}) {operator} ({', '.join([param] * len(key_columns))})"
+        # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+        terms = []
+        for i, (column, descending) in enumerate(key_columns):
+            equal = [f"{earlier} = {param}" for earlier, _ in key_columns[:i]]
+            terms.append("(" + " AND ".join(equal + [f"{column} {'<' if descending else '>'} {param}"]) + ")")
+        return "(" + " OR ".join(terms) + ")"
+
+    def _keyset_params(self, key_columns):
+        """Returns the parameters for _keyset_condition, in placeholder order."""
+        if len({descending for _, descending in key_columns}) == 1:
+            return list(self.after_key)
+        params = []
+        for i in range(len(key_columns)):
+            params.extend(self.after_key[:i + 1])
+        return params
+
+    def paginate(self, rows):
+        """Splits rows fetched with compile() into ``(tasks, next_cursor)``, the tasks as Task objects."""
+        key_width = len(self._key_columns())
+        has_more = self.limit_count is not None and len(rows) > self.limit_count
+        if has_more:
+            rows = rows[:self.limit_count]
+        tasks = [Task(*row[:-key_width]) for row in rows]
+        next_cursor = tuple(rows[-1][-key_width:]) if has_more else None
+        return tasks, next_cursor
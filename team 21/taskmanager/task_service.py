@@ -0,0 +1,392 @@
+import logging
+import threading
+from collections import OrderedDict
+import config
+import metrics
+from errors import TaskManagerError, TaskNotFoundError, UsernameTakenError
+from passwords import PasswordHasher
+from planner import SchedulePlanner
+from search_index import tokenize
+from sessions import SessionStore
+from storage import create_backend
+from task import Task
+from task_cache import CACHED_SORT_OPTIONS, TaskCache, UserTasks
+from task_query import TaskQuery
+from validation import TaskValidationError, parse_task_input
+
+logger = logging.getLogger(__name__)
+
+# Above this many changed tasks in one notification batch, a user's cached list is reloaded instead of patched
+CHANGE_REFETCH_LIMIT = 500
+
+# Fetches of a user's tasks before giving up on caching them while writes keep landing mid-fetch
+LOAD_ATTEMPTS = 3
+
+
+class TaskServiceBase:
+    """Sessions, validation and cache write-through shared by TaskService and AsyncTaskManager.
+
+    Subclasses make the storage calls, blocking or awaited, and hand the
+    results to the ``_inserted``/``_updated``/``_deleted`` helpers, so both
+    raise the same errors and keep the cache the same way.
+    """
+    def __init__(self, db, passwords, sessions):
+        self.db = db
+        self.passwords = passwords
+        self.sessions = sessions
+        self.cache = TaskCache(ttl=config.TASK_CACHE_TTL, max_users=config.TASK_CACHE_MAX_USERS)
+
+    @metrics.service_operation
+    def authorize(self, token):
+        """Returns the user id for a live session token, otherwise None. No database query unless persisted."""
+        return self.sessions.authorize(token)
+
+    @metrics.service_operation
+    def close_session(self, token):
+        """Ends a session (logout)."""
+        self.sessions.revoke(token)
+
+    @staticmethod
+    def _validate_batch(tasks):
+        """Validates (title, description, priority, deadline, duration) tuples; the error names the bad item."""
+        validated = []
+        for number, task in enumerate(tasks, start=1):
+            try:
+                validated.append(parse_task_input(*task))
+            except TaskValidationError as e:
+                raise TaskValidationError(e.title, f"Task {number}: {e}") from e
+        return validated
+
+    def _validate_edits(self, tasks):
+        """Validates (task_id, title, description, priority, deadline, duration) tuples into update_tasks rows."""
+        tasks = list(tasks)
+        validated = self._validate_batch([task[1:] for task in tasks])
+        return [(task[0],) + fields for task, fields in zip(tasks, validated)]
+
+    def _cache_rows(self, user_id, rows):
+        for task_id, title, description, priority, deadline, deadline_datetime, duration in rows:
+            self.cache.put_task(user_id, Task(task_id, title, description, priority, deadline, duration, deadline_datetime))
+
+    def _inserted(self, user_id, task_ids, validated):
+        """Writes inserted tasks through to the cache; raises TaskManagerError if insert_tasks failed."""
+        if task_ids is None:
+            raise TaskManagerError("Failed to add task" if len(validated) == 1 else "Failed to add tasks")
+        self._cache_rows(user_id, [(task_id,) + fields for task_id, fields in zip(task_ids, validated)])
+        logger.info("Inserted %s tasks for user_id=%s", len(task_ids), user_id)
+        return task_ids
+
+    def _updated(self, user_id, rows, results):
+        """Writes the updated rows through to the cache; raises TaskManagerError if update_tasks failed."""
+        if results is None:
+            raise TaskManagerError("Failed to update task" if len(rows) == 1 else "Failed to update tasks")
+        self._cache_rows(user_id, [row for row, updated in zip(rows, results) if updated])
+        logger.info("Updated %s of %s tasks for user_id=%s", sum(results), len(rows), user_id)
+        return results
+
+    def _deleted(self, user_id, task_ids, results):
+        """Drops deleted tasks from the cache; raises TaskManagerError if delete_tasks failed."""
+        if results is None:
+            raise TaskManagerError("Failed to delete task" if len(task_ids) == 1 else "Failed to delete tasks")
+        for task_id, deleted in zip(task_ids, results):
+            if deleted:
+                self.cache.remove_task(user_id, task_id)
+        logger.info("Deleted %s of %s tasks for user_id=%s", sum(results), len(task_ids), user_id)
+        return results
+
+    @staticmethod
+    def _require_task(task_id, found):
+        if not found:
+            raise TaskNotFoundError(f"Task with ID {task_id} not found")
+
+    def cache_stats(self):
+        """Returns task cache hit/miss counters."""
+        return self.cache.stats()
+
+
+class TaskService(TaskServiceBase):
+    """Task operations with no UI dependency, shared by the GUI and the HTTP API.
+
+    Results are returned and failures raised: TaskValidationError for bad input,
+    TaskNotFoundError for a missing task and TaskManagerError when the database
+    rejects an operation. Safe to call from many threads; the storage backend
+    pools connections and the cache is locked.
+    """
+    def __init__(self, db=None, passwords=None, sessions=None):
+        db = db or create_backend()
+        sessions = sessions or SessionStore(db if config.SESSION_PERSIST else None)
+        super().__init__(db, passwords or PasswordHasher(), sessions)
+        self.listener = self.db.change_listener()
+        self._followed = set()  # users whose cached tasks follow other clients' changes
+        self._watchers = {}  # user_id -> [callback, ...]
+        self._watch_lock = threading.Lock()
+        self._planners = OrderedDict()  # user_id -> SchedulePlanner, least recently used first
+        self._planner_lock = threading.Lock()
+
+    def start(self):
+        """Connects and brings the schema up to date."""
+        if self.db.migrate() is None:
+            raise TaskManagerError("Could not connect to the database")
+
+    def close(self):
+        if self.listener is not None:
+            with self._watch_lock:
+                followed, self._followed = self._followed, set()
+                self._watchers.clear()
+            for user_id in followed:
+                self.listener.unsubscribe(user_id, self._apply_changes)
+        self.db.close()
+        self.passwords.close()
+
+    def watch(self, user_id, callback):
+        """Calls ``callback(user_id)`` once other clients' changes to the user's tasks are in the cache.
+
+        Runs on the change listener's thread, so it should only signal the
+        caller's own thread. Returns False if the backend can't notify (SQLite,
+        or LIVE_UPDATES off), in which case nothing is called.
+        """
+        if not self._follow(user_id):
+            return False
+        with self._watch_lock:
+            self._watchers.setdefault(user_id, []).append(callback)
+        return True
+
+    def unwatch(self, user_id, callback):
+        """Stops calling a callback registered with watch()."""
+        with self._watch_lock:
+            callbacks = self._watchers.get(user_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _follow(self, user_id):
+        """Subscribes the cache to a user's change notifications, once. Returns False if there are none."""
+        if self.listener is None:
+            return False
+        with self._watch_lock:
+            if user_id in self._followed:
+                return True
+            self._followed.add(user_id)
+        self.listener.subscribe(user_id, self._apply_changes)
+        return True
+
+    def _apply_changes(self, user_id, changes):
+        """Change listener callback: patches the changed rows into the cache, then tells the watchers.
+
+        Only the changed rows are fetched; ``changes`` is None after a reconnect,
+        when notifications may have been lost and the user's list is reloaded.
+        """
+        if changes is None or len(changes) > CHANGE_REFETCH_LIMIT:
+            self.cache.invalidate(user_id)
+        elif user_id in self.cache:
+            changed = [task_id for op, task_id in changes if op != "delete"]
+            tasks = self.db.fetch_tasks_by_ids(user_id, changed) if changed else []
+            if tasks is None:
+                self.cache.invalidate(user_id)
+            else:
+                for task in tasks:
+                    self.cache.put_task(user_id, task)
+                found = {task.id for task in tasks}
+                for op, task_id in changes:
+                    if task_id not in found:
+                        self.cache.remove_task(user_id, task_id)  # deleted, possibly after the update we were told of
+        logger.debug("Applied %s remote changes for user_id=%s", "all" if changes is None else len(changes), user_id)
+        with self._watch_lock:
+            callbacks = list(self._watchers.get(user_id, ()))
+        for callback in callbacks:
+            callback(user_id)
+
+    @metrics.service_operation
+    def login(self, username, password):
+        """Returns the user id for valid credentials, otherwise None.
+
+        The password is checked in a worker process. A legacy plaintext password,
+        or one hashed with outdated cost parameters, is rehashed on success.
+        """
+        logger.info("Attempting login for username=%s", username)
+        user = self.db.fetch_user(username)
+        ok, new_hash = self.passwords.verify(password, user.password_hash if user else None)
+        if not ok:
+            return None
+        if new_hash is not None and self.db.update_user_password(user.id, new_hash):
+            logger.info("Rehashed password for user_id=%s", user.id)
+        return user.id
+
+    @metrics.service_operation
+    def open_session(self, username, password):
+        """Logs in and starts a session. Returns ``(user_id, token, expires_at)``, or None for bad credentials."""
+        user_id = self.login(username, password)
+        if not user_id:
+            return None
+        token, expires_at = self.sessions.create(user_id)
+        logger.info("Opened session for user_id=%s", user_id)
+        return user_id, token, expires_at
+
+    @metrics.service_operation
+    def register(self, username, password):
+        """Registers a new user and returns the id; raises UsernameTakenError if the name exists in any case."""
+        logger.info("Attempting registration for username=%s", username)
+        user_id = self.db.insert_user(username, self.passwords.hash(password))
+        if user_id is False:
+            raise UsernameTakenError(f"Username {username!r} is already taken")
+        if not user_id:
+            raise TaskManagerError("Registration failed")
+        return user_id
+
+    @metrics.service_operation
+    def add_task(self, user_id, title, description, priority, deadline, duration):
+        """Validates and inserts a task; returns the new task id."""
+        validated = [parse_task_input(title, description, priority, deadline, duration)]
+        return self._inserted(user_id, self.db.insert_tasks(validated, user_id), validated)[0]
+
+    @metrics.service_operation
+    def edit_task(self, user_id, task_id, title, description, priority, deadline, duration):
+        """Validates and updates a task; raises TaskNotFoundError if the user has no such task."""
+        rows = [(task_id,) + parse_task_input(title, description, priority, deadline, duration)]
+        self._require_task(task_id, self._updated(user_id, rows, self.db.update_tasks(rows, user_id))[0])
+
+    @metrics.service_operation
+    def delete_task(self, user_id, task_id):
+        """Deletes a task; raises TaskNotFoundError if the user has no such task."""
+        self._require_task(task_id, self._deleted(user_id, [task_id], self.db.delete_tasks([task_id], user_id))[0])
+
+    @metrics.service_operation
+    def add_tasks(self, user_id, tasks):
+        """Validates and inserts (title, description, priority, deadline, duration) tuples in one transaction.
+
+        All-or-nothing: one invalid task rejects the batch. Returns the new ids in input order.
+        """
+        validated = self._validate_batch(tasks)
+        return self._inserted(user_id, self.db.insert_tasks(validated, user_id), validated)
+
+    @metrics.service_operation
+    def edit_tasks(self, user_id, tasks):
+        """Validates and applies (task_id, title, description, priority, deadline, duration) tuples in one transaction.
+
+        Returns one bool per task; False means it wasn't found.
+        """
+        rows = self._validate_edits(tasks)
+        return self._updated(user_id, rows, self.db.update_tasks(rows, user_id))
+
+    @metrics.service_operation
+    def delete_tasks(self, user_id, task_ids):
+        """Deletes tasks in one transaction. Returns one bool per id; False means it wasn't found."""
+        task_ids = list(task_ids)
+        return self._deleted(user_id, task_ids, self.db.delete_tasks(task_ids, user_id))
+
+    def _load_tasks(self, user_id):
+        """Fetches a user's tasks into the cache, which then follows other clients' changes to them.
+
+        Returns the loaded UserTasks, to be read through ``self.cache.read``. A
+        fetch that a write raced with is thrown away and repeated; if writes
+        keep racing, the last fetch serves this one call without being cached.
+        """
+        self._follow(user_id)  # LISTEN before reading, so a change in between isn't missed
+        for _ in range(LOAD_ATTEMPTS):
+            generation = self.cache.generation(user_id)
+            rows = self.db.fetch_all_tasks(user_id)
+            if rows is None:
+                raise TaskManagerError(f"Failed to load tasks for user_id={user_id}")
+            entry = self.cache.load(user_id, rows, generation)
+            if entry is not None:
+                return entry
+            logger.debug("Task load for user_id=%s raced with a write; fetching again", user_id)
+        return UserTasks(rows)
+
+    @metrics.service_operation
+    def get_tasks(self, user_id, sort_option="By Deadline", query=None):
+        """Returns the user's tasks in display order.
+
+        ``query`` is an optional TaskQuery that overrides ``sort_option``. Unfiltered
+        deadline and priority orderings are served from the cache; anything else
+        runs as a query in the database.
+        """
+        if query is None:
+            query = TaskQuery.for_sort_option(sort_option)
+        if query.filtered or query.sort_option not in CACHED_SORT_OPTIONS:
+            return self.query_tasks(user_id, query)[0]
+        tasks = self.cache.get_tasks(user_id, query.sort_option)
+        if tasks is None:
+            tasks = self.cache.read(self._load_tasks(user_id), lambda entry: entry.view(query.sort_option))
+        return tasks
+
+    @metrics.service_operation
+    def search_tasks(self, user_id, text, limit=50):
+        """Returns up to ``limit`` tasks whose title or description matches ``text``, best first.
+
+        Uses the database's full-text index when it has one and falls back to an
+        in-memory prefix index over the cached tasks (SQLite, or Postgres offline).
+        """
+        if not tokenize(text):
+            return []
+        if self.db.full_text_search:
+            tasks = self.db.search_tasks(user_id, text, limit)
+            if tasks is not None:
+                return tasks
+            logger.warning("Full-text search unavailable; searching cached tasks for user_id=%s", user_id)
+        tasks = self.cache.search_tasks(user_id, text, limit)
+        if tasks is None:
+            tasks = self.cache.read(self._load_tasks(user_id), lambda entry: entry.search(text, limit))
+        return tasks
+
+    @metrics.service_operation
+    def prepare_search(self, user_id):
+        """Builds the in-memory search index ahead of the first query when the database has no full-text index."""
+        if self.db.full_text_search:
+            return
+        if not self.cache.prepare_search(user_id):
+            self.cache.read(self._load_tasks(user_id), UserTasks.search_index)
+
+    @metrics.service_operation
+    def query_tasks(self, user_id, query):
+        """Runs a TaskQuery in the database; returns (tasks, next_cursor)."""
+        result = self.db.query_tasks(user_id, query)
+        if result is None:
+            raise TaskManagerError(f"Failed to query tasks for user_id={user_id}")
+        return result
+
+    @metrics.service_operation
+    def get_task(self, user_id, task_id):
+        """Returns one task row by id."""
+        found, task = self.cache.get_task(user_id, task_id)
+        if not found:
+            task = self.cache.read(self._load_tasks(user_id), lambda entry: entry.rows.get(task_id))
+        self._require_task(task_id, task is not None)
+        return task
+
+    @metrics.service_operation
+    def get_tasks_page(self, user_id, sort_option="By Deadline", limit=100, cursor=None):
+        """Fetches one page of tasks; returns (tasks, next_cursor)."""
+        return self.query_tasks(user_id, TaskQuery.for_sort_option(sort_option).limit(limit).after(cursor))
+
+    def iter_tasks(self, user_id, sort_option="By Deadline", batch_size=500):
+        """Yields tasks one at a time without loading the whole list into memory."""
+        return self.db.iter_tasks(user_id, sort_option, batch_size)
+
+    @metrics.service_operation
+    def plan_schedule(self, user_id, start=None):
+        """Plans the user's tasks back to back from ``start`` (default: now) and returns the Schedule.
+
+        Each user's SchedulePlanner is kept between calls, so only tasks that
+        changed since the last plan are re-placed.
+        """
+        tasks = self.get_tasks(user_id)
+        with self._planner_lock:
+            planner = self._planners.pop(user_id, None)
+            if planner is None:
+                planner = SchedulePlanner()
+            self._planners[user_id] = planner
+            while len(self._planners) > config.TASK_CACHE_MAX_USERS:
+                self._planners.popitem(last=False)
+            planner.sync(tasks)
+            return planner.plan(start)
+
+    def refresh_tasks(self, user_id):
+        """Drops the cached tasks for a user so the next read goes to the database."""
+        self.cache.invalidate(user_id)
+
+    def pool_stats(self):
+        """Returns storage connection statistics."""
+        return self.db.pool_stats()
+
+    def sync_status(self):
+        """Returns the offline replica's sync state, or None if the backend works against the server directly."""
+        return self.db.sync_status()
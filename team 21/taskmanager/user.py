@@ -1,8 +1,9 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
 class User:
-    def __init__(self, user_id, username, password, tasks):
-        self.user_id = user_id
-        self.username = username
-        self.password = password
-        self.tasks = tasks
-        
-        
\ No newline at end of file
+    """A registered user, as stored in the users table."""
+    id: int
+    username: str
+    password_hash: str = field(repr=False)  # users.password: a passwords.py hash, or legacy plaintext
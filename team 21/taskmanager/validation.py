@@ -0,0 +1,35 @@
+from deadlines import format_deadline, parse_deadline
+
+PRIORITIES = ("High", "Medium", "Low")
+
+
+class TaskValidationError(ValueError):
+    """Raised when task input is invalid; ``title`` is a short heading for the error."""
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+def parse_task_input(title, description, priority, deadline, duration):
+    """Validates raw task fields and returns them normalized for the database.
+
+    Returns ``(title, description, priority, deadline, deadline_datetime, duration)``
+    or raises TaskValidationError. ``deadline`` comes back in canonical form, so
+    "1/2/2025 9:05 pm" is stored as "01/02/2025 09:05 PM".
+    """
+    if not title or not deadline or not duration:
+        raise TaskValidationError("Missing Entries", "Please fill in all non-optional fields")
+    if priority not in PRIORITIES:
+        raise TaskValidationError("Error", "Priority must be High, Medium, or Low")
+    try:
+        duration = int(duration)
+        if duration <= 0:
+            raise ValueError("Duration must be positive")
+    except (TypeError, ValueError):
+        raise TaskValidationError("Error", "Duration must be a positive integer")
+    try:
+        deadline_datetime = parse_deadline(deadline)
+    except (TypeError, ValueError):
+        raise TaskValidationError("Error", "Deadline format: DD/MM/YYYY HH:MM AM/PM")
+    deadline = format_deadline(deadline_datetime)
+    return (title, description, priority, deadline, deadline_datetime, duration)
@@ -0,0 +1,155 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualTable(tk.Frame):
+    """Multi-column table that only materializes the rows currently on screen.
+
+    Rows live in a backing model with a ``task_ids`` list and indexable
+    ``rows`` (see RowModel, which formats a row when it is read); the widget
+    keeps a fixed pool of ``height`` Treeview items and rewrites their values
+    as the user scrolls, so its memory use does not grow with the number of
+    tasks. ``RowModel.update`` moves ``offset`` to keep the top row in place;
+    call render() afterwards.
+    """
+    def __init__(self, parent, model, columns, widths, height=15, on_select=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.model = model
+        self.height = height
+        self.on_select = on_select
+        self.offset = 0
+        self.selected_id = None
+
+        column_ids = [f"c{i}" for i in range(len(columns))]
+        self.tree = ttk.Treeview(self, columns=column_ids, show="headings", height=height, selectmode="browse")
+        for column_id, heading, width in zip(column_ids, columns, widths):
+            self.tree.heading(column_id, text=heading, anchor="w")
+            self.tree.column(column_id, width=width, minwidth=40, stretch=False, anchor="w")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self._items = [self.tree.insert("", "end", values=()) for _ in range(height)]
+        self._shown = len(self._items)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self.height))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self.height))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self.model)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self.model)))
+        self.render()
+
+    # Scrolling
+
+    def _max_offset(self):
+        return max(0, len(self.model) - self.height)
+
+    def scroll_to(self, offset):
+        """Shows rows starting at ``offset``."""
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def see(self, index):
+        """Scrolls the minimum amount needed to bring row ``index`` into view."""
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.height:
+            self.scroll_to(index - self.height + 1)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.model)))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def _on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    # Rendering
+
+    def render(self):
+        """Writes the visible window of rows into the item pool."""
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, self._max_offset()))
+        visible = min(self.height, total - self.offset)
+        for i in range(visible):
+            self.tree.item(self._items[i], values=self.model.rows[self.offset + i])
+        if visible != self._shown:
+            # Hide unused pool items rather than leaving blank selectable rows
+            for i in range(visible, self._shown):
+                self.tree.detach(self._items[i])
+            for i in range(self._shown, visible):
+                self.tree.move(self._items[i], "", i)
+            self._shown = visible
+        self._render_selection()
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + visible) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _render_selection(self):
+        index = self.index_of(self.selected_id)
+        if index is not None and self.offset <= index < self.offset + self._shown:
+            self.tree.selection_set(self._items[index - self.offset])
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    # Selection
+
+    def index_of(self, task_id):
+        if task_id is None:
+            return None
+        return self.model.index_of(task_id)
+
+    def select_index(self, index, see=True):
+        """Selects the row at ``index`` (None clears the selection)."""
+        if index is None or not 0 <= index < len(self.model):
+            self.selected_id = None
+        else:
+            self.selected_id = self.model.task_ids[index]
+            if see:
+                self.see(index)
+        self.render()
+
+    def clear_selection(self):
+        self.select_index(None)
+
+    def _move_selection(self, step):
+        index = self.index_of(self.selected_id)
+        index = 0 if index is None else max(0, min(index + step, len(self.model) - 1))
+        if len(self.model):
+            self.select_index(index)
+            self._notify_select()
+        return "break"
+
+    def _on_tree_select(self, event):
+        # Also fires (queued) after render() moves the highlight; only report real changes
+        selection = self.tree.selection()
+        if not selection:
+            return
+        index = self.offset + self._items.index(selection[0])
+        if index < len(self.model) and self.model.task_ids[index] != self.selected_id:
+            self.selected_id = self.model.task_ids[index]
+            self._notify_select()
+
+    def _notify_select(self):
+        if self.on_select:
+            try:
+                self.on_select(self.selected_id, self.index_of(self.selected_id))
+            except Exception as e:
+                logger.exception("Selection callback error: %s", e)